@@ -1,14 +1,36 @@
-import json
 import math
 import os
 import random
 import sys
 import time
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple, Optional, Dict
+
+from typist_replay import (
+    ReplayError,
+    best_ghost,
+    play_in_terminal,
+    replay_blob_name,
+)
+from typist_storage import (
+    STORAGE_ERRORS,
+    STORY_PROGRESS_DOC,
+    StorageBackend,
+    storage_from_url,
+)
+from typist_difficulty import DifficultyIndex
+from typist_story import compile_story
+from typist_trends import adaptive_thresholds, load_trends, record_trend, trend_mode
 
 SCORES_FILE = "typing_teacher_scores.json"
 STORY_PROGRESS_FILE = "story_progress.json"
+# e.g. "sqlite:///typist.db" or "redis://cache:6379/0"; default is local files
+STORAGE_URL = os.environ.get("TYPIST_STORAGE_URL", "file:")
+# Story pass thresholds follow each player's trend when set to "1"
+ADAPTIVE_STORY = os.environ.get("TYPIST_ADAPTIVE_STORY", "0") == "1"
+# Trends key for the terminal app's single, local player
+LOCAL_PLAYER = "local"
 
 POTTY_WORDS = [
     "toilet",
@@ -47,6 +69,34 @@ SILLY_SENTENCES = [
     "When in doubt, backspace like a ninja, not a woodpecker.",
 ]
 
+CLEAN_WORDS = [
+    "river",
+    "planet",
+    "galaxy",
+    "python",
+    "keyboard",
+    "coffee",
+    "pepper",
+    "window",
+    "music",
+    "garden",
+    "novel",
+    "signal",
+]
+
+CLEAN_SENTENCES = [
+    "Practice makes progress, not perfection.",
+    "Fast is fine, but accuracy is final.",
+    "Steady hands, focused mind, smooth typing.",
+    "Breathe, relax, and trust your muscle memory.",
+]
+
+CLEAN_BOSS_SENTENCES = [
+    "Practice daily and your speed will rise.",
+    "Accuracy first, then speed follows.",
+    "Consistency beats intensity over time.",
+]
+
 WITTY_PRAISE = [
     "Cleaner than a triple flush!",
     "That was minty fresh.",
@@ -64,14 +114,105 @@ WITTY_ROASTS = [
 ]
 
 
-@dataclass
+class WordResult(NamedTuple):
+    word: str
+    status: str          # "correct", "mistyped" or "skipped"
+    correct_chars: int
+    seconds: float       # the attempt's time, split by characters typed
+
+
 class AttemptStats:
-    expected: str
-    typed: str
-    seconds: float
-    gross_wpm: float
-    accuracy_pct: float
-    net_wpm: float
+    """Numbers for one attempt, with the prompt and typed text kept aside.
+
+    Only the numeric fields go into payloads and history by default; the
+    text is there for the terminal and for clients that ask to see it.
+    ``words`` is only filled in when per-word results were asked for.
+    """
+    __slots__ = ("seconds", "gross_wpm", "accuracy_pct", "net_wpm",
+                 "expected", "typed", "words")
+    NUMERIC_FIELDS = ("seconds", "gross_wpm", "accuracy_pct", "net_wpm")
+
+    def __init__(self, expected: str, typed: str, seconds: float,
+                 gross_wpm: float, accuracy_pct: float, net_wpm: float,
+                 words: Optional[Tuple[WordResult, ...]] = None) -> None:
+        self.seconds = seconds
+        self.gross_wpm = gross_wpm
+        self.accuracy_pct = accuracy_pct
+        self.net_wpm = net_wpm
+        self.expected = expected
+        self.typed = typed
+        self.words = words
+
+    def numbers(self) -> Tuple[float, float, float, float]:
+        return (self.seconds, self.gross_wpm, self.accuracy_pct, self.net_wpm)
+
+    def as_dict(self, include_text: bool = False) -> Dict[str, object]:
+        out: Dict[str, object] = dict(zip(self.NUMERIC_FIELDS, self.numbers()))
+        if include_text:
+            out["expected"] = self.expected
+            out["typed"] = self.typed
+        if self.words is not None:
+            out["words"] = [w._asdict() for w in self.words]
+        return out
+
+
+RECENT_ATTEMPTS = 10
+
+
+class AttemptRing:
+    """Fixed-size ring of the numbers from the most recent attempts.
+
+    ``to_state``/``from_state`` round-trip through plain lists so the ring
+    can live in a session cookie.
+    """
+    __slots__ = ("size", "head", "items")
+
+    def __init__(self, size: int = RECENT_ATTEMPTS) -> None:
+        self.size = size
+        self.head = 0  # next slot to overwrite once full
+        self.items: List[List[float]] = []
+
+    def push(self, stats: AttemptStats) -> None:
+        row = [round(v, 2) for v in stats.numbers()]
+        if len(self.items) < self.size:
+            self.items.append(row)
+        else:
+            self.items[self.head] = row
+        self.head = (self.head + 1) % self.size
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def rows(self) -> List[List[float]]:
+        """Oldest first."""
+        if len(self.items) < self.size:
+            return list(self.items)
+        return self.items[self.head:] + self.items[:self.head]
+
+    def summary(self) -> Dict[str, float]:
+        n = len(self.items)
+        if not n:
+            return {"count": 0, "avg_net": 0.0, "best_net": 0.0, "avg_acc": 0.0}
+        return {
+            "count": n,
+            "avg_net": round(sum(r[3] for r in self.items) / n, 1),
+            "best_net": round(max(r[3] for r in self.items), 1),
+            "avg_acc": round(sum(r[2] for r in self.items) / n, 1),
+        }
+
+    def to_state(self) -> Dict[str, object]:
+        return {"head": self.head, "items": self.items}
+
+    @classmethod
+    def from_state(cls, state: Optional[dict],
+                   size: int = RECENT_ATTEMPTS) -> "AttemptRing":
+        ring = cls(size)
+        if isinstance(state, dict):
+            items = [list(r) for r in state.get("items") or [] if len(r) == 4]
+            ring.items = items[:size]
+            ring.head = (int(state.get("head", 0)) if len(ring.items) == size
+                         else len(ring.items)) % size
+        return ring
 
 
 @dataclass
@@ -87,36 +228,102 @@ class StoryNode:
         str]  # auto-follow when failing; if None, repeat node
 
 
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = storage_from_url(STORAGE_URL, SCORES_FILE,
+                                    STORY_PROGRESS_FILE)
+    return _storage
+
+
+def reset_storage_after_fork() -> None:
+    """Forget storage locks the parent's threads held; call in a forked worker."""
+    if _storage is not None:
+        _storage.reset_after_fork()
+
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """Swap the active backend (``None`` re-reads ``STORAGE_URL`` lazily)."""
+    global _storage
+    if _storage is not None and _storage is not backend:
+        _storage.close()
+    _storage = backend
+
+
 def load_scores() -> List[dict]:
-    if not os.path.exists(SCORES_FILE):
-        return []
-    try:
-        with open(SCORES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f) or []
-    except Exception:
-        return []
+    return get_storage().load_scores()
 
 
-def save_score(mode: str, net_wpm: float, accuracy_pct: float) -> None:
-    scores = load_scores()
-    scores.append({
+def save_score(mode: str, net_wpm: float, accuracy_pct: float,
+               player: Optional[str] = None) -> dict:
+    """Store a score; if the store is down, warn and return it without an ``id``
+    rather than crash the game."""
+    record = {
         "timestamp": int(time.time()),
         "mode": mode,
         "net_wpm": round(net_wpm, 2),
         "accuracy_pct": round(accuracy_pct, 1),
-    })
+    }
     try:
-        with open(SCORES_FILE, "w", encoding="utf-8") as f:
-            json.dump(scores, f, indent=2)
-    except Exception:
-        pass
+        record = get_storage().append_score(record)
+        if player:
+            record_trend(get_storage(), player, mode, net_wpm, accuracy_pct,
+                         record["timestamp"])
+    except STORAGE_ERRORS as exc:
+        print(f"Warning: score not saved ({exc})", file=sys.stderr)
+    return record
 
 
-def compute_stats(expected: str, typed: str, seconds: float) -> AttemptStats:
+@lru_cache(maxsize=1024)
+def word_layout(prompt: str) -> Tuple[Tuple[Tuple[int, int], ...], Tuple[int, ...]]:
+    """``(spans, owner)`` for ``prompt``: each word's ``[start, end)`` and,
+    per character, the index of the word it belongs to (-1 for spaces).
+
+    Prompts repeat (the banks are small), so this is worked out once each.
+    """
+    spans: List[Tuple[int, int]] = []
+    owner = [-1] * len(prompt)
+    start = None
+    for i, ch in enumerate(prompt + " "):
+        if ch != " " and start is None:
+            start = i
+        elif ch == " " and start is not None:
+            for j in range(start, i):
+                owner[j] = len(spans)
+            spans.append((start, i))
+            start = None
+    return tuple(spans), tuple(owner)
+
+
+def compute_stats(expected: str, typed: str, seconds: float,
+                  per_word: bool = False) -> AttemptStats:
     if seconds <= 0:
         seconds = 1e-6
-    correct_chars = sum(1 for i, c in enumerate(typed)
-                        if i < len(expected) and expected[i] == c)
+    words = None
+    if per_word:
+        spans, owner = word_layout(expected)
+        hits = [0] * len(spans)
+        correct_chars = 0
+        # One pass over the overlap feeds both the total and the words
+        for i, (e, t) in enumerate(zip(expected, typed)):
+            if e == t:
+                correct_chars += 1
+                if owner[i] >= 0:
+                    hits[owner[i]] += 1
+        per_char = seconds / max(len(typed), 1)
+        results = []
+        for (start, end), hit in zip(spans, hits):
+            reached = max(0, min(end, len(typed)) - start)
+            status = ("correct" if hit == end - start
+                      else "skipped" if reached == 0 else "mistyped")
+            results.append(WordResult(expected[start:end], status, hit,
+                                      round(reached * per_char, 3)))
+        words = tuple(results)
+    else:
+        correct_chars = sum(1 for e, t in zip(expected, typed) if e == t)
     total_chars = max(len(expected), 1)
     accuracy_pct = (correct_chars / total_chars) * 100.0
     gross_wpm = (len(typed) / 5.0) / (seconds / 60.0)
@@ -128,17 +335,61 @@ def compute_stats(expected: str, typed: str, seconds: float) -> AttemptStats:
         gross_wpm=gross_wpm,
         accuracy_pct=accuracy_pct,
         net_wpm=net_wpm,
+        words=words,
     )
 
 
+def word_bank(potty_mode: bool) -> List[str]:
+    return POTTY_WORDS if potty_mode else CLEAN_WORDS
+
+
+def sentence_bank(potty_mode: bool) -> List[str]:
+    return SILLY_SENTENCES if potty_mode else CLEAN_SENTENCES
+
+
+def boss_bank(potty_mode: bool) -> List[str]:
+    # Always a fresh list, safe for callers to change
+    extra = SILLY_SENTENCES if potty_mode else CLEAN_BOSS_SENTENCES
+    return POTTY_WORDS + extra
+
+
+# Built-in banks never change, so each is scored once, on first use
+@lru_cache(maxsize=None)
+def word_index(potty_mode: bool) -> DifficultyIndex:
+    return DifficultyIndex(word_bank(potty_mode))
+
+
+@lru_cache(maxsize=None)
+def sentence_index(potty_mode: bool) -> DifficultyIndex:
+    return DifficultyIndex(sentence_bank(potty_mode))
+
+
+@lru_cache(maxsize=None)
+def boss_index(potty_mode: bool) -> DifficultyIndex:
+    return DifficultyIndex(boss_bank(potty_mode))
+
+
+def recent_net_wpm(mode: str, player: str = LOCAL_PLAYER) -> Optional[float]:
+    """The player's smoothed net WPM in ``mode``; None before their first score."""
+    trend = load_trends(get_storage(), player).get(trend_mode(mode))
+    return trend["ewma_net"] if trend else None
+
+
 def format_stats(stats: AttemptStats) -> str:
     return (
         f"Time: {stats.seconds:.1f}s | Gross WPM: {stats.gross_wpm:.1f} | "
         f"Accuracy: {stats.accuracy_pct:.1f}% | Net WPM: {stats.net_wpm:.1f}")
 
 
+# Bars for praise vs. roast after a prompt and after a boss battle
+PRAISE_NET_WPM = 35.0
+PRAISE_ACC = 92.0
+BOSS_PRAISE_NET_WPM = 40.0
+BOSS_PRAISE_ACC = 95.0
+
+
 def witty_comment(stats: AttemptStats) -> str:
-    good = stats.net_wpm >= 35 and stats.accuracy_pct >= 92
+    good = stats.net_wpm >= PRAISE_NET_WPM and stats.accuracy_pct >= PRAISE_ACC
     pool = WITTY_PRAISE if good else WITTY_ROASTS
     return random.choice(pool)
 
@@ -181,7 +432,8 @@ def run_single_prompt(prompt_text: str) -> AttemptStats:
 def generate_practice_line(
     allowed_chars: str,
     num_words: int = 6,
-    word_len_range: Tuple[int, int] = (2, 6)) -> str:
+    word_len_range: Tuple[int, int] = (2, 6),
+    rng=random) -> str:
     """Generate a practice line containing only allowed characters (plus space).
 
     This produces nonsense-but-typeable words using the current lesson set.
@@ -189,14 +441,14 @@ def generate_practice_line(
     chars = list(allowed_chars)
     words: List[str] = []
     for _ in range(num_words):
-        length = random.randint(*word_len_range)
-        word = "".join(random.choice(chars) for _ in range(length))
+        length = rng.randint(*word_len_range)
+        word = "".join(rng.choice(chars) for _ in range(length))
         words.append(word)
     return " ".join(words)
 
 
 def generate_prompts_for_lesson(allowed_chars: str,
-                                rounds: int = 5) -> List[str]:
+                                rounds: int = 5, rng=random) -> List[str]:
     prompts: List[str] = []
     # Include some structured patterns to build rhythm
     patterns = [
@@ -213,29 +465,22 @@ def generate_prompts_for_lesson(allowed_chars: str,
         prompts.extend(filtered_patterns[:2])
     # Fill remaining with generated lines
     while len(prompts) < rounds:
-        prompts.append(generate_practice_line(allowed_chars))
+        prompts.append(generate_practice_line(allowed_chars, rng=rng))
     return prompts[:rounds]
 
 
 def load_story_progress() -> Dict:
-    if not os.path.exists(STORY_PROGRESS_FILE):
-        return {"current_node": "start", "history": []}
-    try:
-        with open(STORY_PROGRESS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                return {"current_node": "start", "history": []}
-            return data
-    except Exception:
+    data = get_storage().load_doc(STORY_PROGRESS_DOC)
+    if not isinstance(data, dict):
         return {"current_node": "start", "history": []}
+    return data
 
 
 def save_story_progress(progress: Dict) -> None:
     try:
-        with open(STORY_PROGRESS_FILE, "w", encoding="utf-8") as f:
-            json.dump(progress, f, indent=2)
-    except Exception:
-        pass
+        get_storage().save_doc(STORY_PROGRESS_DOC, progress)
+    except STORAGE_ERRORS as exc:
+        print(f"Warning: story progress not saved ({exc})", file=sys.stderr)
 
 
 def reset_story_progress() -> None:
@@ -263,12 +508,22 @@ def play_story_node(node: StoryNode) -> Tuple[float, float]:
     avg_acc = total_acc / len(prompts)
     print("Lesson result:")
     print(f"Net WPM: {avg_net:.1f} | Accuracy: {avg_acc:.1f}%")
-    save_score(f"Story: {node.id}", avg_net, avg_acc)
+    save_score(f"Story: {node.id}", avg_net, avg_acc, LOCAL_PLAYER)
     return avg_net, avg_acc
 
 
-def story_passed(avg_net: float, avg_acc: float) -> bool:
-    return avg_acc >= GOOD_ACC_THRESHOLD and avg_net >= GOOD_NET_WPM_THRESHOLD
+def story_thresholds(player: Optional[str] = None) -> Tuple[float, float]:
+    """(net WPM, accuracy %) needed to pass a chapter."""
+    if not (ADAPTIVE_STORY and player):
+        return GOOD_NET_WPM_THRESHOLD, GOOD_ACC_THRESHOLD
+    trend = load_trends(get_storage(), player).get(trend_mode("Story:"))
+    return adaptive_thresholds(trend, GOOD_NET_WPM_THRESHOLD, GOOD_ACC_THRESHOLD)
+
+
+def story_passed(avg_net: float, avg_acc: float,
+                 thresholds: Optional[Tuple[float, float]] = None) -> bool:
+    net_needed, acc_needed = thresholds or (GOOD_NET_WPM_THRESHOLD, GOOD_ACC_THRESHOLD)
+    return avg_acc >= acc_needed and avg_net >= net_needed
 
 
 def story_mode_menu(story_nodes: Dict[str, StoryNode]) -> None:
@@ -279,6 +534,9 @@ def story_mode_menu(story_nodes: Dict[str, StoryNode]) -> None:
         current_id = progress.get("current_node", "start")
         node = story_nodes.get(current_id)
         print(f"Current chapter: {node.title if node else current_id}")
+        remaining = STORY.distance_to_ending(current_id)
+        if remaining:
+            print(f"Chapters to go: at least {remaining}")
         print("\n1) Continue Story")
         print("2) Reset Story Progress")
         print("3) Back to Main Menu")
@@ -310,8 +568,10 @@ def play_story(story_nodes: Dict[str, StoryNode]) -> None:
             prompt_enter()
             return
 
+        # Thresholds are read before the chapter's own score moves the trend
+        thresholds = story_thresholds(LOCAL_PLAYER)
         avg_net, avg_acc = play_story_node(node)
-        passed = story_passed(avg_net, avg_acc)
+        passed = story_passed(avg_net, avg_acc, thresholds)
         print("")
         if passed:
             print(node.success_text)
@@ -592,29 +852,20 @@ STORY_NODES: Dict[str, StoryNode] = {
     ),
 }
 
+# Validated, index-based form of the graph; a broken link fails at import
+STORY = compile_story(STORY_NODES)
+
 
 def word_drills(potty_mode: bool) -> None:
     clear_screen()
     print("Toilet Typist — Word Drills")
     print("Warm up those finger noodles.\n")
-    words = POTTY_WORDS if potty_mode else [
-        "river",
-        "planet",
-        "galaxy",
-        "python",
-        "keyboard",
-        "coffee",
-        "pepper",
-        "window",
-        "music",
-        "garden",
-        "novel",
-        "signal",
-    ]
+    words = word_index(potty_mode)
+    target = recent_net_wpm("Word Drills")
     rounds = 10
     total_net, total_acc = 0.0, 0.0
     for i in range(1, rounds + 1):
-        prompt_text = " ".join(random.sample(words, k=min(4, len(words))))
+        prompt_text = " ".join(words.sample_for_wpm(target, 4))
         print(f"\nRound {i}/{rounds}")
         stats = run_single_prompt(prompt_text)
         total_net += stats.net_wpm
@@ -623,7 +874,7 @@ def word_drills(potty_mode: bool) -> None:
     avg_acc = total_acc / rounds
     print("\nAverages across drills:")
     print(f"Net WPM: {avg_net:.1f} | Accuracy: {avg_acc:.1f}%")
-    save_score("Word Drills", avg_net, avg_acc)
+    save_score("Word Drills", avg_net, avg_acc, LOCAL_PLAYER)
     prompt_enter()
 
 
@@ -631,14 +882,9 @@ def sentence_sprints(potty_mode: bool) -> None:
     clear_screen()
     print("Toilet Typist — Sentence Sprints")
     print("Type full sentences without spraying typos everywhere.\n")
-    sentences = SILLY_SENTENCES if potty_mode else [
-        "Practice makes progress, not perfection.",
-        "Fast is fine, but accuracy is final.",
-        "Steady hands, focused mind, smooth typing.",
-        "Breathe, relax, and trust your muscle memory.",
-    ]
+    sentences = sentence_index(potty_mode)
     rounds = min(6, len(sentences))
-    picks = random.sample(sentences, k=rounds)
+    picks = sentences.sample_for_wpm(recent_net_wpm("Sentence Sprints"), rounds)
     total_net, total_acc = 0.0, 0.0
     for i, sentence in enumerate(picks, start=1):
         print(f"\nSprint {i}/{rounds}")
@@ -649,7 +895,7 @@ def sentence_sprints(potty_mode: bool) -> None:
     avg_acc = total_acc / rounds
     print("\nAverages across sprints:")
     print(f"Net WPM: {avg_net:.1f} | Accuracy: {avg_acc:.1f}%")
-    save_score("Sentence Sprints", avg_net, avg_acc)
+    save_score("Sentence Sprints", avg_net, avg_acc, LOCAL_PLAYER)
     prompt_enter()
 
 
@@ -659,19 +905,15 @@ def timed_boss_battle(potty_mode: bool, duration_seconds: int = 60) -> None:
     print(
         "Type as many prompts as you can in the time limit. Accuracy matters.\n"
     )
-    bank = (POTTY_WORDS + SILLY_SENTENCES) if potty_mode else (POTTY_WORDS + [
-        "Practice daily and your speed will rise.",
-        "Accuracy first, then speed follows.",
-        "Consistency beats intensity over time.",
-    ])
-    random.shuffle(bank)
+    bank = boss_index(potty_mode)
+    band = bank.window_for_wpm(recent_net_wpm("Boss Battle 60s"))
     count_down(3)
     end_time = time.time() + duration_seconds
     total_chars_typed = 0
     total_correct_chars = 0
     prompts_attempted = 0
     while time.time() < end_time:
-        prompt_text = random.choice(bank)
+        prompt_text = bank.pick(*band, 1)[0]
         print("-")
         print(prompt_text)
         print("-")
@@ -699,11 +941,11 @@ def timed_boss_battle(potty_mode: bool, duration_seconds: int = 60) -> None:
     print(
         f"Prompts: {prompts_attempted} | Gross WPM: {gross_wpm:.1f} | Accuracy: {accuracy_pct:.1f}% | Net WPM: {net_wpm:.1f}"
     )
-    if net_wpm >= 40 and accuracy_pct >= 95:
+    if net_wpm >= BOSS_PRAISE_NET_WPM and accuracy_pct >= BOSS_PRAISE_ACC:
         print(random.choice(WITTY_PRAISE))
     else:
         print(random.choice(WITTY_ROASTS))
-    save_score("Boss Battle 60s", net_wpm, accuracy_pct)
+    save_score("Boss Battle 60s", net_wpm, accuracy_pct, LOCAL_PLAYER)
     prompt_enter()
 
 
@@ -726,8 +968,26 @@ def view_scores() -> None:
     prompt_enter()
 
 
-def main_menu() -> None:
-    potty_mode = True  # potty humor on by default
+def watch_ghost_replay() -> None:
+    clear_screen()
+    print("Toilet Typist — Ghost Replay")
+    ghost = best_ghost(get_storage())
+    stream = get_storage().open_blob(replay_blob_name(ghost["score_id"])) if ghost else None
+    if not stream:
+        print("No ghosts yet. Race one in the web app's Ghost mode first.")
+        prompt_enter()
+        return
+    print(f"Leaderboard ghost: {ghost['net_wpm']} WPM at {ghost['accuracy_pct']}%\n")
+    try:
+        with stream:
+            play_in_terminal(stream)
+    except ReplayError:
+        print("That replay is corrupted. The ghost has been flushed.")
+    prompt_enter()
+
+
+def main_menu(potty_mode: bool = True) -> None:
+    # potty humor on by default
     while True:
         clear_screen()
         print("Toilet Typist — The Witty Typing Trainer")
@@ -738,11 +998,12 @@ def main_menu() -> None:
         print("4) Story Mode")
         print(f"5) Toggle Potty Humor: {'ON' if potty_mode else 'OFF'}")
         print("6) View High Scores")
-        print("7) Quit")
+        print("7) Watch Ghost Replay")
+        print("8) Quit")
         try:
             choice = input("Select an option: ").strip()
         except EOFError:
-            choice = "7"
+            choice = "8"
         if choice == "1":
             word_drills(potty_mode)
         elif choice == "2":
@@ -758,6 +1019,8 @@ def main_menu() -> None:
         elif choice == "6":
             view_scores()
         elif choice == "7":
+            watch_ghost_replay()
+        elif choice == "8":
             print("Goodbye! May your typos be few and your snacks abundant.")
             break
         else:
@@ -765,8 +1028,35 @@ def main_menu() -> None:
             time.sleep(1.0)
 
 
-if __name__ == "__main__":
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Toilet Typist terminal trainer")
+    parser.add_argument("--script", help="run headless from a JSON/JSONL session script")
+    parser.add_argument("--config", help="JSON file of defaults (potty_mode, and for scripts mode, seed, ...)")
+    parser.add_argument("--output", help="write headless JSON results here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="echo the headless transcript to stderr")
+    args = parser.parse_args(argv)
+
+    config: Dict = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if args.script:
+        from typist_headless import run_script
+        try:
+            run_script(args.script, config, args.output, args.verbose)
+        except (OSError, ValueError) as exc:
+            parser.exit(2, f"error: {exc}\n")
+        return
+    if args.output or args.verbose:
+        parser.error("--output and --verbose only apply to --script runs")
     try:
-        main_menu()
+        main_menu(bool(config.get("potty_mode", True)))
     except KeyboardInterrupt:
         print("\nSee ya!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Offline trend reports over score and story-progress files from many machines.
+
+Score files may be checkpoints (JSON arrays) or the ``.log`` files that
+file storage appends to between checkpoints; collect both.
+
+Each input file is one map task on a process pool. Records are streamed
+(never ``json.load``-ed whole) into small partial aggregates, and the
+parent merges them as they complete. Writes three CSV tables:
+
+- ``wpm_trends.csv``        per-mode, per-day count / mean net WPM / mean accuracy
+- ``chapter_pass_rates.csv`` attempts, passes and fails for each story node
+- ``gross_loops.csv``       failure loops that repeat a ``gross*`` node
+
+    python typist_analytics.py collected/**/*.json collected/**/*.log --out reports/ --jobs 8
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from typist_storage import iter_json_array, iter_log_records
+
+CHUNK = 1 << 16
+# The start of a score-log line: 8 hex digits of CRC, then a JSON object
+LOG_LINE = re.compile(r"[0-9a-f]{8} \{")
+
+
+class _Prefixed:
+    """File-like view of ``prefix`` followed by the rest of ``fp``."""
+
+    def __init__(self, prefix: str, fp) -> None:
+        self.prefix = prefix
+        self.fp = fp
+
+    def read(self, n: int) -> str:
+        if self.prefix:
+            out, self.prefix = self.prefix[:n], self.prefix[n:]
+            return out
+        return self.fp.read(n)
+
+
+def _skip_ws(fp, buf: str) -> str:
+    while True:
+        buf = buf.lstrip()
+        if buf:
+            return buf
+        buf = fp.read(CHUNK)
+        if not buf:
+            return ""
+
+
+def sniff_and_stream(path: str) -> Tuple[str, Iterator[Any]]:
+    """Classify a file and stream its records.
+
+    Score files are top-level arrays or score logs (CRC-prefixed JSON
+    lines); progress files are objects whose ``history`` array is streamed
+    after seeking to its key.
+    """
+    fp = open(path, "r", encoding="utf-8")
+    head = _skip_ws(fp, fp.read(CHUNK))
+    if LOG_LINE.match(head):
+        fp.close()
+        fp = open(path, "rb")
+        return "scores", _closing(fp, iter_log_records(fp))
+    if head.startswith("["):
+        return "scores", _closing(fp, iter_json_array(_Prefixed(head, fp)))
+    if head.startswith("{"):
+        marker = '"history"'
+        buf = head
+        while marker not in buf:
+            more = fp.read(CHUNK)
+            if not more:
+                fp.close()
+                return "progress", iter(())
+            # Keep a tail in case the marker straddles two chunks
+            buf = buf[-len(marker):] + more
+        rest = buf[buf.index(marker) + len(marker):]
+        rest = _skip_ws(fp, rest)
+        if not rest.startswith(":"):
+            fp.close()
+            raise ValueError(f"{path}: malformed progress file")
+        rest = _skip_ws(fp, rest[1:])
+        return "progress", _closing(fp, iter_json_array(_Prefixed(rest, fp)))
+    fp.close()
+    return "unknown", iter(())
+
+
+def _closing(fp, records: Iterator[Any]) -> Iterator[Any]:
+    with fp:
+        yield from records
+
+
+def empty_partial() -> Dict[str, Dict]:
+    return {"wpm": {}, "chapters": {}, "loops": {}, "files": {"scores": 0, "progress": 0, "errors": 0}}
+
+
+def _add_history_entry(partial: Dict[str, Dict], entry: dict, loop: List) -> None:
+    node = str(entry.get("node", "?"))
+    result = entry.get("result")
+    if result not in ("success", "fail"):
+        return  # choice and reset entries carry no attempt
+    attempts, passes, fails = partial["chapters"].get(node, (0, 0, 0))
+    partial["chapters"][node] = (attempts + 1, passes + (result == "success"),
+                                 fails + (result == "fail"))
+    # loop = [node, consecutive fails]; a loop is a gross node failed twice+
+    if result == "fail" and node.startswith("gross"):
+        if loop[0] == node:
+            loop[1] += 1
+        else:
+            _close_loop(partial, loop)
+            loop[0], loop[1] = node, 1
+    else:
+        _close_loop(partial, loop)
+
+
+def _close_loop(partial: Dict[str, Dict], loop: List) -> None:
+    node, length = loop
+    if node is not None and length >= 2:
+        loops, total, longest = partial["loops"].get(node, (0, 0, 0))
+        partial["loops"][node] = (loops + 1, total + length, max(longest, length))
+    loop[0], loop[1] = None, 0
+
+
+def map_file(path: str) -> Dict[str, Dict]:
+    """Map step: one file to a partial aggregate (runs in a worker)."""
+    partial = empty_partial()
+    try:
+        kind, records = sniff_and_stream(path)
+        if kind == "scores":
+            wpm = partial["wpm"]
+            for r in records:
+                day = time.strftime("%Y-%m-%d", time.gmtime(r.get("timestamp", 0)))
+                key = (str(r.get("mode", "?")), day)
+                n, net, acc = wpm.get(key, (0, 0.0, 0.0))
+                wpm[key] = (n + 1, net + float(r.get("net_wpm", 0.0)),
+                            acc + float(r.get("accuracy_pct", 0.0)))
+        elif kind == "progress":
+            loop: List = [None, 0]
+            for entry in records:
+                if isinstance(entry, dict):
+                    _add_history_entry(partial, entry, loop)
+            _close_loop(partial, loop)
+        else:
+            return partial
+    except (OSError, ValueError):
+        # Keep what streamed before the damage; count the file as an error
+        partial["files"]["errors"] += 1
+        return partial
+    partial["files"][kind] += 1
+    return partial
+
+
+def merge_partials(into: Dict[str, Dict], other: Dict[str, Dict]) -> None:
+    """Reduce step: fold ``other`` into ``into`` by element-wise addition."""
+    for table in ("wpm", "chapters"):
+        for key, values in other[table].items():
+            prev = into[table].get(key)
+            into[table][key] = values if prev is None else tuple(
+                a + b for a, b in zip(prev, values))
+    for node, (loops, total, longest) in other["loops"].items():
+        p_loops, p_total, p_longest = into["loops"].get(node, (0, 0, 0))
+        into["loops"][node] = (p_loops + loops, p_total + total, max(p_longest, longest))
+    for key, n in other["files"].items():
+        into["files"][key] += n
+
+
+def analyze(paths: List[str], jobs: Optional[int] = None) -> Dict[str, Dict]:
+    total = empty_partial()
+    if not paths:
+        return total
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for path in paths:
+            merge_partials(total, map_file(path))
+        return total
+    # Big-first scheduling keeps one huge file from becoming the tail
+    paths = sorted(paths, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0,
+                   reverse=True)
+    with Pool(jobs) as pool:
+        for partial in pool.imap_unordered(map_file, paths):
+            merge_partials(total, partial)
+    return total
+
+
+def _node_order() -> Dict[str, int]:
+    try:
+        from toilet_typist import STORY_NODES
+    except Exception:
+        return {}
+    return {node_id: i for i, node_id in enumerate(STORY_NODES)}
+
+
+def write_reports(total: Dict[str, Dict], out_dir: str) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    order = _node_order()
+    node_sort = lambda node: (order.get(node, len(order)), node)  # noqa: E731
+    written = []
+
+    path = os.path.join(out_dir, "wpm_trends.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["mode", "day", "count", "mean_net_wpm", "mean_accuracy_pct"])
+        for (mode, day), (n, net, acc) in sorted(total["wpm"].items()):
+            w.writerow([mode, day, n, round(net / n, 2), round(acc / n, 1)])
+    written.append(path)
+
+    path = os.path.join(out_dir, "chapter_pass_rates.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["node", "attempts", "passes", "fails", "pass_rate"])
+        for node in sorted(total["chapters"], key=node_sort):
+            attempts, passes, fails = total["chapters"][node]
+            w.writerow([node, attempts, passes, fails, round(passes / max(1, attempts), 3)])
+    written.append(path)
+
+    path = os.path.join(out_dir, "gross_loops.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["node", "loops", "total_fails", "mean_loop_len", "max_loop_len"])
+        for node in sorted(total["loops"], key=node_sort):
+            loops, length, longest = total["loops"][node]
+            w.writerow([node, loops, length, round(length / loops, 2), longest])
+    written.append(path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Trend reports over collected score/progress files")
+    parser.add_argument("inputs", nargs="+", help="files or glob patterns")
+    parser.add_argument("--out", default="reports", help="output directory for CSV tables")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    paths: List[str] = []
+    for pattern in args.inputs:
+        matched = glob.glob(pattern, recursive=True)
+        paths.extend(matched if matched else [pattern])
+    started = time.time()
+    total = analyze(sorted(set(paths)), args.jobs)
+    for path in write_reports(total, args.out):
+        print(path)
+    print(json.dumps(dict(total["files"], seconds=round(time.time() - started, 2))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Word banks and the story graph as immutable, hot-swappable snapshots.
+
+The built-in content lives in ``toilet_typist``. Setting
+``TYPIST_CONTENT_FILE`` points the web app at a JSON file that overrides
+any of the banks and/or the story. ``ContentStore`` watches that file's
+mtime/inode/size from a background thread. On a change it builds and
+validates a new ``ContentSnapshot``, then swaps it in with a single
+reference assignment. Request handlers only ever read that reference,
+so they never wait on a reload. A broken edit is rejected and the
+previous snapshot stays live.
+
+Runs remember the ``version`` they started with, and ``ContentStore.get``
+hands that snapshot back for as long as it is retained.
+
+    python typist_content.py --dump content.json   # start from the built-ins
+    python typist_content.py --check content.json  # validate an edit
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import toilet_typist as tt
+from typist_difficulty import DifficultyIndex
+from typist_story import CompiledStory, StoryGraphError, compile_story
+
+BANK_KEYS = ("potty_words", "silly_sentences", "clean_words", "clean_sentences",
+             "clean_boss_sentences")
+# Snapshots kept for in-flight runs; older versions fall back to current
+RETAINED_VERSIONS = 8
+WATCH_INTERVAL = 2.0
+
+
+@dataclass(frozen=True, eq=False)
+class ContentSnapshot:
+    version: str
+    potty_words: Tuple[str, ...]
+    silly_sentences: Tuple[str, ...]
+    clean_words: Tuple[str, ...]
+    clean_sentences: Tuple[str, ...]
+    clean_boss_sentences: Tuple[str, ...]
+    story_nodes: Mapping[str, Any]
+    story: CompiledStory
+    # Banks sorted by difficulty, keyed like BANK_KEYS plus "boss"/"clean_boss"
+    indexes: Mapping[str, DifficultyIndex]
+
+    def word_bank(self, potty_mode: bool) -> List[str]:
+        return list(self.potty_words if potty_mode else self.clean_words)
+
+    def sentence_bank(self, potty_mode: bool) -> List[str]:
+        return list(self.silly_sentences if potty_mode else self.clean_sentences)
+
+    def boss_bank(self, potty_mode: bool) -> List[str]:
+        extra = self.silly_sentences if potty_mode else self.clean_boss_sentences
+        return list(self.potty_words + extra)
+
+    def word_index(self, potty_mode: bool) -> DifficultyIndex:
+        return self.indexes["potty_words" if potty_mode else "clean_words"]
+
+    def sentence_index(self, potty_mode: bool) -> DifficultyIndex:
+        return self.indexes["silly_sentences" if potty_mode else "clean_sentences"]
+
+    def boss_index(self, potty_mode: bool) -> DifficultyIndex:
+        return self.indexes["boss" if potty_mode else "clean_boss"]
+
+
+def builtin_content() -> Dict[str, Any]:
+    return {
+        "potty_words": list(tt.POTTY_WORDS),
+        "silly_sentences": list(tt.SILLY_SENTENCES),
+        "clean_words": list(tt.CLEAN_WORDS),
+        "clean_sentences": list(tt.CLEAN_SENTENCES),
+        "clean_boss_sentences": list(tt.CLEAN_BOSS_SENTENCES),
+        "story_nodes": [
+            {
+                "id": n.id,
+                "title": n.title,
+                "lesson_keys": n.lesson_keys,
+                "success_text": n.success_text,
+                "failure_text": n.failure_text,
+                "choices": [list(c) for c in n.choices],
+                "failure_next": n.failure_next,
+            }
+            for n in tt.STORY_NODES.values()
+        ],
+    }
+
+
+def build_snapshot(overrides: Optional[Dict[str, Any]] = None) -> ContentSnapshot:
+    """Validate ``overrides`` on top of the built-ins; raises ValueError."""
+    data = builtin_content()
+    data.update(overrides or {})
+    banks: Dict[str, Tuple[str, ...]] = {}
+    for key in BANK_KEYS:
+        values = data[key]
+        if (not isinstance(values, list) or not values
+                or not all(isinstance(v, str) and v for v in values)):
+            raise ValueError(f"{key} must be a non-empty list of strings")
+        banks[key] = tuple(values)
+    if len(banks["potty_words"]) < 4 or len(banks["clean_words"]) < 4:
+        raise ValueError("word banks need at least 4 words")
+    nodes: Dict[str, Any] = {}
+    try:
+        for raw in data["story_nodes"]:
+            node = tt.StoryNode(
+                id=str(raw["id"]),
+                title=str(raw["title"]),
+                lesson_keys=str(raw["lesson_keys"]),
+                success_text=str(raw["success_text"]),
+                failure_text=str(raw["failure_text"]),
+                choices=[(str(label), str(target)) for label, target in raw.get("choices") or []],
+                failure_next=raw.get("failure_next"),
+            )
+            if node.id in nodes:
+                raise ValueError(f"duplicate story node {node.id!r}")
+            nodes[node.id] = node
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f"malformed story node: {exc}") from exc
+    story = compile_story(nodes)  # StoryGraphError is a ValueError
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    # Every entry is scored once here; runs only bisect and sample
+    indexes = {key: DifficultyIndex(banks[key]) for key in BANK_KEYS}
+    indexes["boss"] = DifficultyIndex(banks["potty_words"] + banks["silly_sentences"])
+    indexes["clean_boss"] = DifficultyIndex(banks["potty_words"] + banks["clean_boss_sentences"])
+    return ContentSnapshot(
+        version=hashlib.sha256(canonical).hexdigest()[:12],
+        story_nodes=MappingProxyType(nodes),
+        story=story,
+        indexes=MappingProxyType(indexes),
+        **banks,
+    )
+
+
+def load_content_file(path: str) -> ContentSnapshot:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("content file must hold a JSON object")
+    unknown = set(data) - set(BANK_KEYS) - {"story_nodes"}
+    if unknown:
+        raise ValueError(f"unknown content keys: {', '.join(sorted(unknown))}")
+    return build_snapshot(data)
+
+
+class ContentStore:
+    """The live snapshot plus the last few, for runs that started on them."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.last_error: Optional[str] = None
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._retained: "OrderedDict[str, ContentSnapshot]" = OrderedDict()
+        self._reload_lock = threading.Lock()
+        self.current = build_snapshot()
+        self._retain(self.current)
+        if path:
+            self.check()
+
+    def _retain(self, snapshot: ContentSnapshot) -> None:
+        self._retained[snapshot.version] = snapshot
+        self._retained.move_to_end(snapshot.version)
+        while len(self._retained) > RETAINED_VERSIONS:
+            self._retained.popitem(last=False)
+
+    def get(self, version: Optional[str]) -> ContentSnapshot:
+        # dict.get is atomic under the GIL; no lock on the request path
+        snapshot = self._retained.get(version) if version else None
+        return snapshot or self.current
+
+    def retained(self, version: str) -> Optional[ContentSnapshot]:
+        """The snapshot for ``version`` while it is still kept, else None."""
+        return self._retained.get(version)
+
+    def reset_after_fork(self) -> None:
+        # The parent's watcher may have held the lock at fork time
+        self._reload_lock = threading.Lock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def check(self) -> bool:
+        """Reload if the file changed; returns True when a new snapshot went live."""
+        if not self.path or not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            try:
+                snapshot = load_content_file(self.path)
+            except (OSError, ValueError) as exc:
+                self.last_error = str(exc)
+                return False
+            self.last_error = None
+            if snapshot.version == self.current.version:
+                return False
+            self._retain(snapshot)
+            self.current = snapshot  # the swap
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def start_watcher(self, interval_seconds: float = WATCH_INTERVAL) -> threading.Event:
+        stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(interval_seconds):
+                self.check()
+
+        if self.path:
+            threading.Thread(target=loop, name="content-watch", daemon=True).start()
+        return stop
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Content snapshot tools")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--dump", metavar="FILE", help="write the built-in content as JSON")
+    group.add_argument("--check", metavar="FILE", help="validate a content file")
+    args = parser.parse_args(argv)
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as f:
+            json.dump(builtin_content(), f, indent=2, ensure_ascii=False)
+        return
+    try:
+        snapshot = load_content_file(args.check)
+    except StoryGraphError as exc:
+        parser.exit(1, "".join(f"error: {p}\n" for p in exc.problems))
+    except (OSError, ValueError) as exc:
+        parser.exit(1, f"error: {exc}\n")
+    for w in snapshot.story.warnings:
+        print(f"warning: {w}", file=sys.stderr)
+    print(f"OK, version {snapshot.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Difficulty scores for bank entries, and a sorted index to draw from.
+
+Each entry is scored once from what makes it hard to type on QWERTY:
+
+- length
+- letter pairs outside the common English bigrams
+- same-finger sequences (two different keys struck by one finger)
+- shifted characters (capitals, ``!?:"`` ...) and punctuation
+
+``DifficultyIndex`` keeps a bank sorted by that score. A player's net WPM
+picks a window of the index by position, and picks are drawn from the
+window with ``random.sample`` over a ``range``. Picking never copies or
+scans the bank, however large.
+
+    python typist_difficulty.py "The quick brown fox" "zebra"
+"""
+import argparse
+import random
+import string
+from typing import Iterable, List, Optional, Tuple
+
+# Net WPM mapped to the easiest and hardest ends of a bank
+EASY_WPM = 10.0
+HARD_WPM = 70.0
+# Share of the bank a player's window spans
+BAND_SHARE = 0.3
+# ... but at least this many times the picks asked for, so rounds drawn
+# from a small bank don't all get the same few entries
+BAND_MIN_PICKS = 3
+
+COMMON_BIGRAMS = frozenset("""
+th he in er an re on at en nd ti es or te of ed is it al ar st to nt ng se ha
+as ou io le ve co me de hi ri ro ic ne ea ra ce li ch ll be ma si om ur oo
+""".split())
+FINGER_ROWS = ("1qaz", "2wsx", "3edc", "4rfv5tgb", "6yhn7ujm", "8ik,", "9ol.", "0p;/-['=]")
+FINGER = {ch: i for i, keys in enumerate(FINGER_ROWS) for ch in keys}
+SHIFTED = frozenset(string.ascii_uppercase + '~!@#$%^&*()_+{}|:"<>?')
+PUNCTUATION = frozenset(string.punctuation)
+
+
+def prompt_difficulty(text: str) -> float:
+    """Higher is harder; length adds a little, awkward keys add a lot."""
+    rare = same_finger = 0
+    lower = text.lower()
+    for a, b in zip(lower, lower[1:]):
+        if a.isalpha() and b.isalpha() and a + b not in COMMON_BIGRAMS:
+            rare += 1
+        if a != b and a in FINGER and FINGER.get(b) == FINGER[a]:
+            same_finger += 1
+    shifted = sum(ch in SHIFTED for ch in text)
+    punct = sum(ch in PUNCTUATION for ch in text)
+    hard = rare + 1.5 * same_finger + 2.0 * shifted + punct
+    return round(len(text) / 10.0 + 10.0 * hard / max(len(text), 1), 3)
+
+
+class DifficultyIndex:
+    """A bank sorted by ``prompt_difficulty``, easiest first."""
+    __slots__ = ("items",)
+
+    def __init__(self, bank: Iterable[str]) -> None:
+        # Only the order is kept: windows are by rank, not by score
+        self.items = tuple(text for _, text in sorted(
+            (prompt_difficulty(text), text) for text in bank))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def window_for_wpm(self, net_wpm: Optional[float], k: int = 1) -> Tuple[int, int]:
+        """Index range matched to ``net_wpm``; the whole bank if it's unknown.
+
+        The player's place between EASY_WPM and HARD_WPM picks the same
+        place in the sorted bank, so every bank is used end to end whatever
+        its own score scale. The window is a run of ranks, not a score
+        range: a cluster of near-equal scores can be split across windows,
+        and a gap in scores doesn't shrink one.
+        """
+        n = len(self.items)
+        if net_wpm is None or n <= k:
+            return 0, n
+        q = min(max((net_wpm - EASY_WPM) / (HARD_WPM - EASY_WPM), 0.0), 1.0)
+        width = min(n, max(BAND_MIN_PICKS * k, int(n * BAND_SHARE)))
+        start = min(max(round(q * (n - 1)) - width // 2, 0), n - width)
+        return start, start + width
+
+    def pick(self, start: int, end: int, k: int, rng=random) -> List[str]:
+        """``k`` distinct entries from ``[start, end)`` (fewer if it's short)."""
+        return [self.items[i] for i in rng.sample(range(start, end), min(k, end - start))]
+
+    def sample_for_wpm(self, net_wpm: Optional[float], k: int, rng=random) -> List[str]:
+        return self.pick(*self.window_for_wpm(net_wpm, k), k, rng)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score prompts for typing difficulty")
+    parser.add_argument("prompts", nargs="*", help="prompts to score (default: the built-in banks)")
+    args = parser.parse_args(argv)
+    if args.prompts:
+        texts = args.prompts
+    else:
+        import toilet_typist as tt
+        texts = tt.POTTY_WORDS + tt.SILLY_SENTENCES + tt.CLEAN_WORDS + tt.CLEAN_SENTENCES
+    for score, text in sorted((prompt_difficulty(t), t) for t in texts):
+        print(f"{score:7.3f}  {text}")
+
+
+if __name__ == "__main__":
+    main()
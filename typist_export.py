@@ -0,0 +1,164 @@
+"""Streaming export of score history as CSV, NDJSON or Parquet.
+
+Everything is generator-driven on top of ``StorageBackend.iter_scores``, so
+memory stays flat however long the history is. Parquet needs the optional
+``pyarrow`` package and is written in row-group batches.
+
+    python typist_export.py --format csv --mode "Word Drills" --since 2025-08-01
+    python typist_export.py --format parquet --out scores.parquet
+"""
+import argparse
+import calendar
+import csv
+import io
+import json
+import sys
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+EXPORT_COLUMNS = ("timestamp", "mode", "net_wpm", "accuracy_pct")
+MIMETYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+# Rows per yielded chunk / Parquet row group
+EXPORT_BATCH = 1000
+
+
+class ExportError(Exception):
+    pass
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Accept epoch seconds or a UTC ``YYYY-MM-DD[THH:MM:SS]`` string."""
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return float(calendar.timegm(time.strptime(value, fmt)))
+        except ValueError:
+            continue
+    raise ExportError(f"unrecognised time: {value!r}")
+
+
+def filter_scores(records: Iterable[dict], mode: Optional[str] = None,
+                  since: Optional[float] = None,
+                  until: Optional[float] = None) -> Iterator[dict]:
+    for r in records:
+        ts = r.get("timestamp", 0)
+        if mode is not None and r.get("mode") != mode:
+            continue
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts >= until:
+            continue
+        yield r
+
+
+def iter_csv(records: Iterable[dict]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 1
+    for r in records:
+        writer.writerow([r.get(c, "") for c in EXPORT_COLUMNS])
+        pending += 1
+        if pending >= EXPORT_BATCH:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue()
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    lines: List[str] = []
+    for r in records:
+        lines.append(json.dumps(r, separators=(",", ":")))
+        if len(lines) >= EXPORT_BATCH:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _batched(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for r in records:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_parquet(records: Iterable[dict], sink: Any) -> None:
+    """Write records to ``sink`` (path or binary file) one row group at a time."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ExportError("parquet export needs the optional 'pyarrow' package") from exc
+
+    schema = pa.schema([
+        ("timestamp", pa.timestamp("s", tz="UTC")),
+        ("mode", pa.dictionary(pa.int32(), pa.string())),
+        ("net_wpm", pa.float64()),
+        ("accuracy_pct", pa.float64()),
+    ])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _batched(records, EXPORT_BATCH):
+            columns: Dict[str, list] = {c: [r.get(c) for r in batch] for c in EXPORT_COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+
+def export(records: Iterable[dict], fmt: str, out: IO) -> None:
+    """Write an export to ``out`` (text for csv/ndjson, binary for parquet)."""
+    if fmt == "csv":
+        out.writelines(iter_csv(records))
+    elif fmt == "ndjson":
+        out.writelines(iter_ndjson(records))
+    elif fmt == "parquet":
+        write_parquet(records, out)
+    else:
+        raise ExportError(f"unknown format: {fmt!r}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from toilet_typist import get_storage
+
+    parser = argparse.ArgumentParser(description="Export score history")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--mode")
+    parser.add_argument("--since", help="epoch seconds or YYYY-MM-DD (UTC)")
+    parser.add_argument("--until", help="epoch seconds or YYYY-MM-DD (UTC), exclusive")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        records = filter_scores(get_storage().iter_scores(), args.mode,
+                                parse_time(args.since), parse_time(args.until))
+        binary = args.format == "parquet"
+        if args.out:
+            with open(args.out, "wb" if binary else "w",
+                      encoding=None if binary else "utf-8",
+                      newline=None if binary else "") as out:
+                export(records, args.format, out)
+        elif binary:
+            export(records, args.format, sys.stdout.buffer)
+        else:
+            export(records, args.format, sys.stdout)
+    except ExportError as exc:
+        parser.exit(2, f"error: {exc}\n")
+
+
+if __name__ == "__main__":
+    main()
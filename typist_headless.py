@@ -0,0 +1,205 @@
+"""Run terminal modes without a TTY, from scripted input and on virtual time.
+
+A session names a mode and lists the lines the "player" types. The real
+mode functions in ``toilet_typist`` run unchanged. This module swaps in
+``input``, ``print`` and a virtual clock for the duration, and turns
+``clear_screen``/``count_down``/``sleep`` into no-ops, so a session takes
+milliseconds however long it "lasts". Scores go to a fresh in-memory
+backend per session and are returned as JSON.
+
+A script is a JSON object, a JSON list of them, or JSON lines:
+
+    {"mode": "word_drills", "seed": 7, "inputs": [
+        {"prompt": true, "wpm": 45},          # type the shown prompt exactly
+        {"typed": "poop nugget", "seconds": 4.5},
+        "a bare string, typed in the default 5 seconds",
+        ""                                    # e.g. Enter at "Continue?"
+    ]}
+
+Modes: word_drills, sentence_sprints, timed_boss_battle, story.
+When the inputs run out, the session stops there: rounds already finished
+keep their scores, and nothing is scored for input that never came.
+"""
+import contextlib
+import json
+import random
+import sys
+import time as real_time
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+import toilet_typist as tt
+from typist_storage import MemoryStorage
+
+MODES = ("word_drills", "sentence_sprints", "timed_boss_battle", "story")
+DEFAULT_SECONDS = 5.0
+
+
+class ScriptExhausted(BaseException):
+    """The script has no more input. A BaseException, like KeyboardInterrupt,
+    so the modes' ``except EOFError``/``except Exception`` blocks can't turn
+    it into empty answers and keep scoring phantom rounds."""
+
+
+class VirtualClock:
+    """Stands in for the ``time`` module: ``sleep`` just advances ``now``."""
+
+    def __init__(self, start: float) -> None:
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+    def __getattr__(self, name: str) -> Any:
+        # strftime, localtime, ... behave as usual
+        return getattr(real_time, name)
+
+
+class ScriptedConsole:
+    def __init__(self, inputs: List[Any], clock: VirtualClock,
+                 default_seconds: float = DEFAULT_SECONDS,
+                 echo: Optional[IO[str]] = None) -> None:
+        self.inputs = list(inputs)
+        self.clock = clock
+        self.default_seconds = default_seconds
+        self.echo = echo
+        self.used = 0
+        self.exhausted = False
+        self._recent: List[str] = []
+
+    def print(self, *args: Any, sep: str = " ", end: str = "\n", **_: Any) -> None:
+        line = sep.join(str(a) for a in args)
+        # Keep only enough lines to find a "-" / prompt / "-" block
+        self._recent = (self._recent + [line])[-3:]
+        if self.echo is not None:
+            self.echo.write(line + end)
+
+    def shown_prompt(self) -> str:
+        if len(self._recent) == 3 and self._recent[0] == self._recent[2] == "-":
+            return self._recent[1]
+        return ""
+
+    def input(self, message: str = "") -> str:
+        shown = self.shown_prompt()
+        self.print(message, end="")
+        if self.used >= len(self.inputs):
+            self.exhausted = True
+            raise ScriptExhausted
+        step = self.inputs[self.used]
+        self.used += 1
+        if isinstance(step, str):
+            typed, seconds = step, self.default_seconds
+        else:
+            typed = shown if step.get("prompt") else str(step.get("typed", ""))
+            if "wpm" in step:
+                seconds = (len(typed) / 5.0) / max(float(step["wpm"]), 1e-6) * 60.0
+            else:
+                seconds = float(step.get("seconds", self.default_seconds))
+        self.clock.sleep(seconds)
+        if self.echo is not None:
+            self.echo.write(typed + "\n")
+        return typed
+
+
+@contextlib.contextmanager
+def headless(console: ScriptedConsole, clock: VirtualClock) -> Iterator[MemoryStorage]:
+    """Point ``toilet_typist`` at the console, clock and a memory backend."""
+    storage = MemoryStorage()
+    overrides = {
+        "input": console.input,
+        "print": console.print,
+        "time": clock,
+        "clear_screen": lambda: None,
+        "count_down": lambda seconds: None,
+    }
+    saved = {name: tt.__dict__.get(name) for name in overrides}
+    previous_storage = tt._storage
+    tt.__dict__.update(overrides)
+    tt._storage = storage
+    try:
+        yield storage
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                tt.__dict__.pop(name, None)
+            else:
+                tt.__dict__[name] = value
+        tt._storage = previous_storage
+        storage.close()
+
+
+def run_session(session: Dict[str, Any], echo: Optional[IO[str]] = None) -> Dict[str, Any]:
+    mode = session.get("mode", "word_drills")
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    seed = session.get("seed")
+    start = float(session.get("start_time", 1_700_000_000))
+    clock = VirtualClock(start)
+    console = ScriptedConsole(session.get("inputs") or [], clock,
+                              float(session.get("default_seconds", DEFAULT_SECONDS)), echo)
+    potty = bool(session.get("potty_mode", True))
+    # The mode functions draw from the global RNG
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        with headless(console, clock) as storage:
+            if session.get("story_node"):
+                tt.save_story_progress({"current_node": session["story_node"], "history": []})
+            try:
+                if mode == "word_drills":
+                    tt.word_drills(potty)
+                elif mode == "sentence_sprints":
+                    tt.sentence_sprints(potty)
+                elif mode == "timed_boss_battle":
+                    tt.timed_boss_battle(potty, int(session.get("duration", 60)))
+                else:
+                    tt.play_story(tt.STORY_NODES)
+            except ScriptExhausted:
+                pass
+            scores = storage.load_scores()
+            progress = tt.load_story_progress() if mode == "story" else None
+    finally:
+        random.setstate(state)
+    result: Dict[str, Any] = {
+        "mode": mode,
+        "seed": seed,
+        "scores": scores,
+        "inputs_used": console.used,
+        "exhausted": console.exhausted,
+        "virtual_seconds": round(clock.now - start, 3),
+    }
+    if progress is not None:
+        result["story"] = progress
+    return result
+
+
+def load_sessions(fp: IO[str]) -> List[Dict[str, Any]]:
+    text = fp.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+def run_script(script_path: str, config: Optional[Dict[str, Any]] = None,
+               output: Optional[str] = None, verbose: bool = False) -> int:
+    """Run every session in ``script_path``; write one JSON result per line.
+
+    ``config`` supplies defaults for keys a session leaves out. Returns the
+    number of sessions run.
+    """
+    with open(script_path, "r", encoding="utf-8") as f:
+        sessions = load_sessions(f)
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    echo = sys.stderr if verbose else None
+    try:
+        for session in sessions:
+            merged = dict(config or {}, **session)
+            out.write(json.dumps(run_session(merged, echo), separators=(",", ":")) + "\n")
+    finally:
+        if output:
+            out.close()
+    return len(sessions)
@@ -0,0 +1,181 @@
+"""A tiny in-process Redis stand-in for exercising ``RedisStorage`` locally.
+
+Speaks real RESP2 over TCP, so the backend's pooling and wire code run
+unchanged, but only implements the handful of commands the backend uses.
+Not for production: everything lives in one dict and nothing persists.
+
+    python typist_redis_standin.py --port 6380
+    TYPIST_STORAGE_URL=redis://127.0.0.1:6380/0 python toilet_typist.py
+"""
+import argparse
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode("utf-8")
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(v) for v in value)
+    raise TypeError(f"cannot encode {value!r}")
+
+
+class StandInStore:
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Any] = {}
+        # key -> monotonic deadline, for SET ... PX/EX
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    def _list(self, key: bytes) -> List[bytes]:
+        return self.data.setdefault(key, [])
+
+    def execute(self, args: List[bytes]) -> Any:
+        name = args[0].decode("ascii").upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return Exception(f"unknown command '{name}'")
+        with self.lock:
+            if len(args) > 1:
+                self._expire(args[1])
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError) as exc:
+                return Exception(str(exc))
+
+    def _expire(self, key: bytes) -> None:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            del self.expires[key]
+            self.data.pop(key, None)
+
+    # ----- Commands -----
+    def cmd_ping(self, *args: bytes) -> Any:
+        return args[0] if args else "PONG"
+
+    def cmd_select(self, db: bytes) -> str:
+        return "OK"
+
+    def cmd_auth(self, *args: bytes) -> str:
+        return "OK"
+
+    def cmd_get(self, key: bytes) -> Optional[bytes]:
+        return self.data.get(key)
+
+    def cmd_set(self, key: bytes, value: bytes, *flags: bytes) -> Optional[str]:
+        upper = [f.upper() for f in flags]
+        if b"NX" in upper and key in self.data:
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        for unit, scale in ((b"PX", 0.001), (b"EX", 1.0)):
+            if unit in upper:
+                self.expires[key] = time.monotonic() + int(upper[upper.index(unit) + 1]) * scale
+        return "OK"
+
+    def cmd_del(self, *keys: bytes) -> int:
+        for k in keys:
+            self.expires.pop(k, None)
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+    def cmd_incr(self, key: bytes) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def cmd_rpush(self, key: bytes, *values: bytes) -> int:
+        items = self._list(key)
+        items.extend(values)
+        return len(items)
+
+    @staticmethod
+    def _slice(items: List[bytes], start: bytes, stop: bytes) -> slice:
+        # Redis ranges are inclusive, and negative indices count from the end
+        lo, hi = int(start), int(stop)
+        if lo < 0:
+            lo = max(len(items) + lo, 0)
+        if hi < 0:
+            hi += len(items)
+        return slice(lo, max(hi + 1, lo))
+
+    def cmd_lrange(self, key: bytes, start: bytes, stop: bytes) -> List[bytes]:
+        items = self.data.get(key, [])
+        return items[self._slice(items, start, stop)]
+
+    def cmd_ltrim(self, key: bytes, start: bytes, stop: bytes) -> str:
+        items = self.data.get(key, [])
+        self.data[key] = items[self._slice(items, start, stop)]
+        return "OK"
+
+
+def _read_command(reader) -> Optional[List[bytes]]:
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int(reader.readline()[1:-2])
+        args.append(reader.read(length + 2)[:-2])
+    return args
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)) -> None:
+        self.store = StandInStore()
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "StandInServer":
+        """Serve from a daemon thread; handy in tests."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            args = _read_command(self.rfile)
+            if args is None:
+                return
+            if not args:
+                continue
+            self.wfile.write(_encode_reply(self.server.store.execute(args)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    server = StandInServer((args.host, args.port))
+    print(f"Redis stand-in listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Compact keystroke timelines for ghost replays.
+
+A replay is a byte string:
+
+    b"TTR1" | varint(len(prompt)) | prompt (UTF-8) | events...
+
+where each event is ``varint(ms since previous event) varint(key code)``.
+Key codes are Unicode code points, with ``BACKSPACE`` (8) for deletions.
+A typical sentence replays in a few hundred bytes, and since events carry
+no count or index they can be decoded as the bytes arrive.
+"""
+import io
+import time
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"TTR1"
+BACKSPACE = 8
+# Hard bounds keep a hostile client from storing more than a few KB
+MAX_EVENTS = 2000
+MAX_DELTA_MS = 60_000
+MAX_PROMPT_BYTES = 1024
+
+Event = Tuple[int, int]  # (absolute ms since start, key code)
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def encode_varint(value: int) -> bytes:
+    if value < 0:
+        raise ReplayError("varints are unsigned")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def read_varint(stream: BinaryIO) -> Optional[int]:
+    """Read one varint; ``None`` at a clean end of stream."""
+    shift = result = 0
+    while True:
+        b = stream.read(1)
+        if not b:
+            if shift:
+                raise ReplayError("truncated varint")
+            return None
+        result |= (b[0] & 0x7F) << shift
+        if not b[0] & 0x80:
+            return result
+        shift += 7
+        if shift > 35:
+            raise ReplayError("varint too long")
+
+
+def normalize_events(raw: Iterable) -> List[Event]:
+    """Validate client-supplied ``[[t_ms, code], ...]`` into sorted events."""
+    events: List[Event] = []
+    last = 0
+    for item in raw:
+        if len(events) >= MAX_EVENTS:
+            break
+        try:
+            t_ms, code = int(item[0]), int(item[1])
+        except (TypeError, ValueError, IndexError):
+            raise ReplayError("events must be [t_ms, code] pairs")
+        if not (code == BACKSPACE or 32 <= code <= 0x10FFFF):
+            raise ReplayError(f"bad key code: {code}")
+        # Clamp rather than reject: clocks jitter, and long pauses compress
+        t_ms = max(last, min(t_ms, last + MAX_DELTA_MS))
+        events.append((t_ms, code))
+        last = t_ms
+    return events
+
+
+def encode_replay(prompt: str, events: Iterable[Event]) -> bytes:
+    prompt_bytes = prompt.encode("utf-8")[:MAX_PROMPT_BYTES]
+    out = bytearray(MAGIC)
+    out += encode_varint(len(prompt_bytes))
+    out += prompt_bytes
+    last = 0
+    for t_ms, code in events:
+        out += encode_varint(t_ms - last)
+        out += encode_varint(code)
+        last = t_ms
+    return bytes(out)
+
+
+def read_header(stream: BinaryIO) -> str:
+    """Consume the magic and prompt, leaving ``stream`` at the first event."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ReplayError("not a replay")
+    length = read_varint(stream)
+    if length is None or length > MAX_PROMPT_BYTES:
+        raise ReplayError("bad prompt length")
+    return stream.read(length).decode("utf-8", errors="replace")
+
+
+def iter_events(stream: BinaryIO) -> Iterator[Event]:
+    """Decode events one at a time, reading only as far as needed."""
+    t_ms = 0
+    while True:
+        delta = read_varint(stream)
+        if delta is None:
+            return
+        code = read_varint(stream)
+        if code is None:
+            raise ReplayError("truncated event")
+        t_ms += delta
+        yield t_ms, code
+
+
+def decode_replay(data: bytes) -> Tuple[str, List[Event]]:
+    stream = io.BytesIO(data)
+    prompt = read_header(stream)
+    return prompt, list(iter_events(stream))
+
+
+def apply_key(typed: str, code: int) -> str:
+    if code == BACKSPACE:
+        return typed[:-1]
+    return typed + chr(code)
+
+
+def play_in_terminal(stream: BinaryIO, speed: float = 1.0) -> str:
+    """Re-type a replay on stdout at its recorded pace."""
+    prompt = read_header(stream)
+    print(prompt)
+    typed = ""
+    started = time.time()
+    for t_ms, code in iter_events(stream):
+        delay = started + (t_ms / 1000.0) / speed - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        typed = apply_key(typed, code)
+        print(f"\r{typed} ", end="", flush=True)
+    print("")
+    return typed
+
+
+# ----- Ghost index -----
+GHOST_MODE = "Ghost Race"
+GHOST_INDEX_DOC = "ghost_index"
+LEADERBOARD_SIZE = 20
+
+
+def replay_blob_name(score_id: int) -> str:
+    return f"replay-{int(score_id)}"
+
+
+def load_ghost_index(storage) -> dict:
+    doc = storage.load_doc(GHOST_INDEX_DOC)
+    if not isinstance(doc, dict):
+        return {"leaders": [], "players": {}}
+    return doc
+
+
+def record_ghost(storage, record: dict, prompt: str, events: List[Event],
+                 player: Optional[str] = None) -> dict:
+    """Store a replay next to its score record and index it if it ranks."""
+    storage.save_blob(replay_blob_name(record["id"]), encode_replay(prompt, events))
+    entry = {
+        "score_id": record["id"],
+        "net_wpm": record.get("net_wpm", 0.0),
+        "accuracy_pct": record.get("accuracy_pct", 0.0),
+        "timestamp": record.get("timestamp", 0),
+        "prompt": prompt,
+        "player": player,
+    }
+
+    def add(doc: Any) -> dict:
+        index = doc if isinstance(doc, dict) else {"leaders": [], "players": {}}
+        leaders = index["leaders"] + [entry]
+        leaders.sort(key=lambda e: e["net_wpm"], reverse=True)
+        index["leaders"] = leaders[:LEADERBOARD_SIZE]
+        if player:
+            best = index["players"].get(player)
+            if best is None or entry["net_wpm"] > best["net_wpm"]:
+                index["players"][player] = entry
+        return index
+
+    # Under the store's lock: concurrent workers would otherwise drop entries
+    storage.update_doc(GHOST_INDEX_DOC, add)
+    return entry
+
+
+def best_ghost(storage, player: Optional[str] = None) -> Optional[dict]:
+    """``player``'s personal best if given, else the top leaderboard run."""
+    index = load_ghost_index(storage)
+    if player:
+        return index["players"].get(player)
+    return index["leaders"][0] if index["leaders"] else None
@@ -0,0 +1,213 @@
+"""Retention for score history: roll old raw scores into daily aggregates.
+
+Raw scores older than the retention window are folded into one aggregate
+per (UTC day, mode) holding the count, sums, maxima and a small WPM
+histogram for quantiles, and then dropped. ``daily_summary`` answers from
+rollups and the remaining raw rows together, so callers never need to know
+where the cut is.
+
+    python typist_rollups.py compact --retain-days 30
+    python typist_rollups.py summary --mode "Word Drills"
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from typist_storage import LOCK_WAIT, StorageBackend
+
+ROLLUPS_DOC = "score_rollups"
+DAY_SECONDS = 86400
+DEFAULT_RETAIN_DAYS = 30
+# Net WPM histogram bucket width; quantiles are exact to within this
+SKETCH_BUCKET_WPM = 2
+COMPACTION_LOCK = "compaction"
+# Generous: a pass reads the whole history
+COMPACTION_LOCK_TTL = 600.0
+
+
+def day_key(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def day_start(timestamp: float) -> int:
+    return int(timestamp // DAY_SECONDS) * DAY_SECONDS
+
+
+def new_aggregate() -> Dict[str, Any]:
+    return {"count": 0, "sum_net": 0.0, "max_net": 0.0, "sum_acc": 0.0,
+            "max_acc": 0.0, "hist": {}}
+
+
+def add_to_aggregate(agg: Dict[str, Any], net_wpm: float, accuracy_pct: float) -> None:
+    agg["count"] += 1
+    agg["sum_net"] += net_wpm
+    agg["sum_acc"] += accuracy_pct
+    agg["max_net"] = max(agg["max_net"], net_wpm)
+    agg["max_acc"] = max(agg["max_acc"], accuracy_pct)
+    # JSON object keys are strings, so the histogram is keyed by bucket start
+    bucket = str(int(net_wpm // SKETCH_BUCKET_WPM) * SKETCH_BUCKET_WPM)
+    agg["hist"][bucket] = agg["hist"].get(bucket, 0) + 1
+
+
+def merge_aggregates(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    into["count"] += other["count"]
+    into["sum_net"] += other["sum_net"]
+    into["sum_acc"] += other["sum_acc"]
+    into["max_net"] = max(into["max_net"], other["max_net"])
+    into["max_acc"] = max(into["max_acc"], other["max_acc"])
+    for bucket, n in other["hist"].items():
+        into["hist"][bucket] = into["hist"].get(bucket, 0) + n
+
+
+def sketch_quantile(hist: Dict[str, int], q: float) -> float:
+    """Estimate the q-quantile of net WPM from a bucket histogram."""
+    total = sum(hist.values())
+    if not total:
+        return 0.0
+    target = q * total
+    seen = 0
+    for bucket in sorted(hist, key=float):
+        seen += hist[bucket]
+        if seen >= target:
+            # Report the bucket midpoint
+            return float(bucket) + SKETCH_BUCKET_WPM / 2.0
+    return float(max(hist, key=float)) + SKETCH_BUCKET_WPM / 2.0
+
+
+def aggregate_scores(scores: Iterable[dict]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Group raw score records into {day: {mode: aggregate}}."""
+    days: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for s in scores:
+        per_mode = days.setdefault(day_key(s.get("timestamp", 0)), {})
+        agg = per_mode.setdefault(str(s.get("mode", "?")), new_aggregate())
+        add_to_aggregate(agg, float(s.get("net_wpm", 0.0)),
+                         float(s.get("accuracy_pct", 0.0)))
+    return days
+
+
+def load_rollups(storage: StorageBackend) -> Dict[str, Any]:
+    doc = storage.load_doc(ROLLUPS_DOC)
+    if not isinstance(doc, dict):
+        return {"compacted_until": 0, "days": {}}
+    return doc
+
+
+def compact_scores(storage: StorageBackend,
+                   retain_days: int = DEFAULT_RETAIN_DAYS,
+                   now: Optional[float] = None,
+                   wait: float = LOCK_WAIT) -> Dict[str, int]:
+    """Fold raw scores older than ``retain_days`` (whole UTC days) into rollups.
+
+    Rollups are saved before raw rows are pruned, and ``compacted_until``
+    records what has already been folded in, so a crash between the two
+    steps never double counts on the next run. The whole pass holds the
+    store's ``compaction`` lock: every web worker runs the scheduler, and
+    two passes at once would each add the same rows. Raises StorageError
+    if another pass still holds it after ``wait`` seconds.
+    """
+    now = time.time() if now is None else now
+    cutoff = day_start(now) - retain_days * DAY_SECONDS
+    with storage.locked(COMPACTION_LOCK, ttl=COMPACTION_LOCK_TTL, wait=wait):
+        return _compact_locked(storage, cutoff)
+
+
+def _compact_locked(storage: StorageBackend, cutoff: int) -> Dict[str, int]:
+    rollups = load_rollups(storage)
+    floor = int(rollups.get("compacted_until", 0))
+    old = [s for s in storage.load_scores()
+           if floor <= s.get("timestamp", 0) < cutoff]
+    for day, per_mode in aggregate_scores(old).items():
+        existing = rollups["days"].setdefault(day, {})
+        for mode, agg in per_mode.items():
+            merge_aggregates(existing.setdefault(mode, new_aggregate()), agg)
+    rollups["compacted_until"] = max(floor, cutoff)
+    storage.save_doc(ROLLUPS_DOC, rollups)
+    pruned = storage.prune_scores(cutoff)
+    return {"rolled_up": len(old), "pruned": pruned, "cutoff": cutoff}
+
+
+def summarize(day: str, mode: str, agg: Dict[str, Any], source: str) -> Dict[str, Any]:
+    count = max(1, agg["count"])
+    return {
+        "day": day,
+        "mode": mode,
+        "count": agg["count"],
+        "mean_net_wpm": round(agg["sum_net"] / count, 2),
+        "max_net_wpm": round(agg["max_net"], 2),
+        "mean_accuracy_pct": round(agg["sum_acc"] / count, 1),
+        "p50_net_wpm": sketch_quantile(agg["hist"], 0.5),
+        "p90_net_wpm": sketch_quantile(agg["hist"], 0.9),
+        "source": source,
+    }
+
+
+def daily_summary(storage: StorageBackend, mode: Optional[str] = None,
+                  since: Optional[float] = None,
+                  until: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Per-day, per-mode stats over rollups and raw history combined."""
+    since_key = day_key(since) if since is not None else ""
+    until_key = day_key(until) if until is not None else "9999-12-31"
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    sources: Dict[tuple, set] = {}
+
+    def add(day: str, m: str, agg: Dict[str, Any], source: str) -> None:
+        if (mode is not None and m != mode) or not since_key <= day <= until_key:
+            return
+        merge_aggregates(merged.setdefault((day, m), new_aggregate()), agg)
+        sources.setdefault((day, m), set()).add(source)
+
+    for day, per_mode in load_rollups(storage)["days"].items():
+        for m, agg in per_mode.items():
+            add(day, m, agg, "rollup")
+    for day, per_mode in aggregate_scores(storage.load_scores()).items():
+        for m, agg in per_mode.items():
+            add(day, m, agg, "raw")
+    return [
+        summarize(day, m, agg, "+".join(sorted(sources[(day, m)])))
+        for (day, m), agg in sorted(merged.items())
+    ]
+
+
+def start_compaction_scheduler(get_storage, interval_seconds: float,
+                               retain_days: int = DEFAULT_RETAIN_DAYS) -> threading.Event:
+    """Run ``compact_scores`` every ``interval_seconds`` on a daemon thread.
+
+    Returns an Event; set it to stop the loop.
+    """
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval_seconds):
+            try:
+                # Another process compacting right now covers this tick
+                compact_scores(get_storage(), retain_days, wait=0)
+            except Exception:
+                # A failed pass is retried on the next tick
+                pass
+
+    threading.Thread(target=loop, name="score-compaction", daemon=True).start()
+    return stop
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from toilet_typist import get_storage
+
+    parser = argparse.ArgumentParser(description="Score history retention")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="roll old raw scores into daily aggregates")
+    compact.add_argument("--retain-days", type=int, default=DEFAULT_RETAIN_DAYS)
+    summary = sub.add_parser("summary", help="print per-day stats as JSON lines")
+    summary.add_argument("--mode")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        print(json.dumps(compact_scores(get_storage(), args.retain_days)))
+    else:
+        for row in daily_summary(get_storage(), mode=args.mode):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
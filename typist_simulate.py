@@ -0,0 +1,202 @@
+"""Synthetic typists for calibrating pass bars, and a scoring benchmark.
+
+Each profile models a typist by speed, jitter, error rates and per-key
+latency. Runs go through the real ``compute_stats`` and ``story_passed``,
+and story runs walk the compiled story graph from the start chapter
+until they reach an ending or give up. Batches of runs are spread over
+a process pool and their counts merged. For each profile the report
+gives:
+
+- the share of single prompts clearing the praise, boss and story bars
+- the story completion rate and mean chapters to finish
+- the share of chapters spent in ``gross*`` detours
+- overall runs/s and prompts/s, as a throughput benchmark
+
+    python typist_simulate.py --runs 20000 --jobs 8
+    python typist_simulate.py --profile steady --runs 1000000 --json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import toilet_typist as tt
+
+HOME_ROW = set("asdfjkl; ")
+# Give up on a story run after this many chapters (a "stuck" typist)
+MAX_CHAPTERS = 60
+# Runs per pool task: big enough to amortise pickling, small enough to balance
+BATCH = 500
+
+
+class TypistProfile(NamedTuple):
+    name: str
+    wpm: float            # mean raw speed
+    wpm_jitter: float     # relative per-prompt speed spread
+    sub_rate: float       # chance a key comes out wrong
+    drop_rate: float      # chance a key is skipped
+    reach_penalty: float  # latency multiplier off the home row
+
+
+PROFILES: Dict[str, TypistProfile] = {p.name: p for p in (
+    TypistProfile("hunt_and_peck", 18, 0.25, 0.06, 0.02, 1.6),
+    TypistProfile("novice", 28, 0.20, 0.04, 0.01, 1.4),
+    TypistProfile("steady", 42, 0.12, 0.02, 0.005, 1.2),
+    TypistProfile("speedy_sloppy", 70, 0.15, 0.07, 0.02, 1.1),
+    TypistProfile("pro", 85, 0.08, 0.008, 0.002, 1.05),
+)}
+
+
+def type_prompt(profile: TypistProfile, prompt: str, rng: random.Random) -> Tuple[str, float]:
+    """What ``profile`` types for ``prompt`` and how long it takes."""
+    speed = max(3.0, rng.gauss(profile.wpm, profile.wpm * profile.wpm_jitter))
+    per_key = 60.0 / (speed * 5.0)
+    typed: List[str] = []
+    seconds = 0.0
+    for ch in prompt:
+        roll = rng.random()
+        if roll < profile.drop_rate:
+            continue
+        seconds += per_key * (1.0 if ch in HOME_ROW else profile.reach_penalty)
+        if roll < profile.drop_rate + profile.sub_rate:
+            typed.append(rng.choice("asdfghjkl;eiurtyop"))
+        else:
+            typed.append(ch)
+    return "".join(typed), seconds
+
+
+def empty_counts() -> Dict[str, float]:
+    return {"prompts": 0, "praise": 0, "boss": 0, "story_bar": 0,
+            "runs": 0, "finished": 0, "chapters_to_finish": 0,
+            "chapters": 0, "gross_chapters": 0, "stuck": 0}
+
+
+def simulate_batch(task: Tuple[str, int, int]) -> Tuple[str, Dict[str, float]]:
+    """Map step: ``runs`` story runs for one profile (runs in a worker)."""
+    name, runs, seed = task
+    profile = PROFILES[name]
+    rng = random.Random(seed)
+    # Prompt generation uses the module RNG, so seed it per batch too
+    random.seed(seed)
+    story = tt.STORY
+    counts = empty_counts()
+    thresholds = tt.story_thresholds()
+    for _ in range(runs):
+        i = story.start
+        chapters = 0
+        while chapters < MAX_CHAPTERS:
+            chapters += 1
+            node = story.nodes[i]
+            if node.id.startswith("gross"):
+                counts["gross_chapters"] += 1
+            prompts = tt.generate_prompts_for_lesson(node.lesson_keys, rounds=5)
+            total_net = total_acc = 0.0
+            for prompt in prompts:
+                stats = tt.compute_stats(prompt, *type_prompt(profile, prompt, rng))
+                counts["prompts"] += 1
+                counts["praise"] += (stats.net_wpm >= tt.PRAISE_NET_WPM
+                                     and stats.accuracy_pct >= tt.PRAISE_ACC)
+                counts["boss"] += (stats.net_wpm >= tt.BOSS_PRAISE_NET_WPM
+                                   and stats.accuracy_pct >= tt.BOSS_PRAISE_ACC)
+                counts["story_bar"] += tt.story_passed(stats.net_wpm, stats.accuracy_pct,
+                                                       thresholds)
+                total_net += stats.net_wpm
+                total_acc += stats.accuracy_pct
+            if tt.story_passed(total_net / len(prompts), total_acc / len(prompts), thresholds):
+                if not story.choices[i]:
+                    counts["finished"] += 1
+                    counts["chapters_to_finish"] += chapters
+                    break
+                i = rng.choice(story.choices[i])
+            elif story.failure[i] >= 0:
+                i = story.failure[i]
+        else:
+            counts["stuck"] += 1
+        counts["runs"] += 1
+        counts["chapters"] += chapters
+    return name, counts
+
+
+def simulate(profiles: List[str], runs: int, jobs: Optional[int] = None,
+             seed: int = 0) -> Dict[str, Dict[str, float]]:
+    tasks = []
+    for p, name in enumerate(profiles):
+        for b, start in enumerate(range(0, runs, BATCH)):
+            tasks.append((name, min(BATCH, runs - start), seed * 1_000_003 + p * 10_007 + b))
+    totals = {name: empty_counts() for name in profiles}
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        results = map(simulate_batch, tasks)
+    else:
+        pool = Pool(jobs)
+        results = pool.imap_unordered(simulate_batch, tasks)
+    try:
+        for name, counts in results:
+            for key, value in counts.items():
+                totals[name][key] += value
+    finally:
+        if jobs != 1:
+            pool.close()
+            pool.join()
+    return totals
+
+
+def report(totals: Dict[str, Dict[str, float]]) -> List[Dict[str, float]]:
+    rows = []
+    for name, c in totals.items():
+        prompts, runs = max(1, c["prompts"]), max(1, c["runs"])
+        rows.append({
+            "profile": name,
+            "runs": int(c["runs"]),
+            "praise_rate": round(c["praise"] / prompts, 4),
+            "boss_bar_rate": round(c["boss"] / prompts, 4),
+            "story_bar_rate": round(c["story_bar"] / prompts, 4),
+            "finish_rate": round(c["finished"] / runs, 4),
+            "mean_chapters_to_finish": (round(c["chapters_to_finish"] / c["finished"], 2)
+                                        if c["finished"] else None),
+            "gross_share": round(c["gross_chapters"] / max(1, c["chapters"]), 4),
+            "stuck_rate": round(c["stuck"] / runs, 4),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate synthetic typists through the scoring core")
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES),
+                        help="profile to run (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=2000, help="story runs per profile")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+
+    profiles = args.profile or list(PROFILES)
+    started = time.perf_counter()
+    totals = simulate(profiles, args.runs, args.jobs, args.seed)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    rows = report(totals)
+    prompts = sum(c["prompts"] for c in totals.values())
+    runs = sum(c["runs"] for c in totals.values())
+    bench = {"seconds": round(elapsed, 2), "runs_per_s": round(runs / elapsed, 1),
+             "prompts_per_s": round(prompts / elapsed, 1)}
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        print(json.dumps(bench))
+        return
+    print(f"{'profile':<14} {'praise':>7} {'boss':>7} {'story':>7} {'finish':>7} "
+          f"{'chapters':>9} {'gross':>7} {'stuck':>7}")
+    for r in rows:
+        chapters = "-" if r["mean_chapters_to_finish"] is None else f"{r['mean_chapters_to_finish']:.1f}"
+        print(f"{r['profile']:<14} {r['praise_rate']:>7.1%} {r['boss_bar_rate']:>7.1%} "
+              f"{r['story_bar_rate']:>7.1%} {r['finish_rate']:>7.1%} {chapters:>9} "
+              f"{r['gross_share']:>7.1%} {r['stuck_rate']:>7.1%}")
+    print(f"{runs} runs, {prompts} prompts in {bench['seconds']}s "
+          f"({bench['runs_per_s']} runs/s, {bench['prompts_per_s']} prompts/s)")
+
+
+if __name__ == "__main__":
+    main()
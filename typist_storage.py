@@ -0,0 +1,1032 @@
+"""Storage backends for scores, story progress and other small documents.
+
+The terminal trainer and the web app both go through ``toilet_typist``'s
+``load_scores``/``save_score``/``load_story_progress``/``save_story_progress``,
+which delegate to whichever backend ``TYPIST_STORAGE_URL`` selects:
+
+- ``file:`` (default) — the JSON files next to the process, as before
+- ``sqlite:///typist.db`` (relative) or ``sqlite:////srv/typist.db``
+  (absolute) — one database shared by local workers
+- ``redis://host:6379/0`` — shared by every node behind a load balancer
+- ``memory:`` — throwaway, for scripted runs
+"""
+import abc
+import contextlib
+import heapq
+import io
+import json
+import os
+import queue
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from typing import (IO, Any, BinaryIO, Callable, Dict, Iterator, List, Optional,
+                    Tuple)
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+STORY_PROGRESS_DOC = "story_progress"
+DEFAULT_POOL_SIZE = 8
+STREAM_BATCH = 1000
+# FileStorage: score log suffix, and appends between checkpoints
+LOG_SUFFIX = ".log"
+CHECKPOINT_EVERY = 1000
+# FileStorage: documents, blobs and locks live in this directory next to
+# the scores file unless one is given, so per-player docs never pile up
+# beside the code
+DATA_DIR_NAME = "typist_data"
+# Named locks: a holder that dies frees its lock after LOCK_TTL seconds;
+# a caller gives up after waiting LOCK_WAIT seconds
+LOCK_TTL = 60.0
+LOCK_WAIT = 10.0
+LOCK_POLL = 0.02
+
+# Keyset position of a score: (timestamp, id)
+ScoreKey = Tuple[int, int]
+
+
+def score_key(record: dict) -> ScoreKey:
+    return int(record.get("timestamp", 0)), int(record.get("id", 0))
+
+
+def score_matches(record: dict, mode: Optional[str] = None,
+                  min_accuracy: Optional[float] = None) -> bool:
+    if mode is not None and record.get("mode") != mode:
+        return False
+    if min_accuracy is not None and float(record.get("accuracy_pct", 0)) < min_accuracy:
+        return False
+    return True
+
+
+class StorageError(Exception):
+    pass
+
+
+# What a backend can raise when its store is unreachable or a write fails
+STORAGE_ERRORS = (StorageError, OSError, sqlite3.Error)
+
+
+def iter_json_array(fp: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading it whole.
+
+    Memory stays at one chunk plus one element, however long the array is.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof, started = "", 0, False, False
+    while True:
+        if pos >= len(buf):
+            if eof:
+                return
+            buf, pos = fp.read(chunk_size), 0
+            eof = not buf
+            continue
+        ch = buf[pos]
+        if ch in " \t\r\n,":
+            pos += 1
+            continue
+        if not started:
+            if ch != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if ch == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            value, end = None, -1
+        # A value touching the end of the buffer may be cut short (e.g. a
+        # number), so only trust it once more input or EOF follows.
+        if end < 0 or (end == len(buf) and not eof):
+            if eof:
+                raise ValueError("truncated JSON array")
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield value
+        pos = end
+
+
+class StorageBackend(abc.ABC):
+    """Interface every backend implements.
+
+    Scores are an append-only list of small dicts, each given an increasing
+    integer ``id`` on append. Documents are named JSON values (story
+    progress is the ``story_progress`` document).
+    """
+
+    @abc.abstractmethod
+    def load_scores(self) -> List[dict]:
+        ...
+
+    def iter_scores(self) -> Iterator[dict]:
+        """Stream scores oldest first; backends override to avoid a full load."""
+        return iter(self.load_scores())
+
+    @abc.abstractmethod
+    def append_score(self, record: dict) -> dict:
+        """Store ``record``; returns it with its assigned ``id``."""
+
+    def page_scores(self, limit: int, before: Optional[ScoreKey] = None,
+                    mode: Optional[str] = None, since: Optional[float] = None,
+                    until: Optional[float] = None,
+                    min_accuracy: Optional[float] = None) -> List[dict]:
+        """Newest-first page of scores strictly before the ``before`` key.
+
+        Only SQLite seeks: it overrides this with a walk down its
+        ``(timestamp, id)`` index, so a page costs the same at any depth.
+        This generic version, used by the file, Redis and memory backends,
+        is one streaming pass over the whole history that keeps the
+        ``limit`` newest matches in a heap: O(n log limit) time per page and
+        O(limit) memory, with no full load or sort.
+        """
+        def wanted(record: dict) -> bool:
+            key = score_key(record)
+            return ((before is None or key < before)
+                    and (until is None or key[0] < until)
+                    and (since is None or key[0] >= since)
+                    and score_matches(record, mode, min_accuracy))
+
+        return heapq.nlargest(limit, filter(wanted, self.iter_scores()), key=score_key)
+
+    @abc.abstractmethod
+    def prune_scores(self, before_ts: int) -> int:
+        """Drop scores older than ``before_ts``; returns how many went."""
+
+    @abc.abstractmethod
+    def load_doc(self, name: str) -> Optional[Any]:
+        ...
+
+    @abc.abstractmethod
+    def save_doc(self, name: str, value: Any) -> None:
+        ...
+
+    @contextlib.contextmanager
+    def locked(self, name: str, ttl: float = LOCK_TTL,
+               wait: float = LOCK_WAIT) -> Iterator[None]:
+        """Hold the lock ``name``, shared by every process using this store.
+
+        A lease: if the holder dies, the lock frees itself after ``ttl``
+        seconds. Raises StorageError if it isn't free within ``wait``.
+        """
+        token = secrets.token_hex(8)
+        deadline = time.monotonic() + wait
+        while not self._acquire_lease(name, token, ttl):
+            if time.monotonic() >= deadline:
+                raise StorageError(f"lock {name!r} is busy")
+            time.sleep(LOCK_POLL)
+        try:
+            yield
+        finally:
+            self._release_lease(name, token)
+
+    @abc.abstractmethod
+    def _acquire_lease(self, name: str, token: str, ttl: float) -> bool:
+        """Take the lock ``name`` for ``token`` unless someone else holds it."""
+
+    @abc.abstractmethod
+    def _release_lease(self, name: str, token: str) -> None:
+        """Free the lock ``name`` if ``token`` still holds it."""
+
+    def update_doc(self, name: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """Replace doc ``name`` with ``fn(current)`` under its lock; returns
+        the new value. Concurrent updates from any process never lose one
+        another's changes."""
+        with self.locked(f"doc-{name}"):
+            value = fn(self.load_doc(name))
+            self.save_doc(name, value)
+            return value
+
+    @abc.abstractmethod
+    def save_blob(self, name: str, data: bytes) -> None:
+        """Store small binary payloads (e.g. replays) under ``name``."""
+
+    @abc.abstractmethod
+    def open_blob(self, name: str) -> Optional[BinaryIO]:
+        """A readable binary stream for ``name``, or ``None`` if absent."""
+
+    def reset_after_fork(self) -> None:
+        """Forget locks that threads of the parent process held at fork time."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStorage(StorageBackend):
+    def __init__(self) -> None:
+        self._scores: List[dict] = []
+        self._docs: Dict[str, str] = {}
+        self._blobs: Dict[str, bytes] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def load_scores(self) -> List[dict]:
+        with self._lock:
+            return [dict(s) for s in self._scores]
+
+    def append_score(self, record: dict) -> dict:
+        with self._lock:
+            record = dict(record, id=self._next_id)
+            self._next_id += 1
+            self._scores.append(record)
+            return dict(record)
+
+    def prune_scores(self, before_ts: int) -> int:
+        with self._lock:
+            kept = [s for s in self._scores if s.get("timestamp", 0) >= before_ts]
+            dropped = len(self._scores) - len(kept)
+            self._scores = kept
+            return dropped
+
+    def load_doc(self, name: str) -> Optional[Any]:
+        raw = self._docs.get(name)
+        return None if raw is None else json.loads(raw)
+
+    def save_doc(self, name: str, value: Any) -> None:
+        # Round-trip through JSON so callers can't alias stored state
+        self._docs[name] = json.dumps(value)
+
+    def _acquire_lease(self, name: str, token: str, ttl: float) -> bool:
+        with self._lock:
+            held = self._leases.get(name)
+            if held is not None and held[1] > time.monotonic():
+                return False
+            self._leases[name] = (token, time.monotonic() + ttl)
+            return True
+
+    def _release_lease(self, name: str, token: str) -> None:
+        with self._lock:
+            if self._leases.get(name, ("",))[0] == token:
+                del self._leases[name]
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._leases = {}
+
+    def save_blob(self, name: str, data: bytes) -> None:
+        self._blobs[name] = bytes(data)
+
+    def open_blob(self, name: str) -> Optional[BinaryIO]:
+        data = self._blobs.get(name)
+        return None if data is None else io.BytesIO(data)
+
+
+def encode_log_record(value: Any) -> bytes:
+    """One score-log line: the payload's CRC-32 in hex, a space, the JSON."""
+    payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def decode_log_line(line: bytes) -> Optional[Any]:
+    """The record on ``line``, or ``None`` if it is torn or fails its CRC."""
+    line = line.rstrip(b"\n")
+    if len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def iter_log_records(fp: BinaryIO) -> Iterator[Any]:
+    """Score records from a log, minus the checkpoint marker and damage.
+
+    Records at or below the marker's ``last_id`` are already in the
+    checkpoint (a crash can leave them behind), so they are skipped too.
+    """
+    covered = 0
+    for line in fp:
+        value = decode_log_line(line)
+        if not isinstance(value, dict):
+            continue
+        if "checkpoint" in value:
+            covered = int(value["checkpoint"].get("last_id", 0))
+        elif int(value.get("id", 0)) > covered:
+            yield value
+
+
+def log_generation(first_line: bytes) -> int:
+    """The generation named by a log's marker line; 0 if it names none."""
+    value = decode_log_line(first_line)
+    if isinstance(value, dict) and isinstance(value.get("checkpoint"), dict):
+        return int(value["checkpoint"].get("generation", 0))
+    return 0
+
+
+def atomic_write(path: str, data: bytes, durable: bool = True) -> None:
+    """Replace ``path`` with ``data`` so readers see the old or new file, never half."""
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if durable and hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself survive a power cut
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class FileStorage(StorageBackend):
+    """JSON files on local disk; per-node only.
+
+    Scores are a checkpoint (the JSON array in ``scores_file``) plus an
+    append-only log (``scores_file + ".log"``) of CRC-checked lines. The
+    log starts with a marker naming the highest id the checkpoint covers
+    and the log's generation, which goes up by one on every restart.
+    Every ``checkpoint_every`` appends, the whole history is rewritten as
+    a new checkpoint and the log restarts. Both are swapped in with an
+    atomic rename, so a crash leaves either the old or the new file.
+    Finding the next id only replays the log, never the checkpoint. A torn
+    last line is cut off, and a line failing its CRC is skipped.
+
+    Documents, blobs and lock files go under ``docs_dir``: by default a
+    ``typist_data`` directory beside the scores file. Docs and blobs
+    written before that, straight beside the scores file, are still read
+    from there until rewritten. Documents and blobs are replaced
+    atomically. As before, unreadable
+    files load as empty and doc write failures are swallowed so the
+    trainer never crashes mid-game. A score append that fails raises
+    StorageError, which ``save_score`` reports. Processes sharing the files serialise writes
+    with ``flock`` where available.
+    """
+
+    def __init__(self, scores_file: str, progress_file: str,
+                 docs_dir: Optional[str] = None, fsync: bool = True,
+                 checkpoint_every: int = CHECKPOINT_EVERY) -> None:
+        self.scores_file = scores_file
+        self.log_file = scores_file + LOG_SUFFIX
+        base = os.path.dirname(os.path.abspath(scores_file))
+        self.docs_dir = docs_dir or os.path.join(base, DATA_DIR_NAME)
+        # Where docs lived before the data directory; read-only fallback
+        self.legacy_dir = None if docs_dir else base
+        self.doc_files = {STORY_PROGRESS_DOC: progress_file}
+        self.fsync = fsync
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.bad_records = 0
+        self._lock = threading.Lock()
+        # Named locks this process holds: name -> (token, open lock file)
+        self._leases: Dict[str, Tuple[str, Optional[IO[str]]]] = {}
+        # Where this process has read the log up to; see _sync_log
+        self._log_stamp: Optional[Tuple[int, int]] = None  # (inode, generation)
+        self._log_offset = 0
+        self._last_id = 0
+        self._tail = 0
+
+    def doc_path(self, name: str) -> str:
+        return self.doc_files.get(name) or os.path.join(
+            self.docs_dir, self._safe_name(name) + ".json")
+
+    def _legacy(self, path: str) -> Optional[str]:
+        """The pre-data-directory location of ``path``, if it exists there."""
+        if self.legacy_dir is None or not path.startswith(self.docs_dir + os.sep):
+            return None
+        old = os.path.join(self.legacy_dir, os.path.basename(path))
+        return old if os.path.exists(old) and not os.path.exists(path) else None
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[Any]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write_json(self, path: str, value: Any) -> None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            atomic_write(path, json.dumps(value, indent=2).encode("utf-8"), self.fsync)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _with_id(position: int, record: dict) -> dict:
+        # Files written before ids existed: their position is their id.
+        # Those rows only ever sit at the front, below every assigned id.
+        if "id" not in record:
+            record["id"] = position + 1
+        return record
+
+    @contextlib.contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """This process's lock plus, across processes, a flock."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.scores_file + ".lock", "a") as lock:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _read_tail(self) -> List[dict]:
+        try:
+            with open(self.log_file, "rb") as f:
+                return list(iter_log_records(f))
+        except OSError:
+            return []
+
+    def iter_scores(self) -> Iterator[dict]:
+        # The log is read first: if a checkpoint lands meanwhile, the new
+        # checkpoint holds these records and the id check drops the copies.
+        tail = self._read_tail()
+        covered = 0
+        if os.path.exists(self.scores_file):
+            try:
+                with open(self.scores_file, "r", encoding="utf-8") as f:
+                    for i, record in enumerate(iter_json_array(f)):
+                        record = self._with_id(i, record)
+                        covered = max(covered, int(record["id"]))
+                        yield record
+            except (OSError, ValueError):
+                # A damaged checkpoint still yields everything before the damage
+                pass
+        for record in tail:
+            if int(record.get("id", 0)) > covered:
+                yield record
+
+    def load_scores(self) -> List[dict]:
+        return list(self.iter_scores())
+
+    def _sync_log(self) -> None:
+        """Catch up on log lines written since this process last looked.
+
+        Called with the exclusive lock held. Only the log is read, and only
+        from the last offset, unless another process checkpointed or there
+        is no log yet. A checkpoint is spotted by the marker line's
+        generation as well as the inode, since a new log can get the
+        inode the old one just freed.
+        """
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            # First run, or files from before the log: the one full scan
+            last_id = max((int(r["id"]) for r in self.iter_scores()), default=0)
+            self._restart_log(last_id)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            stamp = (st.st_ino, log_generation(f.readline()))
+            if stamp != self._log_stamp or st.st_size < self._log_offset:
+                self._log_stamp, self._log_offset, self._last_id, self._tail = stamp, 0, 0, 0
+            if st.st_size == self._log_offset:
+                return
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn by a crash mid-append; nobody else is writing now
+                    os.truncate(self.log_file, self._log_offset)
+                    break
+                self._log_offset += len(line)
+                value = decode_log_line(line)
+                if not isinstance(value, dict):
+                    self.bad_records += 1
+                elif "checkpoint" in value:
+                    self._last_id = max(self._last_id, int(value["checkpoint"].get("last_id", 0)))
+                else:
+                    self._last_id = max(self._last_id, int(value.get("id", 0)))
+                    self._tail += 1
+
+    def _restart_log(self, last_id: int) -> None:
+        try:
+            with open(self.log_file, "rb") as f:
+                generation = log_generation(f.readline())
+        except OSError:
+            generation = 0
+        generation = max(generation, self._log_stamp[1] if self._log_stamp else 0) + 1
+        marker = encode_log_record({"checkpoint": {"last_id": last_id,
+                                                   "generation": generation}})
+        atomic_write(self.log_file, marker, self.fsync)
+        self._log_stamp = (os.stat(self.log_file).st_ino, generation)
+        self._log_offset, self._last_id, self._tail = len(marker), last_id, 0
+
+    def _checkpoint(self, scores: List[dict]) -> None:
+        """Write ``scores`` as the new checkpoint, then restart the log."""
+        atomic_write(self.scores_file, json.dumps(scores, indent=2).encode("utf-8"), self.fsync)
+        # A crash here leaves the old log; its records are now covered by
+        # the checkpoint's ids and are skipped when read
+        self._restart_log(self._last_id)
+
+    def append_score(self, record: dict) -> dict:
+        with self._exclusive():
+            # A failed append raises rather than hand out an id that the
+            # next append would reuse
+            try:
+                self._sync_log()
+                record = dict(record, id=self._last_id + 1)
+                line = encode_log_record(record)
+                with open(self.log_file, "ab") as f:
+                    f.write(line)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            except OSError as exc:
+                raise StorageError(f"cannot append score: {exc}") from exc
+            self._log_offset += len(line)
+            self._last_id = record["id"]
+            self._tail += 1
+            if self._tail >= self.checkpoint_every:
+                try:
+                    self._checkpoint(self.load_scores())
+                except OSError:
+                    # The record is in the log; the next append retries
+                    pass
+            return record
+
+    def checkpoint(self) -> None:
+        """Fold the log into the checkpoint now (e.g. before copying files)."""
+        with self._exclusive():
+            try:
+                self._sync_log()
+                self._checkpoint(self.load_scores())
+            except OSError:
+                pass
+
+    def prune_scores(self, before_ts: int) -> int:
+        with self._exclusive():
+            try:
+                self._sync_log()
+                scores = self.load_scores()
+                kept = [s for s in scores if s.get("timestamp", 0) >= before_ts]
+                if len(kept) != len(scores):
+                    self._checkpoint(kept)
+            except OSError:
+                return 0
+            return len(scores) - len(kept)
+
+    def load_doc(self, name: str) -> Optional[Any]:
+        path = self.doc_path(name)
+        return self._read_json(self._legacy(path) or path)
+
+    def save_doc(self, name: str, value: Any) -> None:
+        self._write_json(self.doc_path(name), value)
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+    def blob_path(self, name: str) -> str:
+        return os.path.join(self.docs_dir, "blobs", self._safe_name(name))
+
+    def lock_path(self, name: str) -> str:
+        return os.path.join(self.docs_dir, "locks", self._safe_name(name) + ".lock")
+
+    def _acquire_lease(self, name: str, token: str, ttl: float) -> bool:
+        # A flock is dropped by the kernel when its holder dies, so no TTL.
+        # Each attempt opens the file anew: flocks on separate opens exclude
+        # each other, threads of this process included.
+        with self._lock:
+            if name in self._leases:
+                return False
+            if fcntl is None:
+                self._leases[name] = (token, None)
+                return True
+            path = self.lock_path(name)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                f = open(path, "a")
+            except OSError as exc:
+                raise StorageError(f"cannot open lock {name!r}: {exc}") from exc
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._leases[name] = (token, f)
+            return True
+
+    def _release_lease(self, name: str, token: str) -> None:
+        with self._lock:
+            held = self._leases.get(name)
+            if held is None or held[0] != token:
+                return
+            del self._leases[name]
+            if held[1] is not None:
+                held[1].close()  # closing the file drops the flock
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        # The parent still holds these flocks; closing the child's copy of
+        # the file doesn't release them
+        for _, f in self._leases.values():
+            if f is not None:
+                f.close()
+        self._leases = {}
+
+    def save_blob(self, name: str, data: bytes) -> None:
+        path = self.blob_path(name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, data, self.fsync)
+        except Exception:
+            pass
+
+    def open_blob(self, name: str) -> Optional[BinaryIO]:
+        path = self.blob_path(name)
+        if self.legacy_dir is not None and not os.path.exists(path):
+            path = os.path.join(self.legacy_dir, "blobs", os.path.basename(path))
+        try:
+            return open(path, "rb")
+        except OSError:
+            return None
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of connections created on demand.
+
+    Connections never cross a fork: a child process that inherits the pool
+    drops the parent's connections and dials its own.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = DEFAULT_POOL_SIZE,
+                 closer: Callable[[Any], None] = lambda conn: conn.close()) -> None:
+        self._factory = factory
+        self._closer = closer
+        self._size = size
+        self._pid = os.getpid()
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self._size)
+
+    def acquire(self) -> Any:
+        self._check_fork()
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._factory()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def release(self, conn: Any, broken: bool = False) -> None:
+        if broken:
+            try:
+                self._closer(conn)
+            except Exception:
+                pass
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def run(self, fn: Callable[[Any], Any]) -> Any:
+        conn = self.acquire()
+        try:
+            result = fn(conn)
+        except Exception:
+            self.release(conn, broken=True)
+            raise
+        self.release(conn)
+        return result
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._closer(conn)
+            except Exception:
+                pass
+
+
+class SQLiteStorage(StorageBackend):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS scores ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " timestamp INTEGER NOT NULL,"
+        " mode TEXT NOT NULL,"
+        " data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS scores_ts ON scores (timestamp, id)",
+        "CREATE TABLE IF NOT EXISTS docs (name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS blobs (name TEXT PRIMARY KEY, data BLOB NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS locks ("
+        " name TEXT PRIMARY KEY, token TEXT NOT NULL, expires REAL NOT NULL)",
+    )
+
+    def __init__(self, path: str, pool_size: int = DEFAULT_POOL_SIZE) -> None:
+        self.path = path
+        self.pool = ConnectionPool(self._connect, pool_size)
+        self.pool.run(self._init_schema)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_schema(self, conn: sqlite3.Connection) -> None:
+        for stmt in self.SCHEMA:
+            conn.execute(stmt)
+
+    @staticmethod
+    def _record(row_id: int, data: str) -> dict:
+        return dict(json.loads(data), id=row_id)
+
+    def load_scores(self) -> List[dict]:
+        rows = self.pool.run(lambda c: c.execute(
+            "SELECT id, data FROM scores ORDER BY timestamp, id").fetchall())
+        return [self._record(row_id, data) for row_id, data in rows]
+
+    def iter_scores(self) -> Iterator[dict]:
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            cursor = conn.execute("SELECT id, data FROM scores ORDER BY timestamp, id")
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH)
+                if not rows:
+                    return
+                for row_id, data in rows:
+                    yield self._record(row_id, data)
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.pool.release(conn, broken=broken)
+
+    def append_score(self, record: dict) -> dict:
+        row_id = self.pool.run(lambda c: c.execute(
+            "INSERT INTO scores (timestamp, mode, data) VALUES (?, ?, ?)",
+            (int(record.get("timestamp", 0)), str(record.get("mode", "")),
+             json.dumps(record))).lastrowid)
+        return dict(record, id=row_id)
+
+    def page_scores(self, limit: int, before: Optional[ScoreKey] = None,
+                    mode: Optional[str] = None, since: Optional[float] = None,
+                    until: Optional[float] = None,
+                    min_accuracy: Optional[float] = None) -> List[dict]:
+        # Walks the (timestamp, id) index backwards from the cursor
+        where, params = [], []  # type: List[str], List[Any]
+        if before is not None:
+            where.append("(timestamp, id) < (?, ?)")
+            params.extend(before)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if mode is not None:
+            where.append("mode = ?")
+            params.append(mode)
+        if min_accuracy is not None:
+            where.append("json_extract(data, '$.accuracy_pct') >= ?")
+            params.append(min_accuracy)
+        sql = "SELECT id, data FROM scores"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit)
+        rows = self.pool.run(lambda c: c.execute(sql, params).fetchall())
+        return [self._record(row_id, data) for row_id, data in rows]
+
+    def prune_scores(self, before_ts: int) -> int:
+        return self.pool.run(lambda c: c.execute(
+            "DELETE FROM scores WHERE timestamp < ?", (before_ts,)).rowcount)
+
+    def load_doc(self, name: str) -> Optional[Any]:
+        row = self.pool.run(lambda c: c.execute(
+            "SELECT value FROM docs WHERE name = ?", (name,)).fetchone())
+        return None if row is None else json.loads(row[0])
+
+    def save_doc(self, name: str, value: Any) -> None:
+        self.pool.run(lambda c: c.execute(
+            "INSERT INTO docs (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, json.dumps(value))))
+
+    def _acquire_lease(self, name: str, token: str, ttl: float) -> bool:
+        # One statement, so taking a free or expired lock is atomic
+        now = time.time()
+        return self.pool.run(lambda c: c.execute(
+            "INSERT INTO locks (name, token, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET token = excluded.token, "
+            "expires = excluded.expires WHERE locks.expires < ?",
+            (name, token, now + ttl, now)).rowcount) == 1
+
+    def _release_lease(self, name: str, token: str) -> None:
+        self.pool.run(lambda c: c.execute(
+            "DELETE FROM locks WHERE name = ? AND token = ?", (name, token)))
+
+    def save_blob(self, name: str, data: bytes) -> None:
+        self.pool.run(lambda c: c.execute(
+            "INSERT INTO blobs (name, data) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+            (name, sqlite3.Binary(data))))
+
+    def open_blob(self, name: str) -> Optional[BinaryIO]:
+        row = self.pool.run(lambda c: c.execute(
+            "SELECT data FROM blobs WHERE name = ?", (name,)).fetchone())
+        return None if row is None else io.BytesIO(row[0])
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class RedisConnection:
+    """Minimal RESP2 client: enough for the commands the backend issues."""
+
+    def __init__(self, host: str, port: int, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 5.0) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args: Any) -> Any:
+        self.sock.sendall(encode_command(args))
+        return read_reply(self.reader)
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+        finally:
+            self.sock.close()
+
+
+def encode_command(args) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+def read_reply(reader) -> Any:
+    line = reader.readline()
+    if not line:
+        raise StorageError("connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        raise StorageError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        if count < 0:
+            return None
+        return [read_reply(reader) for _ in range(count)]
+    raise StorageError(f"unexpected reply: {line!r}")
+
+
+class RedisStorage(StorageBackend):
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, prefix: str = "toilet_typist",
+                 pool_size: int = DEFAULT_POOL_SIZE) -> None:
+        self.prefix = prefix
+        self.pool = ConnectionPool(
+            lambda: RedisConnection(host, port, db, password), pool_size)
+
+    def key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def execute(self, *args: Any) -> Any:
+        return self.pool.run(lambda conn: conn.execute(*args))
+
+    def load_scores(self) -> List[dict]:
+        raw = self.execute("LRANGE", self.key("scores"), 0, -1) or []
+        return [json.loads(item) for item in raw]
+
+    def iter_scores(self) -> Iterator[dict]:
+        start = 0
+        while True:
+            chunk = self.execute("LRANGE", self.key("scores"), start,
+                                 start + STREAM_BATCH - 1) or []
+            for item in chunk:
+                yield json.loads(item)
+            if len(chunk) < STREAM_BATCH:
+                return
+            start += len(chunk)
+
+    def append_score(self, record: dict) -> dict:
+        record = dict(record, id=self.execute("INCR", self.key("score_id")))
+        self.execute("RPUSH", self.key("scores"), json.dumps(record))
+        return record
+
+    def prune_scores(self, before_ts: int, batch: int = 500) -> int:
+        # Scores are pushed in time order, so old ones form a prefix; LTRIM
+        # keeps concurrent RPUSHes safe.
+        key = self.key("scores")
+        dropped = 0
+        while True:
+            chunk = self.execute("LRANGE", key, dropped, dropped + batch - 1) or []
+            for item in chunk:
+                if json.loads(item).get("timestamp", 0) >= before_ts:
+                    break
+                dropped += 1
+            else:
+                if len(chunk) == batch:
+                    continue
+            break
+        if dropped:
+            self.execute("LTRIM", key, dropped, -1)
+        return dropped
+
+    def load_doc(self, name: str) -> Optional[Any]:
+        raw = self.execute("GET", self.key("doc", name))
+        return None if raw is None else json.loads(raw)
+
+    def save_doc(self, name: str, value: Any) -> None:
+        self.execute("SET", self.key("doc", name), json.dumps(value))
+
+    def _acquire_lease(self, name: str, token: str, ttl: float) -> bool:
+        return self.execute("SET", self.key("lock", name), token, "NX",
+                            "PX", max(1, int(ttl * 1000))) is not None
+
+    def _release_lease(self, name: str, token: str) -> None:
+        # Only the holder deletes; a lease that already ran out and was
+        # taken over in between is the one case this check can't see
+        if self.execute("GET", self.key("lock", name)) == token.encode():
+            self.execute("DEL", self.key("lock", name))
+
+    def save_blob(self, name: str, data: bytes) -> None:
+        self.execute("SET", self.key("blob", name), data)
+
+    def open_blob(self, name: str) -> Optional[BinaryIO]:
+        data = self.execute("GET", self.key("blob", name))
+        return None if data is None else io.BytesIO(data)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def storage_from_url(url: str, scores_file: str, progress_file: str) -> StorageBackend:
+    """Build a backend from a ``TYPIST_STORAGE_URL``-style string."""
+    parsed = urlparse(url or "file:")
+    options = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+    pool_size = int(options.get("pool_size", DEFAULT_POOL_SIZE))
+    if parsed.scheme == "file":
+        file_options = {
+            "fsync": options.get("fsync", "1") != "0",
+            "checkpoint_every": int(options.get("checkpoint_every", CHECKPOINT_EVERY)),
+        }
+        if parsed.path:
+            base = parsed.path
+            os.makedirs(base, exist_ok=True)
+            return FileStorage(os.path.join(base, os.path.basename(scores_file)),
+                               os.path.join(base, os.path.basename(progress_file)),
+                               docs_dir=base, **file_options)
+        return FileStorage(scores_file, progress_file, **file_options)
+    if parsed.scheme == "sqlite":
+        # SQLAlchemy-style: three slashes relative, four absolute
+        return SQLiteStorage(parsed.path[1:] or "toilet_typist.db", pool_size)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisStorage(parsed.hostname or "localhost", parsed.port or 6379,
+                            db, parsed.password,
+                            prefix=options.get("prefix", "toilet_typist"),
+                            pool_size=pool_size)
+    if parsed.scheme == "memory":
+        return MemoryStorage()
+    raise StorageError(f"unknown storage backend: {url!r}")
@@ -0,0 +1,219 @@
+"""Compile the story graph once into validated, index-based tables.
+
+``STORY_NODES`` links chapters by string id. ``compile_story`` checks every
+link, interns ids to integer indices, and precomputes what the game and
+the web map need:
+
+- adjacency arrays for success choices and failure detours
+- chapters passed to reach an ending (``distance``)
+- which chapters can be reached from each one (int bitmasks)
+- the lesson keys each chapter introduces
+
+    python typist_story.py            # validate and print a summary
+    python typist_story.py --json     # print the map payload
+"""
+import argparse
+import json
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+START_NODE = "start"
+# Marks "no failure detour: repeat this chapter" in the failure array
+REPEAT = -1
+
+
+class StoryGraphError(ValueError):
+    """The graph has broken links or chapters that can never end."""
+
+    def __init__(self, problems: List[str]) -> None:
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+class CompiledStory:
+    __slots__ = ("ids", "index", "nodes", "choices", "failure", "distance",
+                 "reach", "new_keys", "start", "endings", "warnings")
+
+    def node(self, node_id: str) -> Optional[Any]:
+        i = self.index.get(node_id)
+        return None if i is None else self.nodes[i]
+
+    def is_choice(self, node_id: str, next_id: str) -> bool:
+        i, j = self.index.get(node_id), self.index.get(next_id)
+        return i is not None and j is not None and j in self.choices[i]
+
+    def can_reach(self, from_id: str, to_id: str) -> bool:
+        i, j = self.index.get(from_id), self.index.get(to_id)
+        return i is not None and j is not None and bool(self.reach[i] >> j & 1)
+
+    def distance_to_ending(self, node_id: str) -> Optional[int]:
+        i = self.index.get(node_id)
+        return None if i is None else self.distance[i]
+
+    def map_payload(self) -> Dict[str, Any]:
+        """Everything a client needs to draw the map, with ids as links."""
+        return {
+            "start": self.ids[self.start],
+            "endings": [self.ids[i] for i in self.endings],
+            "nodes": [
+                {
+                    "id": self.ids[i],
+                    "title": node.title,
+                    "lesson_keys": node.lesson_keys,
+                    "new_keys": self.new_keys[i],
+                    "choices": [self.ids[j] for j in self.choices[i]],
+                    "failure_next": (None if self.failure[i] == REPEAT
+                                     else self.ids[self.failure[i]]),
+                    "distance": self.distance[i],
+                    "reachable": bin(self.reach[i]).count("1"),
+                }
+                for i, node in enumerate(self.nodes)
+            ],
+        }
+
+
+def _reverse_bfs(n: int, edges: List[Tuple[int, ...]], targets: List[int]) -> List[int]:
+    """Fewest edges from each node to any target (-1 if none)."""
+    incoming: List[List[int]] = [[] for _ in range(n)]
+    for i, outs in enumerate(edges):
+        for j in outs:
+            incoming[j].append(i)
+    dist = [-1] * n
+    queue = deque(targets)
+    for t in targets:
+        dist[t] = 0
+    while queue:
+        j = queue.popleft()
+        for i in incoming[j]:
+            if dist[i] < 0:
+                dist[i] = dist[j] + 1
+                queue.append(i)
+    return dist
+
+
+def compile_story(nodes: Mapping[str, Any], start: str = START_NODE) -> CompiledStory:
+    """Validate ``nodes`` and build the compiled tables.
+
+    Raises ``StoryGraphError`` listing every broken link, a missing start,
+    and chapters from which no ending can be reached. Unreachable chapters
+    and lesson keys dropped along a path are only warnings.
+    """
+    ids = tuple(nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    problems: List[str] = []
+    warnings: List[str] = []
+
+    if start not in index:
+        problems.append(f"start node {start!r} is missing")
+    choices: List[Tuple[int, ...]] = []
+    failure: List[int] = []
+    for node_id in ids:
+        node = nodes[node_id]
+        if node.id != node_id:
+            problems.append(f"{node_id!r} is keyed under a different id ({node.id!r})")
+        outs = []
+        for label, target in node.choices:
+            if target in index:
+                outs.append(index[target])
+            else:
+                problems.append(f"{node_id!r} choice {label!r} points at missing {target!r}")
+        choices.append(tuple(outs))
+        if node.failure_next is None:
+            failure.append(REPEAT)
+        elif node.failure_next in index:
+            failure.append(index[node.failure_next])
+        else:
+            problems.append(f"{node_id!r} failure_next points at missing {node.failure_next!r}")
+            failure.append(REPEAT)
+
+    n = len(ids)
+    endings = [i for i in range(n) if not nodes[ids[i]].choices]
+    # Distance counts chapters passed; failure detours don't move you closer
+    distance = _reverse_bfs(n, choices, endings)
+    for i in range(n):
+        if distance[i] < 0:
+            problems.append(f"{ids[i]!r} can never reach an ending")
+    if problems:
+        raise StoryGraphError(problems)
+
+    # Reachability through both kinds of edge, as bitmasks, by fixpoint
+    direct = [0] * n
+    for i in range(n):
+        for j in choices[i] + ((failure[i],) if failure[i] != REPEAT else ()):
+            direct[i] |= 1 << j
+    reach = [direct[i] | 1 << i for i in range(n)]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(n):
+            acc = reach[i]
+            bits = direct[i]
+            while bits:
+                low = bits & -bits
+                acc |= reach[low.bit_length() - 1]
+                bits ^= low
+            if acc != reach[i]:
+                reach[i], changed = acc, True
+
+    start_i = index[start]
+    for i in range(n):
+        if not reach[start_i] >> i & 1:
+            warnings.append(f"{ids[i]!r} is unreachable from {start!r}")
+
+    # A chapter's new keys are those no chapter leading into it taught
+    parents: List[List[int]] = [[] for _ in range(n)]
+    for i in range(n):
+        for j in set(choices[i]) | ({failure[i]} - {REPEAT}):
+            if j != i:
+                parents[j].append(i)
+    new_keys: List[str] = []
+    for i in range(n):
+        keys = nodes[ids[i]].lesson_keys
+        taught = set().union(*(nodes[ids[p]].lesson_keys for p in parents[i])) if parents[i] else set()
+        new_keys.append("".join(k for k in keys if k not in taught))
+    # Passing a chapter should never lead to a lesson with fewer keys
+    for i in range(n):
+        for j in choices[i]:
+            dropped = set(nodes[ids[i]].lesson_keys) - set(nodes[ids[j]].lesson_keys)
+            if dropped:
+                warnings.append(f"{ids[j]!r} drops keys {''.join(sorted(dropped))!r} "
+                                f"taught by {ids[i]!r}")
+
+    story = CompiledStory()
+    story.ids = ids
+    story.index = index
+    story.nodes = tuple(nodes[node_id] for node_id in ids)
+    story.choices = tuple(choices)
+    story.failure = tuple(failure)
+    story.distance = tuple(distance)
+    story.reach = tuple(reach)
+    story.new_keys = tuple(new_keys)
+    story.start = start_i
+    story.endings = tuple(endings)
+    story.warnings = tuple(warnings)
+    return story
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Validate and summarise the story graph")
+    parser.add_argument("--json", action="store_true", help="print the map payload")
+    args = parser.parse_args(argv)
+
+    try:
+        # toilet_typist compiles its graph on import, so a bad edit fails here
+        from toilet_typist import STORY_NODES
+        story = compile_story(STORY_NODES)
+    except StoryGraphError as exc:
+        parser.exit(1, "".join(f"error: {p}\n" for p in exc.problems))
+    if args.json:
+        print(json.dumps(story.map_payload(), indent=2))
+        return
+    for w in story.warnings:
+        print(f"warning: {w}")
+    for i, node_id in enumerate(story.ids):
+        print(f"{node_id:12} distance={story.distance[i]}  new_keys={story.new_keys[i]!r}")
+    print(f"{len(story.ids)} chapters, {len(story.endings)} ending(s), OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Per-player rolling performance trends, updated as each score is saved.
+
+Each player has one small storage doc, ``trends-<player>``, mapping a mode
+family to a fixed-length row:
+
+    [count, ewma_net, ewma_acc, best_net, streak_days, best_streak_days, last_day]
+
+A save touches only that row, so the cost does not grow with history, and
+reading a player's trends is a single doc load. Story chapters share one
+"Story" row so the trend reflects the whole campaign.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from typist_storage import StorageBackend
+
+TRENDS_DOC_PREFIX = "trends-"
+# Weight of the newest score; ~ the last 1/ALPHA scores dominate
+EWMA_ALPHA = 0.2
+# Below this many scores the trend is too noisy to adapt thresholds to
+MIN_ADAPT_SAMPLES = 5
+DAY_SECONDS = 86400
+ROW_FIELDS = ("count", "ewma_net", "ewma_acc", "best_net", "streak_days",
+              "best_streak_days", "last_day")
+
+
+def trends_doc(player: str) -> str:
+    return f"{TRENDS_DOC_PREFIX}{player}"
+
+
+def trend_mode(mode: str) -> str:
+    return "Story" if mode.startswith("Story:") else mode
+
+
+def new_row() -> List[float]:
+    return [0, 0.0, 0.0, 0.0, 0, 0, -1]
+
+
+def update_row(row: List[float], net_wpm: float, accuracy_pct: float,
+               timestamp: float, alpha: float = EWMA_ALPHA) -> List[float]:
+    """Fold one score into ``row`` in place (O(1))."""
+    count, ewma_net, ewma_acc, best_net, streak, best_streak, last_day = row
+    if count == 0:
+        ewma_net, ewma_acc = net_wpm, accuracy_pct
+    else:
+        ewma_net += alpha * (net_wpm - ewma_net)
+        ewma_acc += alpha * (accuracy_pct - ewma_acc)
+    # A streak is consecutive UTC days with at least one score in the mode
+    day = int(timestamp // DAY_SECONDS)
+    if day == last_day + 1:
+        streak += 1
+    elif day != last_day:
+        streak = 1
+    row[:] = [count + 1, round(ewma_net, 3), round(ewma_acc, 3),
+              round(max(best_net, net_wpm), 2), streak, max(best_streak, streak),
+              max(day, last_day)]
+    return row
+
+
+def record_trend(storage: StorageBackend, player: str, mode: str,
+                 net_wpm: float, accuracy_pct: float,
+                 timestamp: Optional[float] = None) -> List[float]:
+    """Fold one score into the player's row for ``mode``; returns the row.
+
+    The doc is updated under the store's lock for it, so a double submit
+    handled by two workers can't lose either update.
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+
+    def add(doc: Optional[Any]) -> Dict[str, Any]:
+        doc = doc if isinstance(doc, dict) else {}
+        row = doc.get(trend_mode(mode))
+        if not isinstance(row, list) or len(row) != len(ROW_FIELDS):
+            row = new_row()
+        doc[trend_mode(mode)] = update_row(row, net_wpm, accuracy_pct, timestamp)
+        return doc
+
+    return storage.update_doc(trends_doc(player), add)[trend_mode(mode)]
+
+
+def describe_row(row: List[float], now: Optional[float] = None) -> Dict[str, Any]:
+    out = dict(zip(ROW_FIELDS, row))
+    today = int((time.time() if now is None else now) // DAY_SECONDS)
+    # A streak is only live if it reached today or yesterday
+    if today - out["last_day"] > 1:
+        out["streak_days"] = 0
+    out["ewma_net"] = round(out["ewma_net"], 1)
+    out["ewma_acc"] = round(out["ewma_acc"], 1)
+    out["last_played"] = time.strftime(
+        "%Y-%m-%d", time.gmtime(out.pop("last_day") * DAY_SECONDS))
+    return out
+
+
+def load_trends(storage: StorageBackend, player: str) -> Dict[str, Dict[str, Any]]:
+    doc = storage.load_doc(trends_doc(player))
+    if not isinstance(doc, dict):
+        return {}
+    return {mode: describe_row(row) for mode, row in sorted(doc.items())
+            if isinstance(row, list) and len(row) == len(ROW_FIELDS)}
+
+
+def adaptive_thresholds(trend: Optional[Dict[str, Any]], base_net: float,
+                        base_acc: float) -> Tuple[float, float]:
+    """Story pass thresholds nudged towards a player's recent form.
+
+    The net WPM bar sits a little under the player's EWMA, and the accuracy
+    bar a few points under theirs, each clamped to a band around the
+    defaults so the bar can neither vanish nor run away.
+    """
+    if not trend or trend.get("count", 0) < MIN_ADAPT_SAMPLES:
+        return base_net, base_acc
+    net = min(max(0.9 * trend["ewma_net"], 0.6 * base_net), 1.5 * base_net)
+    acc = min(max(trend["ewma_acc"] - 3.0, base_acc - 7.0), min(99.0, base_acc + 5.0))
+    return round(net, 1), round(acc, 1)
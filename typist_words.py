@@ -0,0 +1,80 @@
+"""Per-player, per-word counters fed by drill attempts.
+
+Each player has one storage doc, ``words-<player>``, mapping a word to a
+fixed-length row of counters:
+
+    [attempts, correct, mistyped, skipped, ms]
+
+A drill round folds its ``WordResult``s into those rows and hands the
+updated rows straight back, so the API never rescans history. The doc
+keeps at most ``MAX_WORDS`` words; the least-practised go first.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from typist_storage import StorageBackend
+
+WORDS_DOC_PREFIX = "words-"
+ROW_FIELDS = ("attempts", "correct", "mistyped", "skipped", "ms")
+STATUS_COLUMN = {"correct": 1, "mistyped": 2, "skipped": 3}
+# Bounds the doc if the banks are edited a lot over time
+MAX_WORDS = 500
+
+
+def words_doc(player: str) -> str:
+    return f"{WORDS_DOC_PREFIX}{player}"
+
+
+def describe_row(row: List[int]) -> Dict[str, Any]:
+    out = dict(zip(ROW_FIELDS, row))
+    out["accuracy_pct"] = round(100.0 * out["correct"] / max(out["attempts"], 1), 1)
+    out["avg_seconds"] = round(out.pop("ms") / 1000.0 / max(out["attempts"], 1), 3)
+    return out
+
+
+def _rows(doc: Any) -> Dict[str, List[int]]:
+    if not isinstance(doc, dict):
+        return {}
+    return {word: row for word, row in doc.items()
+            if isinstance(row, list) and len(row) == len(ROW_FIELDS)}
+
+
+def record_words(storage: StorageBackend, player: str,
+                 results: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Fold ``WordResult``s into the player's counters; returns their rows.
+
+    The doc is updated under the store's lock for it, so rounds handled by
+    different workers never lose each other's counts.
+    """
+    results = list(results)
+    touched: Dict[str, List[int]] = {}
+
+    def add(doc: Optional[Any]) -> Dict[str, List[int]]:
+        rows = _rows(doc)
+        touched.clear()
+        for result in results:
+            row = rows.get(result.word)
+            if row is None:
+                row = rows[result.word] = [0] * len(ROW_FIELDS)
+            row[0] += 1
+            row[STATUS_COLUMN[result.status]] += 1
+            row[4] += int(round(result.seconds * 1000))
+            touched[result.word] = row
+        if len(rows) > MAX_WORDS:
+            for word in sorted(rows, key=lambda w: rows[w][0])[:len(rows) - MAX_WORDS]:
+                if word not in touched:
+                    del rows[word]
+        return rows
+
+    storage.update_doc(words_doc(player), add)
+    return {word: describe_row(row) for word, row in touched.items()}
+
+
+def load_word_stats(storage: StorageBackend, player: str) -> Dict[str, Dict[str, Any]]:
+    rows = _rows(storage.load_doc(words_doc(player)))
+    return {word: describe_row(row) for word, row in sorted(rows.items())}
+
+
+def weakest_words(stats: Dict[str, Dict[str, Any]], n: int = 5) -> List[str]:
+    """Words with the worst accuracy, most-attempted first among ties."""
+    ranked = sorted(stats, key=lambda w: (stats[w]["accuracy_pct"], -stats[w]["attempts"], w))
+    return ranked[:n]
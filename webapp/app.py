@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import os
 import sys
 import random
+import secrets
+import tempfile
 import time
-from dataclasses import asdict
 from typing import Any, Dict, List, Optional, Tuple
 
 from flask import (
     Flask,
+    Response,
     jsonify,
     redirect,
     render_template,
@@ -24,25 +29,126 @@ if PROJECT_ROOT not in sys.path:
 
 # Reuse core logic from the terminal app
 from toilet_typist import (
-    POTTY_WORDS,
-    SILLY_SENTENCES,
-    STORY_NODES,
+    AttemptRing,
+    AttemptStats,
     compute_stats,
+    get_storage,
     load_scores,
     generate_prompts_for_lesson,
     load_story_progress,
+    recent_net_wpm,
+    reset_storage_after_fork,
     reset_story_progress,
     save_score,
     save_story_progress,
     story_passed,
+    story_thresholds,
     witty_comment,
 )
+from typist_content import ContentSnapshot, ContentStore
+from typist_export import (
+    EXPORT_FORMATS,
+    MIMETYPES as EXPORT_MIMETYPES,
+    ExportError,
+    filter_scores,
+    iter_csv,
+    iter_ndjson,
+    parse_time,
+    write_parquet,
+)
+from typist_replay import (
+    GHOST_MODE,
+    ReplayError,
+    best_ghost,
+    normalize_events,
+    record_ghost,
+    replay_blob_name,
+)
+from typist_rollups import (
+    DEFAULT_RETAIN_DAYS,
+    daily_summary,
+    start_compaction_scheduler,
+)
+from typist_storage import STORAGE_ERRORS
+from typist_trends import load_trends
+from typist_words import load_word_stats, record_words, weakest_words
+from webapp.assets import init_assets
+from webapp.compression import init_compression
+from webapp.limits import clip_typed, init_limits
+from webapp.funnel import StoryFunnel
+from webapp.offline import SyncError, SyncLedger, offline_bundle, parse_result
+from webapp.daily import DAILY_ROUNDS, DayLeaderboard, daily_prompts, start_flusher, utc_day
+from webapp.race import RaceError, RaceHub, iter_room_events
+from webapp.ratelimit import init_rate_limit
+from webapp.warmup import init_warmup, start_in_workers, start_worker
+from webapp.precomputed import (
+    PrecomputedResponse,
+    precompute_html,
+    precompute_json,
+    story_node_payload,
+)
+
+
+SCORES_PAGE_DEFAULT = 25
+SCORES_PAGE_MAX = 100
 
 
 def create_app() -> Flask:
     app = Flask(__name__, template_folder="templates", static_folder="static")
     # NOTE: For production, override via environment variable
     app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-change-me")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    init_compression(app)
+    assets = init_assets(app)
+    for key, cast in (("RATE_LIMIT_RATE", float), ("RATE_LIMIT_BURST", int),
+                      ("RATE_LIMIT_GLOBAL_RATE", float), ("RATE_LIMIT_GLOBAL_BURST", int)):
+        if key in os.environ:
+            app.config[key] = cast(os.environ[key])
+    init_rate_limit(app)
+    for key in ("SUBMIT_MAX_BYTES", "TYPED_SLACK", "MAX_CONTENT_LENGTH"):
+        if key in os.environ:
+            app.config[key] = int(os.environ[key])
+    init_limits(app)
+
+    # Banks and story graph; swapped atomically when TYPIST_CONTENT_FILE changes
+    content = ContentStore(os.environ.get("TYPIST_CONTENT_FILE") or None)
+
+    # Immutable responses per mount point (URLs embed the script root)
+    static_pages: Dict[str, Dict[str, PrecomputedResponse]] = {}
+    # Story node and map responses, per content version
+    story_views: Dict[str, Tuple[Dict[str, PrecomputedResponse], PrecomputedResponse]] = {}
+    # Offline bundles, per (content version, potty mode)
+    # (version, potty) -> (bundle, its precomputed response)
+    offline_bundles: Dict[Tuple[str, bool], Tuple[Dict[str, Any], PrecomputedResponse]] = {}
+
+    race_hub = RaceHub()
+    # For webapp.asgi, which serves race events without a thread each
+    app.extensions["race_hub"] = race_hub
+    daily_board = DayLeaderboard()
+    story_funnel = StoryFunnel()
+    sync_ledger = SyncLedger()
+
+    def start_background_jobs() -> None:
+        # May run in a forked worker: the parent's threads don't survive the
+        # fork, and a lock one of them held would never be released
+        content.reset_after_fork()
+        daily_board.reset_after_fork()
+        story_funnel.reset_after_fork()
+        reset_storage_after_fork()
+        content.start_watcher(float(os.environ.get("TYPIST_CONTENT_WATCH_INTERVAL", 2)))
+        start_flusher(daily_board, get_storage,
+                      float(os.environ.get("TYPIST_DAILY_FLUSH_INTERVAL", 30)))
+        start_flusher(story_funnel, get_storage,
+                      float(os.environ.get("TYPIST_FUNNEL_FLUSH_INTERVAL", 30)),
+                      name="funnel-flush")
+        # Optional in-process retention job; the CLI works without it
+        compact_interval = float(os.environ.get("TYPIST_COMPACT_INTERVAL", 0))
+        if compact_interval > 0:
+            start_compaction_scheduler(
+                get_storage, compact_interval,
+                int(os.environ.get("TYPIST_RETAIN_DAYS", DEFAULT_RETAIN_DAYS)))
+
+    start_in_workers(start_background_jobs)
 
     # ----- Helpers -----
     def get_potty_mode() -> bool:
@@ -51,6 +157,89 @@ def create_app() -> Flask:
     def set_potty_mode(enabled: bool) -> None:
         session["potty_mode"] = bool(enabled)
 
+    def get_player_id() -> str:
+        # Anonymous, cookie-scoped identity for personal bests and trends
+        if "player_id" not in session:
+            session["player_id"] = secrets.token_hex(8)
+        return session["player_id"]
+
+    def run_content(state: Optional[dict] = None) -> ContentSnapshot:
+        """The snapshot a run started on, or the live one for a new run."""
+        return content.get((state or {}).get("content_version"))
+
+    def story_views_for(snapshot: ContentSnapshot):
+        views = story_views.get(snapshot.version)
+        if views is None:
+            story = snapshot.story
+            nodes = {
+                node_id: precompute_json(story_node_payload(
+                    node_id, node, story.distance_to_ending(node_id)))
+                for node_id, node in zip(story.ids, story.nodes)
+            }
+            views = (nodes, precompute_json(story.map_payload(),
+                                            cache_control="public, max-age=600"))
+            if len(story_views) >= 4:
+                story_views.clear()
+            story_views[snapshot.version] = views
+        return views
+
+    def target_wpm(mode: str) -> Optional[float]:
+        """Net WPM to pitch new prompts at: this session's recent attempts,
+        else the player's trend in ``mode``, else None (any difficulty)."""
+        summary = AttemptRing.from_state(session.get("recent_attempts")).summary()
+        if summary["count"]:
+            return summary["avg_net"]
+        return recent_net_wpm(mode, get_player_id())
+
+    def render_static_pages(script_root: str) -> Dict[str, PrecomputedResponse]:
+        pages: Dict[str, PrecomputedResponse] = {}
+        with app.test_request_context("/", base_url=f"http://localhost{script_root}/"):
+            for template in ("drills.html", "sprints.html", "boss.html",
+                             "story.html", "scores.html", "race.html",
+                             "ghost.html", "daily.html", "offline.html"):
+                pages[template] = precompute_html(render_template(template))
+            # The worker caches the offline page and every fingerprinted asset;
+            # new asset hashes change its bytes, which makes browsers update it
+            shell = [url_for("offline_page")] + sorted(assets.url(name) for name in assets.urls)
+            cache_name = "toilet-typist-" + hashlib.sha256("\n".join(shell).encode()).hexdigest()[:12]
+            pages["sw.js"] = PrecomputedResponse.build(
+                render_template("sw.js", shell=shell, cache_name=cache_name).encode("utf-8"),
+                "text/javascript", "no-cache")
+        if len(static_pages) >= 4:
+            static_pages.clear()
+        static_pages[script_root] = pages
+        return pages
+
+    def static_page(name: str) -> Response:
+        pages = static_pages.get(request.script_root)
+        if pages is None:
+            pages = render_static_pages(request.script_root)
+        return pages[name].serve(app)
+
+    def submitted_typed(data: Dict[str, Any], prompt: str) -> str:
+        return clip_typed(data.get("typed", ""), prompt, app.config["TYPED_SLACK"])
+
+    def record_attempt(stats: AttemptStats) -> Dict[str, Any]:
+        """Push ``stats`` onto the session's recent-attempts ring and return
+        its payload: numbers only, unless the request sets ``echo``."""
+        ring = AttemptRing.from_state(session.get("recent_attempts"))
+        ring.push(stats)
+        session["recent_attempts"] = ring.to_state()
+        data = request.get_json(silent=True) or {}
+        return stats.as_dict(include_text=bool(data.get("echo")))
+
+    def encode_cursor(key: Tuple[int, int]) -> str:
+        raw = json.dumps(list(key), separators=(",", ":")).encode("ascii")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(cursor: str) -> Optional[Tuple[int, int]]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            ts, score_id = json.loads(base64.urlsafe_b64decode(padded))
+            return int(ts), int(score_id)
+        except Exception:
+            return None
+
     # ----- Pages -----
     @app.get("/")
     def index():
@@ -63,29 +252,51 @@ def create_app() -> Flask:
 
     @app.get("/drills")
     def drills_page():
-        return render_template("drills.html")
+        return static_page("drills.html")
 
     @app.get("/sprints")
     def sprints_page():
-        return render_template("sprints.html")
+        return static_page("sprints.html")
 
     @app.get("/boss")
     def boss_page():
-        return render_template("boss.html")
+        return static_page("boss.html")
 
     @app.get("/story")
     def story_page():
-        return render_template("story.html")
+        return static_page("story.html")
+
+    @app.get("/race")
+    def race_page():
+        return static_page("race.html")
+
+    @app.get("/ghost")
+    def ghost_page():
+        return static_page("ghost.html")
+
+    @app.get("/daily")
+    def daily_page():
+        return static_page("daily.html")
+
+    @app.get("/offline")
+    def offline_page():
+        return static_page("offline.html")
+
+    @app.get("/sw.js")
+    def service_worker():
+        # Served from the root so its scope covers every page
+        return static_page("sw.js")
 
     @app.get("/scores")
     def scores_page():
         # No server-side render of data; page fetches via API
-        return render_template("scores.html")
+        return static_page("scores.html")
 
     # ----- Settings API -----
     @app.get("/api/settings")
     def api_settings():
-        return jsonify({"potty_mode": get_potty_mode()})
+        return jsonify({"potty_mode": get_potty_mode(),
+                        "content_version": content.current.version})
 
     # ----- Scores API -----
     @app.get("/api/scores/last")
@@ -93,12 +304,109 @@ def create_app() -> Flask:
         last = (load_scores() or [])[-10:]
         return jsonify({"scores": last})
 
+    @app.get("/api/me/trends")
+    def api_me_trends():
+        net_needed, acc_needed = story_thresholds(get_player_id())
+        return jsonify({
+            "trends": load_trends(get_storage(), get_player_id()),
+            "story_thresholds": {"net_wpm": net_needed, "accuracy_pct": acc_needed},
+        })
+
+    @app.get("/api/me/words")
+    def api_me_words():
+        words = load_word_stats(get_storage(), get_player_id())
+        return jsonify({"words": words, "weakest": weakest_words(words)})
+
+    @app.get("/api/attempts/recent")
+    def api_attempts_recent():
+        ring = AttemptRing.from_state(session.get("recent_attempts"))
+        return jsonify({
+            "attempts": [dict(zip(AttemptStats.NUMERIC_FIELDS, row)) for row in ring.rows()],
+            "summary": ring.summary(),
+        })
+
+    @app.get("/api/scores")
+    def api_scores():
+        args = request.args
+        limit = max(1, min(args.get("limit", SCORES_PAGE_DEFAULT, type=int),
+                           SCORES_PAGE_MAX))
+        before = None
+        if args.get("cursor"):
+            before = decode_cursor(args["cursor"])
+            if before is None:
+                return jsonify({"error": "bad_cursor"}), 400
+        try:
+            since = parse_time(args.get("since"))
+            until = parse_time(args.get("until"))
+        except ExportError:
+            return jsonify({"error": "bad_time"}), 400
+        page = get_storage().page_scores(
+            limit,
+            before=before,
+            mode=args.get("mode") or None,
+            since=since,
+            until=until,
+            min_accuracy=args.get("min_accuracy", type=float),
+        )
+        next_cursor = None
+        if len(page) == limit:
+            last = page[-1]
+            next_cursor = encode_cursor((int(last.get("timestamp", 0)),
+                                         int(last.get("id", 0))))
+        return jsonify({"scores": page, "next_cursor": next_cursor})
+
+    @app.get("/api/scores/daily")
+    def api_scores_daily():
+        args = request.args
+        rows = daily_summary(
+            get_storage(),
+            mode=args.get("mode") or None,
+            since=args.get("since", type=float),
+            until=args.get("until", type=float),
+        )
+        return jsonify({"days": rows})
+
+    @app.get("/api/scores/export")
+    def api_scores_export():
+        args = request.args
+        fmt = args.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": "bad_format", "formats": EXPORT_FORMATS}), 400
+        spool = None
+        try:
+            records = filter_scores(get_storage().iter_scores(),
+                                    args.get("mode") or None,
+                                    parse_time(args.get("since")),
+                                    parse_time(args.get("until")))
+            if fmt == "parquet":
+                # Parquet's footer comes last, so spool (to disk past 8 MiB)
+                # and stream the finished file back.
+                spool = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+                write_parquet(records, spool)
+                spool.seek(0)
+                body = iter(lambda: spool.read(1 << 16), b"")
+            else:
+                body = iter_csv(records) if fmt == "csv" else iter_ndjson(records)
+        except ExportError as exc:
+            if spool is not None:
+                spool.close()
+            return jsonify({"error": "export_failed", "detail": str(exc)}), 400
+        # No Content-Length: WSGI servers send this with chunked encoding
+        resp = Response(body, mimetype=EXPORT_MIMETYPES[fmt])
+        resp.headers["Content-Disposition"] = f"attachment; filename=scores.{fmt}"
+        if spool is not None:
+            # Deletes the spill-over file as soon as the response is done
+            resp.call_on_close(spool.close)
+        return resp
+
     # ----- Word Drills API -----
     @app.post("/api/drills/start")
     def api_drills_start():
         rounds = int(request.json.get("rounds", 10))
         session["drills"] = {
             "rounds": rounds,
+            "content_version": content.current.version,
+            "target_wpm": target_wpm("Word Drills"),
             "current": 0,
             "total_net": 0.0,
             "total_acc": 0.0,
@@ -114,22 +422,8 @@ def create_app() -> Flask:
             return jsonify({"done": True})
 
         potty = get_potty_mode()
-        words = POTTY_WORDS if potty else [
-            "river",
-            "planet",
-            "galaxy",
-            "python",
-            "keyboard",
-            "coffee",
-            "pepper",
-            "window",
-            "music",
-            "garden",
-            "novel",
-            "signal",
-        ]
-        sample_count = min(4, len(words))
-        prompt_text = " ".join(random.sample(words, k=sample_count))
+        words = run_content(state).word_index(potty)
+        prompt_text = " ".join(words.sample_for_wpm(state.get("target_wpm"), 4))
         # Store the prompt to validate on submit
         state["current_prompt"] = prompt_text
         session["drills"] = state
@@ -143,11 +437,20 @@ def create_app() -> Flask:
     @app.post("/api/drills/submit")
     def api_drills_submit():
         data = request.json or {}
-        typed = str(data.get("typed", ""))
         seconds = float(data.get("seconds", 0.0))
         state = session.get("drills") or {}
         expected = str(state.get("current_prompt", ""))
-        stats = compute_stats(expected, typed, seconds)
+        typed = submitted_typed(data, expected)
+        stats = compute_stats(expected, typed, seconds, per_word=True)
+        stats_payload = record_attempt(stats)
+        word_totals: Optional[Dict[str, Any]] = {}
+        if expected:
+            try:
+                word_totals = record_words(get_storage(), get_player_id(), stats.words)
+            except STORAGE_ERRORS as exc:
+                # As with save_score: the round still counts
+                print(f"Warning: word stats not saved ({exc})", file=sys.stderr)
+                word_totals = None
         state["current"] = int(state.get("current", 0)) + 1
         state["total_net"] = float(state.get("total_net", 0.0)) + stats.net_wpm
         state["total_acc"] = float(state.get("total_acc", 0.0)) + stats.accuracy_pct
@@ -158,20 +461,22 @@ def create_app() -> Flask:
             rounds = int(state.get("rounds", 10))
             avg_net = state["total_net"] / max(1, rounds)
             avg_acc = state["total_acc"] / max(1, rounds)
-            save_score("Word Drills", avg_net, avg_acc)
+            save_score("Word Drills", avg_net, avg_acc, get_player_id())
             return jsonify({
                 "done": True,
-                "stats": asdict(stats),
+                "stats": stats_payload,
                 "summary": {
                     "avg_net": round(avg_net, 1),
                     "avg_acc": round(avg_acc, 1),
                 },
+                "word_totals": word_totals,
                 "comment": witty_comment(stats),
             })
         else:
             return jsonify({
                 "done": False,
-                "stats": asdict(stats),
+                "stats": stats_payload,
+                "word_totals": word_totals,
                 "comment": witty_comment(stats),
             })
 
@@ -179,14 +484,9 @@ def create_app() -> Flask:
     @app.post("/api/sprints/start")
     def api_sprints_start():
         potty = get_potty_mode()
-        sentences = SILLY_SENTENCES if potty else [
-            "Practice makes progress, not perfection.",
-            "Fast is fine, but accuracy is final.",
-            "Steady hands, focused mind, smooth typing.",
-            "Breathe, relax, and trust your muscle memory.",
-        ]
+        sentences = content.current.sentence_index(potty)
         rounds = min(6, len(sentences))
-        picks = random.sample(sentences, k=rounds)
+        picks = sentences.sample_for_wpm(target_wpm("Sentence Sprints"), rounds)
         session["sprints"] = {
             "rounds": rounds,
             "current": 0,
@@ -216,11 +516,12 @@ def create_app() -> Flask:
     @app.post("/api/sprints/submit")
     def api_sprints_submit():
         data = request.json or {}
-        typed = str(data.get("typed", ""))
         seconds = float(data.get("seconds", 0.0))
         state = session.get("sprints") or {}
         expected = str(state.get("current_prompt", ""))
+        typed = submitted_typed(data, expected)
         stats = compute_stats(expected, typed, seconds)
+        stats_payload = record_attempt(stats)
         state["current"] = int(state.get("current", 0)) + 1
         state["total_net"] = float(state.get("total_net", 0.0)) + stats.net_wpm
         state["total_acc"] = float(state.get("total_acc", 0.0)) + stats.accuracy_pct
@@ -231,10 +532,10 @@ def create_app() -> Flask:
             rounds = int(state.get("rounds", 1))
             avg_net = state["total_net"] / max(1, rounds)
             avg_acc = state["total_acc"] / max(1, rounds)
-            save_score("Sentence Sprints", avg_net, avg_acc)
+            save_score("Sentence Sprints", avg_net, avg_acc, get_player_id())
             return jsonify({
                 "done": True,
-                "stats": asdict(stats),
+                "stats": stats_payload,
                 "summary": {
                     "avg_net": round(avg_net, 1),
                     "avg_acc": round(avg_acc, 1),
@@ -244,7 +545,7 @@ def create_app() -> Flask:
         else:
             return jsonify({
                 "done": False,
-                "stats": asdict(stats),
+                "stats": stats_payload,
                 "comment": witty_comment(stats),
             })
 
@@ -253,12 +554,9 @@ def create_app() -> Flask:
     def api_boss_start():
         duration_seconds = int(request.json.get("duration", 60))
         potty = get_potty_mode()
-        bank = (POTTY_WORDS + SILLY_SENTENCES) if potty else (POTTY_WORDS + [
-            "Practice daily and your speed will rise.",
-            "Accuracy first, then speed follows.",
-            "Consistency beats intensity over time.",
-        ])
-        random.shuffle(bank)
+        snapshot = content.current
+        # Only the band is kept; each prompt is drawn from the index on demand
+        band = snapshot.boss_index(potty).window_for_wpm(target_wpm("Boss Battle 60s"))
         state = {
             "end_time": time.time() + duration_seconds,
             "totals": {
@@ -266,7 +564,9 @@ def create_app() -> Flask:
                 "correct_chars": 0,
                 "prompts": 0,
             },
-            "bank": bank,
+            "content_version": snapshot.version,
+            "potty": potty,
+            "band": list(band),
         }
         session["boss"] = state
         return jsonify({
@@ -282,8 +582,12 @@ def create_app() -> Flask:
         remaining = max(0, int(end_time - time.time()))
         if remaining <= 0:
             return jsonify({"done": True})
-        bank = state.get("bank") or []
-        prompt_text = random.choice(bank) if bank else ""
+        bank = run_content(state).boss_index(bool(state.get("potty")))
+        start, end = state.get("band") or (0, len(bank))
+        # A newer content version may have a shorter bank than the band
+        end = min(int(end), len(bank))
+        start = min(int(start), end - 1)
+        prompt_text = bank.pick(start, end, 1)[0]
         state["current_prompt"] = prompt_text
         session["boss"] = state
         return jsonify({"done": False, "prompt": prompt_text, "remaining": remaining})
@@ -291,9 +595,9 @@ def create_app() -> Flask:
     @app.post("/api/boss/submit")
     def api_boss_submit():
         data = request.json or {}
-        typed = str(data.get("typed", ""))
         state = session.get("boss") or {}
         expected = str(state.get("current_prompt", ""))
+        typed = submitted_typed(data, expected)
         end_time = float(state.get("end_time", 0))
         remaining = max(0.0, end_time - time.time())
         totals = state.get("totals") or {"chars_typed": 0, "correct_chars": 0, "prompts": 0}
@@ -311,7 +615,7 @@ def create_app() -> Flask:
             accuracy_pct = (totals["correct_chars"] / max(1, totals["chars_typed"])) * 100.0 if totals["chars_typed"] else 0.0
             gross_wpm = (totals["chars_typed"] / 5.0) / (seconds / 60.0)
             net_wpm = gross_wpm * (accuracy_pct / 100.0)
-            save_score("Boss Battle 60s", net_wpm, accuracy_pct)
+            save_score("Boss Battle 60s", net_wpm, accuracy_pct, get_player_id())
             return jsonify({
                 "done": True,
                 "summary": {
@@ -325,25 +629,49 @@ def create_app() -> Flask:
             return jsonify({"done": False, "remaining": int(remaining)})
 
     # ----- Story Mode API -----
-    @app.get("/api/story/current")
-    def api_story_current():
+    def load_story_position(story) -> Tuple[Dict[str, Any], str]:
+        """The player's progress and current node id in ``story``.
+
+        A hot swap can retire the node a player is on; they go back to
+        ``start`` rather than being stuck, and history records why.
+        """
         progress = load_story_progress()
         current_id = progress.get("current_node", "start")
-        node = STORY_NODES.get(current_id)
-        if not node:
+        if story.node(current_id) is None and story.node("start") is not None:
+            progress.setdefault("history", []).append({
+                "node": current_id,
+                "result": "reset",
+                "reason": "content_changed",
+            })
+            progress["current_node"] = current_id = "start"
+            save_story_progress(progress)
+        return progress, current_id
+
+    @app.get("/api/story/current")
+    def api_story_current():
+        snapshot = content.current
+        _, current_id = load_story_position(snapshot.story)
+        cached = story_views_for(snapshot)[0].get(current_id)
+        if not cached:
             return jsonify({"error": "missing_node", "current": current_id}), 400
-        return jsonify({
-            "current": current_id,
-            "node": {
-                "id": node.id,
-                "title": node.title,
-                "lesson_keys": node.lesson_keys,
-                "success_text": node.success_text,
-                "failure_text": node.failure_text,
-                "choices": node.choices,
-                "failure_next": node.failure_next,
-            },
-        })
+        return cached.serve(app)
+
+    @app.get("/api/story/map")
+    def api_story_map():
+        return story_views_for(content.current)[1].serve(app)
+
+    @app.get("/api/story/funnel")
+    def api_story_funnel():
+        story = content.current.story
+        counts = story_funnel.view(get_storage())
+        # Chapters in story order, then any only older content had
+        order = list(story.ids) + sorted(set(counts) - set(story.ids))
+        nodes = []
+        for node_id in order:
+            node = story.node(node_id)
+            row = counts.get(node_id) or story_funnel.empty_row()
+            nodes.append(dict(row, id=node_id, title=node.title if node else None))
+        return jsonify({"nodes": nodes})
 
     @app.post("/api/story/reset")
     def api_story_reset():
@@ -352,19 +680,21 @@ def create_app() -> Flask:
 
     @app.post("/api/story/start")
     def api_story_start():
-        progress = load_story_progress()
-        current_id = progress.get("current_node", "start")
-        node = STORY_NODES.get(current_id)
+        snapshot = content.current
+        _, current_id = load_story_position(snapshot.story)
+        node = snapshot.story.node(current_id)
         if not node:
             return jsonify({"error": "missing_node"}), 400
         prompts = generate_prompts_for_lesson(node.lesson_keys, rounds=5)
         session["story_run"] = {
             "node_id": node.id,
+            "content_version": snapshot.version,
             "prompts": prompts,
             "current": 0,
             "total_net": 0.0,
             "total_acc": 0.0,
         }
+        story_funnel.started(node.id)
         return jsonify({"ok": True, "rounds": len(prompts)})
 
     @app.get("/api/story/next")
@@ -387,11 +717,12 @@ def create_app() -> Flask:
     @app.post("/api/story/submit")
     def api_story_submit():
         data = request.json or {}
-        typed = str(data.get("typed", ""))
         seconds = float(data.get("seconds", 0.0))
         state = session.get("story_run") or {}
         expected = str(state.get("current_prompt", ""))
+        typed = submitted_typed(data, expected)
         stats = compute_stats(expected, typed, seconds)
+        stats_payload = record_attempt(stats)
         state["current"] = int(state.get("current", 0)) + 1
         state["total_net"] = float(state.get("total_net", 0.0)) + stats.net_wpm
         state["total_acc"] = float(state.get("total_acc", 0.0)) + stats.accuracy_pct
@@ -401,7 +732,7 @@ def create_app() -> Flask:
         if not done:
             return jsonify({
                 "done": False,
-                "stats": asdict(stats),
+                "stats": stats_payload,
                 "comment": witty_comment(stats),
             })
 
@@ -410,13 +741,15 @@ def create_app() -> Flask:
         avg_acc = state["total_acc"] / max(1, len(state.get("prompts") or [1]))
         progress = load_story_progress()
         node_id = str(state.get("node_id"))
-        node = STORY_NODES.get(node_id)
+        node = run_content(state).story.node(node_id)
         if not node:
             return jsonify({"error": "missing_node"}), 400
-        passed = story_passed(avg_net, avg_acc)
+        # Thresholds are read before this chapter's score moves the trend
+        passed = story_passed(avg_net, avg_acc, story_thresholds(get_player_id()))
+        story_funnel.finished(node.id, passed, avg_net, avg_acc)
 
         # Save overall chapter score
-        save_score(f"Story: {node.id}", avg_net, avg_acc)
+        save_score(f"Story: {node.id}", avg_net, avg_acc, get_player_id())
 
         if passed:
             # End of story path?
@@ -476,14 +809,13 @@ def create_app() -> Flask:
         data = request.json or {}
         label = str(data.get("label", ""))
         next_id = str(data.get("next_id", ""))
-        progress = load_story_progress()
-        current_id = progress.get("current_node", "start")
-        node = STORY_NODES.get(current_id)
+        story = content.current.story
+        progress, current_id = load_story_position(story)
+        node = story.node(current_id)
         if not node:
             return jsonify({"error": "missing_node"}), 400
         # If invalid, default to first choice
-        choice_ids = [cid for _, cid in node.choices]
-        if next_id not in choice_ids:
+        if not story.is_choice(node.id, next_id):
             next_id = node.choices[0][1]
             label = node.choices[0][0]
         progress.setdefault("history", []).append({
@@ -493,8 +825,309 @@ def create_app() -> Flask:
         })
         progress["current_node"] = next_id
         save_story_progress(progress)
+        story_funnel.chose(node.id, next_id)
         return jsonify({"ok": True, "current_node": next_id})
 
+    # ----- Offline API -----
+    def offline_bundle_for(snapshot: ContentSnapshot,
+                           potty: bool) -> Tuple[Dict[str, Any], PrecomputedResponse]:
+        cached = offline_bundles.get((snapshot.version, potty))
+        if cached is None:
+            if len(offline_bundles) >= 8:
+                offline_bundles.clear()
+            bundle = offline_bundle(snapshot, potty)
+            cached = offline_bundles[(snapshot.version, potty)] = (
+                bundle, precompute_json(bundle))
+        return cached
+
+    def synced_bundle(version: str, potty: bool) -> Optional[Dict[str, Any]]:
+        snapshot = content.retained(version)
+        return offline_bundle_for(snapshot, potty)[0] if snapshot else None
+
+    @app.get("/api/offline/bundle")
+    def api_offline_bundle():
+        return offline_bundle_for(content.current, get_potty_mode())[1].serve(app)
+
+    def apply_synced(raw: Any) -> Dict[str, Any]:
+        """Score one offline run and record it as if it had been played online."""
+        result = parse_result(raw, synced_bundle, time.time(), app.config["TYPED_SLACK"])
+        player = get_player_id()
+        net, acc = result["net_wpm"], result["accuracy_pct"]
+        if result["mode"] != "Story":
+            save_score(result["mode"], net, acc, player)
+            return {"mode": result["mode"], "played_at": result["played_at"]}
+        story = content.get(result["content_version"]).story
+        node = story.node(result["node"])
+        if not node:
+            raise SyncError("unknown story node")
+        # The server's thresholds decide, as they would have online. The
+        # funnel is left alone: it counts the runs it saw start.
+        passed = story_passed(net, acc, story_thresholds(player))
+        save_score(f"Story: {node.id}", net, acc, player)
+        reply = {"mode": "Story", "passed": passed, "played_at": result["played_at"]}
+        progress = load_story_progress()
+        if progress.get("current_node", "start") != node.id:
+            # Progress moved on (online play, another device): score only
+            return dict(reply, story="stale",
+                        current_node=progress.get("current_node", "start"))
+        history = progress.setdefault("history", [])
+        history.append({"node": node.id, "avg_net": round(net, 1),
+                        "avg_acc": round(acc, 1),
+                        "result": "success" if passed else "fail",
+                        "offline": True, "played_at": result["played_at"]})
+        if not passed:
+            progress["current_node"] = node.failure_next or node.id
+        elif story.is_choice(node.id, result["next_id"]):
+            history.append({"node": node.id, "result": "choice",
+                            "choice": result["next_id"], "offline": True})
+            progress["current_node"] = result["next_id"]
+        save_story_progress(progress)
+        return dict(reply, story="applied", current_node=progress["current_node"])
+
+    @app.post("/api/sync")
+    def api_sync():
+        data = request.get_json(silent=True) or {}
+        items = data.get("results")
+        if not isinstance(items, list):
+            return jsonify({"error": "bad_request"}), 400
+        try:
+            out = sync_ledger.apply(get_storage(), get_player_id(), items, apply_synced)
+        except SyncError as exc:
+            return jsonify({"error": "bad_request", "detail": str(exc)}), 400
+        except STORAGE_ERRORS:
+            # e.g. another worker is applying this player's previous batch;
+            # the client keeps its queue and retries
+            return jsonify({"error": "busy"}), 503
+        return jsonify(out)
+
+    # ----- Race Mode API -----
+    @app.errorhandler(RaceError)
+    def race_error(err: RaceError):
+        status = 404 if err.code == "unknown_room" else 400
+        return jsonify({"error": err.code}), status
+
+    def current_race():
+        state = session.get("race") or {}
+        room = race_hub.get(str(state.get("room", "")))
+        return room, str(state.get("player", ""))
+
+    @app.post("/api/race/join")
+    def api_race_join():
+        data = request.json or {}
+        room_id = str(data.get("room", "")).strip().lower()
+        if room_id:
+            room = race_hub.get(room_id)
+        else:
+            room = race_hub.create_room(
+                random.choice(content.current.sentence_bank(get_potty_mode())))
+        player = room.join(str(data.get("name", "")))
+        session["race"] = {"room": room.id, "player": player.id}
+        return jsonify({
+            "ok": True,
+            "room": room.id,
+            "player": player.id,
+            "prompt": room.prompt,
+        })
+
+    @app.post("/api/race/start")
+    def api_race_start():
+        room, _ = current_race()
+        starts_at = room.start()
+        return jsonify({"ok": True, "starts_at": starts_at, "now": time.time()})
+
+    @app.post("/api/race/progress")
+    def api_race_progress():
+        data = request.json or {}
+        room, player_id = current_race()
+        typed = clip_typed(data.get("typed", ""), room.prompt, slack=0)
+        # Progress is the correctly typed prefix; errors stall the car
+        chars = 0
+        for expected_char, typed_char in zip(room.prompt, typed):
+            if expected_char != typed_char:
+                break
+            chars += 1
+        room.progress(player_id, chars)
+        return jsonify({"ok": True, "chars": chars})
+
+    @app.post("/api/race/finish")
+    def api_race_finish():
+        data = request.json or {}
+        room, player_id = current_race()
+        typed = submitted_typed(data, room.prompt)
+        seconds = float(data.get("seconds", 0.0))
+        stats = compute_stats(room.prompt, typed, seconds)
+        # A rejected finish (RaceError) must not reach the attempts ring
+        room.finish(player_id, stats.net_wpm, stats.accuracy_pct)
+        stats_payload = record_attempt(stats)
+        save_score("Race", stats.net_wpm, stats.accuracy_pct, get_player_id())
+        return jsonify({
+            "done": True,
+            "stats": stats_payload,
+            "comment": witty_comment(stats),
+        })
+
+    @app.get("/api/race/<room_id>/events")
+    def api_race_events(room_id: str):
+        room = race_hub.get(room_id)
+        resp = Response(iter_room_events(room), mimetype="text/event-stream")
+        resp.headers["Cache-Control"] = "no-cache"
+        # Stop reverse proxies from buffering the stream
+        resp.headers["X-Accel-Buffering"] = "no"
+        return resp
+
+    # ----- Daily Challenge API -----
+    @app.post("/api/daily/start")
+    def api_daily_start():
+        day = utc_day()
+        name = str((request.json or {}).get("name", "")).strip()[:24] or "Anonymous"
+        session["daily"] = {
+            "day": day,
+            "potty": get_potty_mode(),
+            "content_version": content.current.version,
+            "name": name,
+            "current": 0,
+            "total_net": 0.0,
+            "total_acc": 0.0,
+        }
+        return jsonify({"ok": True, "day": day, "rounds": DAILY_ROUNDS})
+
+    @app.get("/api/daily/next")
+    def api_daily_next():
+        state = session.get("daily") or {}
+        if not state:
+            return jsonify({"error": "not_started"}), 400
+        prompts = daily_prompts(state["day"], bool(state.get("potty")), run_content(state))
+        current = int(state.get("current", 0))
+        if current >= len(prompts):
+            return jsonify({"done": True})
+        return jsonify({
+            "done": False,
+            "round": current + 1,
+            "rounds": len(prompts),
+            "prompt": prompts[current],
+        })
+
+    @app.post("/api/daily/submit")
+    def api_daily_submit():
+        data = request.json or {}
+        seconds = float(data.get("seconds", 0.0))
+        state = session.get("daily") or {}
+        if not state:
+            return jsonify({"error": "not_started"}), 400
+        prompts = daily_prompts(state["day"], bool(state.get("potty")), run_content(state))
+        current = int(state.get("current", 0))
+        if current >= len(prompts):
+            return jsonify({"error": "already_done"}), 400
+        typed = submitted_typed(data, prompts[current])
+        stats = compute_stats(prompts[current], typed, seconds)
+        stats_payload = record_attempt(stats)
+        state["current"] = current + 1
+        state["total_net"] = float(state.get("total_net", 0.0)) + stats.net_wpm
+        state["total_acc"] = float(state.get("total_acc", 0.0)) + stats.accuracy_pct
+        session["daily"] = state
+        if state["current"] < len(prompts):
+            return jsonify({
+                "done": False,
+                "stats": stats_payload,
+                "comment": witty_comment(stats),
+            })
+
+        # Day results stay on the in-memory board, not in the score history
+        avg_net = state["total_net"] / len(prompts)
+        avg_acc = state["total_acc"] / len(prompts)
+        placed = daily_board.submit(get_storage(), state["day"], get_player_id(),
+                                    state.get("name", "Anonymous"), avg_net, avg_acc)
+        return jsonify({
+            "done": True,
+            "stats": stats_payload,
+            "summary": {
+                "avg_net": round(avg_net, 1),
+                "avg_acc": round(avg_acc, 1),
+            },
+            "rank": placed["rank"],
+            "improved": placed["improved"],
+            "comment": witty_comment(stats),
+        })
+
+    @app.get("/api/daily/leaderboard")
+    def api_daily_leaderboard():
+        day = request.args.get("day") or utc_day()
+        try:
+            time.strptime(day, "%Y-%m-%d")
+        except ValueError:
+            return jsonify({"error": "bad_day"}), 400
+        return jsonify(daily_board.top(get_storage(), day))
+
+    # ----- Ghost Replay API -----
+    @app.post("/api/ghost/start")
+    def api_ghost_start():
+        data = request.json or {}
+        player = get_player_id() if data.get("against") == "me" else None
+        ghost = best_ghost(get_storage(), player)
+        prompt_text = ghost["prompt"] if ghost else random.choice(
+            content.current.sentence_bank(get_potty_mode()))
+        session["ghost"] = {"prompt": prompt_text}
+        return jsonify({"ok": True, "prompt": prompt_text, "ghost": ghost})
+
+    @app.post("/api/ghost/submit")
+    def api_ghost_submit():
+        data = request.json or {}
+        seconds = float(data.get("seconds", 0.0))
+        expected = str((session.get("ghost") or {}).get("prompt", ""))
+        if not expected:
+            return jsonify({"error": "not_started"}), 400
+        typed = submitted_typed(data, expected)
+        try:
+            events = normalize_events(data.get("events") or [])
+        except ReplayError as exc:
+            return jsonify({"error": "bad_events", "detail": str(exc)}), 400
+        stats = compute_stats(expected, typed, seconds)
+        stats_payload = record_attempt(stats)
+        record = save_score(GHOST_MODE, stats.net_wpm, stats.accuracy_pct,
+                            get_player_id())
+        if record.get("id") is not None:
+            try:
+                record_ghost(get_storage(), record, expected, events, get_player_id())
+            except STORAGE_ERRORS as exc:
+                # The score stands; only its replay is missing
+                print(f"Warning: replay not saved ({exc})", file=sys.stderr)
+        session.pop("ghost", None)
+        return jsonify({
+            "done": True,
+            "score_id": record.get("id"),
+            "stats": stats_payload,
+            "comment": witty_comment(stats),
+        })
+
+    @app.get("/api/replays/<int:score_id>")
+    def api_replay(score_id: int):
+        stream = get_storage().open_blob(replay_blob_name(score_id))
+        if stream is None:
+            return jsonify({"error": "missing_replay"}), 404
+
+        def chunks():
+            with stream:
+                yield from iter(lambda: stream.read(4096), b"")
+
+        resp = Response(chunks(), mimetype="application/octet-stream")
+        # A replay is never rewritten once stored
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return resp
+
+    # Pages that take no per-request data are rendered once per mount point
+    render_static_pages("")
+
+    # Build the rest of the immutable data now, before a preloading server
+    # forks, so workers share it instead of each building it on first use
+    if "WARM_START_FREEZE" in os.environ:
+        app.config["WARM_START_FREEZE"] = os.environ["WARM_START_FREEZE"] != "0"
+    init_warmup(app, [
+        ("storage", get_storage),
+        ("story", lambda: story_views_for(content.current)),
+        ("daily", lambda: [daily_prompts(utc_day(), potty, content.current)
+                           for potty in (True, False)]),
+    ])
+
     return app
 
 
@@ -503,6 +1136,9 @@ app = create_app()
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     host = os.environ.get("HOST", "0.0.0.0")
+    # The debug reloader runs this twice; only its child serves
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_worker()
     app.run(host=host, port=port, debug=True)
 
 
@@ -0,0 +1,261 @@
+"""ASGI entry point: the same routes, with long-lived streams on asyncio.
+
+    uvicorn webapp.asgi:app --workers 4      # or any ASGI server
+    gunicorn webapp.app:app                  # the WSGI entry point still works
+
+Race event streams are served natively: each subscriber is a coroutine
+waiting on its room, so thousands of idle or streaming connections cost
+coroutines rather than threads. Every other request runs the unchanged
+Flask app on a bounded thread pool. Its storage I/O happens there, and
+a streamed body is pulled one chunk per pool call, so a slow client
+holds no thread between chunks. Request bodies are read by the event
+loop, up to ``MAX_CONTENT_LENGTH``, before a thread is involved.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+
+# Ensure the project root is importable when served as "webapp.asgi:app"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from webapp.race import RaceError, aiter_room_events
+from webapp.warmup import start_worker
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+DEFAULT_THREADS = 32
+_DONE = object()
+
+
+class Disconnected(Exception):
+    """The client went away before its request body was complete."""
+
+
+class AsgiApp:
+    """Wrap a Flask app from ``create_app`` as an ASGI application."""
+
+    def __init__(self, flask_app: Flask, threads: int = DEFAULT_THREADS) -> None:
+        self.flask_app = flask_app
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+        self.adapter = flask_app.url_map.bind("localhost")
+        # Endpoints served on the event loop instead of the pool
+        self.native = {"api_race_events": self.race_events}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            handler = self.native_handler(scope)
+            if handler is not None:
+                await handler[0](scope, receive, send, **handler[1])
+            else:
+                await self.bridge(scope, receive, send)
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # This process serves: start the app's background jobs here
+                start_worker()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def native_handler(self, scope: Scope):
+        try:
+            endpoint, args = self.adapter.match(path_info(scope), method=scope["method"])
+        except HTTPException:
+            return None
+        handler = self.native.get(endpoint)
+        return None if handler is None else (handler, args)
+
+    # ----- Native routes -----
+    async def race_events(self, scope: Scope, receive: Receive, send: Send,
+                          room_id: str) -> None:
+        try:
+            room = self.flask_app.extensions["race_hub"].get(room_id)
+        except RaceError as err:
+            await send_json(send, 404, {"error": err.code})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            # Stop reverse proxies from buffering the stream
+            (b"x-accel-buffering", b"no"),
+        ]})
+
+        async def stream() -> None:
+            async for frame in aiter_room_events(room):
+                await send({"type": "http.response.body", "body": frame.encode("utf-8"),
+                            "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        await until_disconnect(stream(), receive)
+
+    # ----- Everything else: the WSGI app on the pool -----
+    async def bridge(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.flask_app.config.get("MAX_CONTENT_LENGTH")
+        try:
+            body = await read_body(scope, receive, limit)
+        except Disconnected:
+            # Nobody to answer, and a cut-off body must not reach a handler
+            return
+        if body is None:
+            await send_json(send, 413, {"error": "payload_too_large"})
+            return
+        loop = asyncio.get_running_loop()
+        started: List[Any] = []
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            started[:] = [status, headers]
+            return lambda data: None  # write() is unused by Flask
+
+        def call() -> Tuple[Iterable[bytes], Any, Iterator[bytes]]:
+            result = self.flask_app(wsgi_environ(scope, body), start_response)
+            iterator = iter(result)
+            # Flask sets status and headers before the first chunk exists
+            return result, next(iterator, _DONE), iterator
+
+        result, chunk, iterator = await loop.run_in_executor(self.pool, call)
+        try:
+            status, headers = started
+            await send({
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                            for k, v in headers],
+            })
+            while chunk is not _DONE:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await loop.run_in_executor(self.pool, next, iterator, _DONE)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self.pool, close)
+
+
+async def read_body(scope: Scope, receive: Receive, limit: Optional[int]) -> Optional[bytes]:
+    """The whole request body, or ``None`` once it passes ``limit`` bytes.
+
+    Raises Disconnected if the client leaves before the body is complete.
+    """
+    for name, value in scope.get("headers") or ():
+        if name == b"content-length" and limit is not None and value.isdigit() \
+                and int(value) > limit:
+            return None
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise Disconnected
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def path_info(scope: Scope) -> str:
+    """The path below the mount point: ``path`` minus ``root_path``, as asgiref does."""
+    path, root = scope["path"], scope.get("root_path", "")
+    if root and (path == root or path.startswith(root + "/")):
+        return path[len(root):]
+    return path
+
+
+def wsgi_environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path_info(scope).encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers") or ():
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        value = value.decode("latin-1")
+        if key in environ:
+            # Cookie pairs are split on ";", so a "," join would glue the
+            # last cookie of one header to the first of the next
+            sep = "; " if key == "HTTP_COOKIE" else ","
+            value = f"{environ[key]}{sep}{value}"
+        environ[key] = value
+    if "CONTENT_LENGTH" not in environ:
+        # Only the client's own Content-Length is passed on, so a chunked
+        # submit still gets the 411 it would get under WSGI. The buffered
+        # body ends the stream, so other routes can still read it.
+        environ["wsgi.input_terminated"] = True
+    return environ
+
+
+async def send_json(send: Send, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode("ascii"))]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def until_disconnect(work: Awaitable[None], receive: Receive) -> None:
+    """Run ``work`` but stop it as soon as the client goes away."""
+    task = asyncio.ensure_future(work)
+
+    async def watch() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in (task, watcher):
+            t.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, OSError):
+            pass
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None) -> AsgiApp:
+    if flask_app is None:
+        from webapp.app import app as flask_app
+    return AsgiApp(flask_app, int(os.environ.get("TYPIST_ASGI_THREADS", DEFAULT_THREADS)))
+
+
+app = create_asgi_app()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+from typing import Dict
+
+from flask import Flask, abort, url_for
+
+from webapp.compression import DEFAULT_MIN_SIZE
+from webapp.precomputed import PrecomputedResponse
+
+# Fingerprinted URLs change whenever the content does, so they never go stale
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def fingerprinted_name(filename: str, digest: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{digest}{ext}"
+
+
+class AssetManifest:
+    """Content-hashed, precompressed copies of everything under static/.
+
+    Built once at startup; templates link through ``asset_url`` so a new
+    deploy yields new URLs while unchanged files stay cached forever.
+    """
+
+    def __init__(self, static_folder: str, min_size: int = DEFAULT_MIN_SIZE) -> None:
+        self.urls: Dict[str, str] = {}
+        self.files: Dict[str, PrecomputedResponse] = {}
+        for root, _, names in os.walk(static_folder):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, static_folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    body = f.read()
+                digest = hashlib.sha256(body).hexdigest()[:12]
+                hashed = fingerprinted_name(rel, digest)
+                mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+                self.urls[rel] = hashed
+                self.files[hashed] = PrecomputedResponse.build(
+                    body, mimetype, IMMUTABLE_CACHE_CONTROL, min_size)
+
+    def url(self, filename: str) -> str:
+        hashed = self.urls.get(filename)
+        if hashed is None:
+            # Unknown (e.g. added after startup): fall back to the plain route
+            return url_for("static", filename=filename)
+        return url_for("asset", filename=hashed)
+
+
+def init_assets(app: Flask) -> AssetManifest:
+    manifest = AssetManifest(app.static_folder,
+                             app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE))
+
+    @app.get("/assets/<path:filename>")
+    def asset(filename: str):
+        cached = manifest.files.get(filename)
+        if cached is None:
+            abort(404)
+        return cached.serve(app)
+
+    app.jinja_env.globals["asset_url"] = manifest.url
+    return manifest
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+from flask import Flask, Response, request
+
+try:  # Optional: brotli is preferred when the wheel is installed
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+}
+
+# Bodies smaller than this cost more in CPU and framing than they save
+DEFAULT_MIN_SIZE = 1024
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        # mtime=0 keeps the output byte-identical across builds
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def negotiate_encoding(available=SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the best encoding the client accepts, or None for identity."""
+    accepted = request.accept_encodings
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted[encoding]
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return (mimetype or "") in COMPRESSIBLE_MIMETYPES
+
+
+def init_compression(app: Flask) -> None:
+    """Compress eligible dynamic responses on the way out."""
+    app.config.setdefault("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+
+    @app.after_request
+    def compress_response(resp: Response) -> Response:
+        if (resp.status_code != 200 or resp.direct_passthrough
+                or resp.is_streamed or "Content-Encoding" in resp.headers
+                or not is_compressible(resp.mimetype)):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        body = resp.get_data()
+        if len(body) < app.config["COMPRESS_MIN_SIZE"]:
+            return resp
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return resp
+        resp.set_data(compress(body, encoding))
+        resp.headers["Content-Encoding"] = encoding
+        etag, weak = resp.get_etag()
+        if etag:
+            # Each representation needs its own validator
+            resp.set_etag(f"{etag}-{encoding}", weak=weak)
+        return resp
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import atexit
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+DAILY_ROUNDS = 5
+DAILY_WORD_ROUNDS = 2
+LEADERBOARD_SIZE = 20
+# Finished days stay readable from memory for this many days back
+KEEP_DAYS = 2
+FLUSH_INTERVAL = 30.0
+
+
+def utc_day(now: Optional[float] = None) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(time.time() if now is None else now))
+
+
+def daily_doc(day: str) -> str:
+    return f"daily-{day}"
+
+
+@lru_cache(maxsize=8)
+def daily_prompts(day: str, potty_mode: bool, content: Any) -> Tuple[str, ...]:
+    """The day's shared prompt set: word groups, then sentences.
+
+    Seeded by the date alone, so every process and every player on the
+    same ``content`` snapshot derives the same set, and it is built once
+    per day rather than per session.
+    """
+    rng = random.Random(f"toilet-typist-daily:{day}:{int(potty_mode)}")
+    words = content.word_bank(potty_mode)
+    sentences = content.sentence_bank(potty_mode)
+    prompts = [" ".join(rng.sample(words, k=min(4, len(words))))
+               for _ in range(DAILY_WORD_ROUNDS)]
+    prompts += rng.sample(sentences, k=min(DAILY_ROUNDS - DAILY_WORD_ROUNDS, len(sentences)))
+    return tuple(prompts)
+
+
+def better(entry: Dict[str, Any], other: Optional[Dict[str, Any]]) -> bool:
+    """Whether ``entry`` beats ``other``: faster, or as fast but earlier."""
+    if other is None:
+        return True
+    return (entry["net_wpm"], -entry["timestamp"]) > (other["net_wpm"], -other["timestamp"])
+
+
+def merge_players(into: Dict[str, Dict[str, Any]], other: Dict[str, Dict[str, Any]]) -> None:
+    """Keep each player's better entry from both boards in ``into``."""
+    for player, entry in other.items():
+        if isinstance(entry, dict) and better(entry, into.get(player)):
+            into[player] = entry
+
+
+class DayLeaderboard:
+    """Best run per player per day, held in memory.
+
+    Results never go through the main score history. ``flush`` merges each
+    cached day with its storage doc, under the doc's lock, keeping every
+    player's best from both, and saves the days that changed here. Every
+    worker does this, so they all converge on the same board within one
+    flush interval, and a restart loses at most one interval.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._days: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty: set = set()
+
+    def reset_after_fork(self) -> None:
+        # The parent's flusher may have held the lock at fork time
+        self._lock = threading.Lock()
+
+    def _day(self, storage, day: str) -> Dict[str, Dict[str, Any]]:
+        entries = self._days.get(day)
+        if entries is None:
+            doc = storage.load_doc(daily_doc(day)) if storage is not None else None
+            entries = dict(doc.get("players") or {}) if isinstance(doc, dict) else {}
+            self._days[day] = entries
+            for old in sorted(self._days)[:-KEEP_DAYS]:
+                if old not in self._dirty:
+                    del self._days[old]
+        return entries
+
+    def submit(self, storage, day: str, player: str, name: str,
+               net_wpm: float, accuracy_pct: float) -> Dict[str, Any]:
+        """Record a finished run; returns ``{"rank", "best", "improved"}``."""
+        entry = {"name": name, "net_wpm": round(net_wpm, 1),
+                 "accuracy_pct": round(accuracy_pct, 1), "timestamp": int(time.time())}
+        with self._lock:
+            entries = self._day(storage, day)
+            best = entries.get(player)
+            improved = best is None or entry["net_wpm"] > best["net_wpm"]
+            if improved:
+                entries[player] = best = entry
+                self._dirty.add(day)
+            rank = 1 + sum(1 for e in entries.values() if e["net_wpm"] > best["net_wpm"])
+        return {"rank": rank, "best": best, "improved": improved}
+
+    def top(self, storage, day: str, n: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._day(storage, day).values())
+        entries.sort(key=lambda e: (-e["net_wpm"], e["timestamp"]))
+        return {"day": day, "players": len(entries), "leaders": entries[:n or self.size]}
+
+    def flush(self, storage) -> int:
+        """Merge cached days with storage; returns how many were written."""
+        with self._lock:
+            days = {day: dict(entries) for day, entries in self._days.items()}
+            pending = set(self._dirty)
+            self._dirty.clear()
+        written = set()
+        try:
+            for day, entries in days.items():
+                if day in pending:
+                    storage.update_doc(daily_doc(day), lambda doc, day=day, entries=entries:
+                                       {"day": day, "players": self._merged(doc, entries)})
+                    written.add(day)
+                else:
+                    # Nothing new here; just pick up other workers' results
+                    entries = self._merged(storage.load_doc(daily_doc(day)), entries)
+                with self._lock:
+                    if day in self._days:
+                        merge_players(self._days[day], entries)
+        except Exception:
+            with self._lock:
+                self._dirty |= pending - written  # retried on the next flush
+            raise
+        return len(written)
+
+    @staticmethod
+    def _merged(doc: Any, entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """A stored day's players with ``entries`` merged in; also folds the
+        stored ones into ``entries``."""
+        stored = dict(doc.get("players") or {}) if isinstance(doc, dict) else {}
+        merge_players(stored, entries)
+        entries.update(stored)
+        return stored
+
+
+def start_flusher(board: Any, get_storage, interval_seconds: float = FLUSH_INTERVAL,
+                  name: str = "daily-flush") -> threading.Event:
+    """Flush ``board`` every ``interval_seconds``, and once more at exit;
+    set the Event to stop. Anything with ``flush(storage)`` will do."""
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval_seconds):
+            try:
+                board.flush(get_storage())
+            except Exception:
+                pass
+
+    def final_flush() -> None:
+        stop.set()
+        try:
+            board.flush(get_storage())
+        except Exception:
+            pass
+
+    threading.Thread(target=loop, name=name, daemon=True).start()
+    atexit.register(final_flush)
+    return stop
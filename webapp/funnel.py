@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+FUNNEL_DOC_PREFIX = "story-funnel"
+# Counts are spread over this many docs so workers rarely flush to the
+# same one; a fixed number keeps ``view`` to as many reads however many
+# processes have come and gone
+FUNNEL_SHARDS = 8
+# attempts = chapter runs started; passes + fails = runs finished
+ROW_FIELDS = ("attempts", "passes", "fails", "net_sum", "acc_sum")
+# How long a merged view is reused before the shards are read again
+VIEW_MAX_AGE = 10.0
+
+
+def shard_doc(shard: int) -> str:
+    return f"{FUNNEL_DOC_PREFIX}-{shard}"
+
+
+def process_shard() -> int:
+    return os.getpid() % FUNNEL_SHARDS
+
+
+def _add_rows(into: Dict[str, List[float]], rows: Dict[str, Any]) -> None:
+    for node_id, row in rows.items():
+        if not isinstance(row, list) or len(row) != len(ROW_FIELDS):
+            continue
+        acc = into.setdefault(node_id, [0] * len(ROW_FIELDS))
+        for i, value in enumerate(row):
+            acc[i] += value
+
+
+def _add_choices(into: Dict[str, Dict[str, int]], choices: Dict[str, Any]) -> None:
+    for node_id, counts in choices.items():
+        if not isinstance(counts, dict):
+            continue
+        acc = into.setdefault(node_id, {})
+        for next_id, n in counts.items():
+            acc[next_id] = acc.get(next_id, 0) + int(n)
+
+
+def describe_node(row: List[float], choices: Dict[str, int]) -> Dict[str, Any]:
+    attempts, passes, fails, net_sum, acc_sum = row
+    finished = passes + fails
+    return {
+        "attempts": int(attempts),
+        "passes": int(passes),
+        "fails": int(fails),
+        "abandoned": int(max(0, attempts - finished)),
+        "pass_rate": round(passes / finished, 3) if finished else None,
+        "avg_net": round(net_sum / finished, 1) if finished else None,
+        "avg_acc": round(acc_sum / finished, 1) if finished else None,
+        "choices": dict(sorted(choices.items(), key=lambda kv: -kv[1])),
+    }
+
+
+class StoryFunnel:
+    """Per-chapter story counters, kept in memory and merged through storage.
+
+    Updates only touch this process's pending deltas. ``flush`` adds them
+    to one of ``FUNNEL_SHARDS`` shard docs under the store's lock for it,
+    so workers sharing a shard can't lose each other's counts. ``view``
+    sums the shards.
+    """
+
+    def __init__(self, shard: Optional[int] = None) -> None:
+        self.shard = process_shard() if shard is None else shard
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows: Dict[str, List[float]] = {}
+        self._choices: Dict[str, Dict[str, int]] = {}
+        self._view: Optional[Dict[str, Dict[str, Any]]] = None
+        self._view_at = 0.0
+
+    def reset_after_fork(self) -> None:
+        # The parent's counts are the parent's to flush
+        self.shard = process_shard()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows, self._choices = {}, {}
+        self._view, self._view_at = None, 0.0
+
+    @staticmethod
+    def empty_row() -> Dict[str, Any]:
+        return describe_node([0] * len(ROW_FIELDS), {})
+
+    def _row(self, node_id: str) -> List[float]:
+        row = self._rows.get(node_id)
+        if row is None:
+            row = self._rows[node_id] = [0] * len(ROW_FIELDS)
+        return row
+
+    def started(self, node_id: str) -> None:
+        with self._lock:
+            self._row(node_id)[0] += 1
+
+    def finished(self, node_id: str, passed: bool, net_wpm: float,
+                 accuracy_pct: float) -> None:
+        with self._lock:
+            row = self._row(node_id)
+            row[1 if passed else 2] += 1
+            row[3] += net_wpm
+            row[4] += accuracy_pct
+
+    def chose(self, node_id: str, next_id: str) -> None:
+        with self._lock:
+            counts = self._choices.setdefault(node_id, {})
+            counts[next_id] = counts.get(next_id, 0) + 1
+
+    def flush(self, storage) -> int:
+        """Add pending counts to this process's shard; returns nodes written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, choices = self._rows, self._choices
+                self._rows, self._choices = {}, {}
+            if not rows and not choices:
+                return 0
+            def add(doc: Optional[Any]) -> Dict[str, Any]:
+                doc = doc if isinstance(doc, dict) else {}
+                merged_rows = dict(doc.get("nodes") or {})
+                merged_choices = dict(doc.get("choices") or {})
+                _add_rows(merged_rows, rows)
+                _add_choices(merged_choices, choices)
+                return {"nodes": merged_rows, "choices": merged_choices,
+                        "updated": int(time.time())}
+
+            try:
+                storage.update_doc(shard_doc(self.shard), add)
+            except Exception:
+                with self._lock:
+                    # Put the counts back for the next flush
+                    _add_rows(self._rows, rows)
+                    _add_choices(self._choices, choices)
+                raise
+            self._view = None
+            return len(set(rows) | set(choices))
+
+    def view(self, storage, max_age: float = VIEW_MAX_AGE) -> Dict[str, Dict[str, Any]]:
+        """Node id -> merged counters across every shard plus unflushed counts."""
+        now = time.monotonic()
+        stored = self._view
+        if stored is None or now - self._view_at > max_age:
+            stored = {"nodes": {}, "choices": {}}
+            for shard in range(FUNNEL_SHARDS):
+                doc = storage.load_doc(shard_doc(shard))
+                if isinstance(doc, dict):
+                    _add_rows(stored["nodes"], doc.get("nodes") or {})
+                    _add_choices(stored["choices"], doc.get("choices") or {})
+            self._view, self._view_at = stored, now
+        rows = {k: list(v) for k, v in stored["nodes"].items()}
+        choices = {k: dict(v) for k, v in stored["choices"].items()}
+        with self._lock:
+            _add_rows(rows, self._rows)
+            _add_choices(choices, self._choices)
+        return {node_id: describe_node(rows.get(node_id, [0] * len(ROW_FIELDS)),
+                                       choices.get(node_id, {}))
+                for node_id in set(rows) | set(choices)}
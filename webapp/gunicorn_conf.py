@@ -0,0 +1,20 @@
+"""Gunicorn settings for a preloading deployment.
+
+    gunicorn -c webapp/gunicorn_conf.py "webapp.app:app"
+
+The master builds and freezes the app once; background jobs start in each
+worker from ``post_fork`` instead of in the master.
+"""
+import os
+
+preload_app = True
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+
+# Read by create_app() in the master, which is loaded after this file:
+# freeze the warmed-up objects and leave background jobs to the workers
+os.environ["TYPIST_WORKER_HOOKS"] = "1"
+
+
+def post_fork(server, worker):
+    from webapp.warmup import start_worker
+    start_worker(server, worker)
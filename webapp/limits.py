@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any
+
+from flask import Flask, jsonify, request
+
+# Backstop for every request; werkzeug refuses to read past it
+DEFAULT_MAX_CONTENT_LENGTH = 1 << 20
+# Submit bodies carry one typed line (plus ghost keystrokes, ~30 KB max)
+DEFAULT_SUBMIT_MAX_BYTES = 64 * 1024
+# Characters kept past the prompt length: room for a few stray keys
+DEFAULT_TYPED_SLACK = 32
+SUBMIT_SUFFIXES = ("/submit", "/finish", "/progress", "/sync")
+
+
+def clip_typed(value: Any, prompt: str, slack: int = DEFAULT_TYPED_SLACK) -> str:
+    """``typed`` cut to the prompt length plus ``slack``, before any scoring.
+
+    Scoring then costs O(len(prompt)) however much was pasted.
+    """
+    if not isinstance(value, str):
+        # str() of a huge list would cost as much as the paste itself
+        return ""
+    return value[:len(prompt) + max(0, slack)]
+
+
+def init_limits(app: Flask) -> None:
+    """Refuse oversized submit bodies before their JSON is parsed.
+
+    ``SUBMIT_MAX_BYTES`` caps POSTs to submit-style endpoints by their
+    declared Content-Length; ``MAX_CONTENT_LENGTH`` caps everything else.
+    """
+    app.config.setdefault("MAX_CONTENT_LENGTH", DEFAULT_MAX_CONTENT_LENGTH)
+    app.config.setdefault("SUBMIT_MAX_BYTES", DEFAULT_SUBMIT_MAX_BYTES)
+    app.config.setdefault("TYPED_SLACK", DEFAULT_TYPED_SLACK)
+
+    @app.before_request
+    def limit_submit_body():
+        if request.method != "POST" or not request.path.endswith(SUBMIT_SUFFIXES):
+            return None
+        length = request.content_length
+        if length is None:
+            # Chunked bodies can't be sized up front; fetch() never sends them
+            resp = jsonify({"error": "length_required"})
+            resp.status_code = 411
+            return resp
+        limit = app.config["SUBMIT_MAX_BYTES"]
+        if length > limit:
+            resp = jsonify({"error": "payload_too_large", "max_bytes": limit})
+            resp.status_code = 413
+            resp.headers["Connection"] = "close"
+            return resp
+        return None
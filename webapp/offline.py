@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from toilet_typist import (
+    GOOD_ACC_THRESHOLD,
+    GOOD_NET_WPM_THRESHOLD,
+    compute_stats,
+    generate_prompts_for_lesson,
+)
+from webapp.limits import DEFAULT_TYPED_SLACK, clip_typed
+
+# Modes the offline page can play, as named in score history -> rounds key
+OFFLINE_MODES = {"Word Drills": "drills", "Sentence Sprints": "sprints", "Story": "story"}
+OFFLINE_ROUNDS = {"drills": 10, "sprints": 6, "story": 5}
+# Bank words per drill prompt
+DRILL_WORDS = 4
+# Lesson prompts per chapter in the bundle; a chapter run samples from them
+STORY_PROMPT_POOL = 15
+# A sync costs one rate-limit token, so it may only carry a few runs
+MAX_SYNC_BATCH = 10
+# Dedup keys remembered per player; a queue older than this is long gone
+SYNC_KEEP_KEYS = 1000
+# Client play times further back than this are reported as the sync time
+MAX_OFFLINE_AGE = 30 * 86400
+MAX_NET_WPM = 300.0
+MAX_ROUND_SECONDS = 3600.0
+
+
+class SyncError(ValueError):
+    pass
+
+
+def offline_bundle(snapshot: Any, potty_mode: bool) -> Dict[str, Any]:
+    """Everything the offline page needs to run rounds without the server."""
+    # Seeded by version so a bundle's bytes (and ETag) only change with it.
+    # A private generator: other threads keep drawing from the global one.
+    rng = random.Random(f"offline:{snapshot.version}")
+    prompts = {
+        node.id: generate_prompts_for_lesson(node.lesson_keys, rounds=STORY_PROMPT_POOL,
+                                             rng=rng)
+        for node in snapshot.story.nodes
+    }
+    return {
+        "version": snapshot.version,
+        "potty_mode": potty_mode,
+        "rounds": OFFLINE_ROUNDS,
+        "drill_words": DRILL_WORDS,
+        "words": snapshot.word_bank(potty_mode),
+        "sentences": snapshot.sentence_bank(potty_mode),
+        "thresholds": {"net_wpm": GOOD_NET_WPM_THRESHOLD,
+                       "accuracy_pct": GOOD_ACC_THRESHOLD},
+        "story": {
+            "start": snapshot.story.ids[snapshot.story.start],
+            "nodes": {
+                node.id: {
+                    "title": node.title,
+                    "lesson_keys": node.lesson_keys,
+                    "success_text": node.success_text,
+                    "failure_text": node.failure_text,
+                    "choices": node.choices,
+                    "failure_next": node.failure_next,
+                    "prompts": prompts[node.id],
+                }
+                for node in snapshot.story.nodes
+            },
+        },
+    }
+
+
+def _pick(items: List[str], ref: Any) -> str:
+    if not isinstance(ref, int) or isinstance(ref, bool) or not 0 <= ref < len(items):
+        raise SyncError("unknown prompt")
+    return items[ref]
+
+
+def round_prompt(bundle: Dict[str, Any], kind: str, node: Optional[Dict[str, Any]],
+                 ref: Any) -> str:
+    """The prompt text a queued round refers to by its bundle indices."""
+    if kind == "drills":
+        if not isinstance(ref, list) or len(ref) != min(DRILL_WORDS, len(bundle["words"])):
+            raise SyncError("unknown prompt")
+        return " ".join(_pick(bundle["words"], i) for i in ref)
+    if kind == "sprints":
+        return _pick(bundle["sentences"], ref)
+    return _pick(node["prompts"], ref)
+
+
+def parse_result(raw: Any, bundle_for: Callable[[str, bool], Optional[Dict[str, Any]]],
+                 now: float, slack: int = DEFAULT_TYPED_SLACK) -> Dict[str, Any]:
+    """Score one queued run from what was typed; raises SyncError.
+
+    The client queues each round's prompt (as indices into the bundle it
+    played from), the typed text and the time taken, never its own
+    averages. ``bundle_for(version, potty_mode)`` rebuilds that bundle, or
+    returns None once the content version is retired. Rounds are then
+    scored with ``compute_stats``, as an online submit would be.
+    """
+    if not isinstance(raw, dict):
+        raise SyncError("not an object")
+    mode = raw.get("mode")
+    kind = OFFLINE_MODES.get(mode) if isinstance(mode, str) else None
+    if kind is None:
+        raise SyncError(f"unknown mode {mode!r}")
+    bundle = bundle_for(str(raw.get("content_version") or ""), bool(raw.get("potty_mode", True)))
+    if bundle is None:
+        raise SyncError("retired content version")
+    node = None
+    if kind == "story":
+        node = bundle["story"]["nodes"].get(str(raw.get("node") or ""))
+        if node is None:
+            raise SyncError("unknown story node")
+    rounds = raw.get("rounds")
+    if not isinstance(rounds, list) or len(rounds) != bundle["rounds"][kind]:
+        raise SyncError("wrong number of rounds")
+    total_net = total_acc = 0.0
+    for played_round in rounds:
+        if not isinstance(played_round, dict):
+            raise SyncError("bad round")
+        prompt = round_prompt(bundle, kind, node, played_round.get("prompt"))
+        try:
+            seconds = float(played_round["seconds"])
+        except (KeyError, TypeError, ValueError):
+            raise SyncError("bad seconds") from None
+        if not 0 < seconds <= MAX_ROUND_SECONDS:
+            raise SyncError("bad seconds")
+        stats = compute_stats(prompt, clip_typed(played_round.get("typed"), prompt, slack),
+                              seconds)
+        total_net += stats.net_wpm
+        total_acc += stats.accuracy_pct
+    try:
+        played = float(raw.get("played_at") or now)
+    except (TypeError, ValueError):
+        played = now
+    if not (math.isfinite(played) and now - MAX_OFFLINE_AGE <= played <= now):
+        played = now
+    result = {"mode": mode,
+              "net_wpm": min(total_net / len(rounds), MAX_NET_WPM),
+              "accuracy_pct": total_acc / len(rounds),
+              # When the client says it played; scores are stamped with the
+              # sync time, so this is only reported back
+              "played_at": int(played),
+              "content_version": bundle["version"]}
+    if kind == "story":
+        result["node"] = str(raw["node"])
+        result["next_id"] = str(raw.get("next_id") or "")
+    return result
+
+
+class SyncLedger:
+    """Remembers which queued results each player has already synced.
+
+    Keys live in one ``sync-<player>`` doc. A batch is applied and its keys
+    recorded while holding the store's lock on that doc, so a retried or
+    doubled upload is a no-op even when two workers receive it.
+    """
+
+    def __init__(self, keep: int = SYNC_KEEP_KEYS) -> None:
+        self.keep = keep
+
+    @staticmethod
+    def doc_name(player: str) -> str:
+        return f"sync-{player}"
+
+    def apply(self, storage, player: str, items: List[Any],
+              handle: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run ``handle`` on each item with a new key, in order.
+
+        ``handle`` raises SyncError for an item it won't accept. Returns
+        ``accepted``/``duplicate``/``rejected`` lists keyed by the client's
+        dedup key; the client can drop all three from its queue. Raises
+        StorageError if the player's sync doc stays locked.
+        """
+        if len(items) > MAX_SYNC_BATCH:
+            raise SyncError(f"at most {MAX_SYNC_BATCH} results per sync")
+        out: Dict[str, Any] = {"accepted": [], "duplicate": [], "rejected": []}
+
+        def claim(doc: Optional[Any]) -> Dict[str, Any]:
+            keys: List[str] = list(doc.get("keys") or []) if isinstance(doc, dict) else []
+            seen = set(keys)
+            for raw in items:
+                key = str(raw.get("key") or "") if isinstance(raw, dict) else ""
+                if not key or len(key) > 64:
+                    out["rejected"].append({"key": key, "error": "bad key"})
+                    continue
+                if key in seen:
+                    out["duplicate"].append(key)
+                    continue
+                try:
+                    out["accepted"].append(dict(handle(raw), key=key))
+                except SyncError as exc:
+                    out["rejected"].append({"key": key, "error": str(exc)})
+                # Rejected keys are final too: resending won't fix them
+                seen.add(key)
+                keys.append(key)
+            return {"keys": keys[-self.keep:]}
+
+        storage.update_doc(self.doc_name(player), claim)
+        return out
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, Response, current_app, has_app_context, request
+
+from webapp.compression import (
+    DEFAULT_MIN_SIZE,
+    SUPPORTED_ENCODINGS,
+    compress,
+    is_compressible,
+    negotiate_encoding,
+)
+
+
+@dataclass(frozen=True)
+class PrecomputedResponse:
+    """An immutable, fully-serialized response body built once at startup.
+
+    Compressed variants are built alongside the identity body so serving
+    never compresses on the request path.
+    """
+
+    body: bytes
+    mimetype: str
+    etag: str
+    cache_control: str
+    # encoding -> (compressed body, etag for that representation)
+    variants: Dict[str, Tuple[bytes, str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, mimetype: str, cache_control: str,
+              min_size: Optional[int] = None) -> "PrecomputedResponse":
+        if min_size is None:
+            # Same threshold as dynamic responses (COMPRESS_MIN_SIZE)
+            min_size = (current_app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+                        if has_app_context() else DEFAULT_MIN_SIZE)
+        etag = _etag_for(body)
+        variants: Dict[str, Tuple[bytes, str]] = {}
+        if is_compressible(mimetype) and len(body) >= min_size:
+            for encoding in SUPPORTED_ENCODINGS:
+                packed = compress(body, encoding)
+                if len(packed) < len(body):
+                    variants[encoding] = (packed, f"{etag}-{encoding}")
+        return cls(body, mimetype, etag, cache_control, variants)
+
+    def serve(self, app: Flask) -> Response:
+        encoding = negotiate_encoding(tuple(self.variants)) if self.variants else None
+        if encoding:
+            body, etag = self.variants[encoding]
+        else:
+            body, etag = self.body, self.etag
+        resp = app.response_class(body, mimetype=self.mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        if self.variants:
+            resp.vary.add("Accept-Encoding")
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = self.cache_control
+        # Turns a matching If-None-Match into a bodiless 304
+        return resp.make_conditional(request)
+
+
+def _etag_for(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def precompute_json(payload: Any, cache_control: str = "no-cache") -> PrecomputedResponse:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return PrecomputedResponse.build(body, "application/json", cache_control)
+
+
+def precompute_html(html: str, cache_control: str = "public, max-age=600") -> PrecomputedResponse:
+    return PrecomputedResponse.build(html.encode("utf-8"), "text/html", cache_control)
+
+
+def story_node_payload(node_id: str, node: Any,
+                       distance: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "current": node_id,
+        "distance_to_ending": distance,
+        "node": {
+            "id": node.id,
+            "title": node.title,
+            "lesson_keys": node.lesson_keys,
+            "success_text": node.success_text,
+            "failure_text": node.failure_text,
+            "choices": node.choices,
+            "failure_next": node.failure_next,
+        },
+    }
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Per-room bounds keep a room's memory O(MAX_PLAYERS) no matter how chatty
+# its clients are: each player holds only their latest state.
+MAX_PLAYERS = 8
+MAX_NAME_LEN = 24
+# Subscribers are woken at most this often, so bursts of progress updates
+# collapse into a single event per interval.
+BROADCAST_INTERVAL = 0.15
+COUNTDOWN_SECONDS = 3
+ROOM_TTL_SECONDS = 600
+MAX_ROOMS = 500
+
+
+class RaceError(Exception):
+    """Raised for invalid race operations; ``code`` is sent to the client."""
+
+    def __init__(self, code: str) -> None:
+        super().__init__(code)
+        self.code = code
+
+
+class RacePlayer:
+    __slots__ = ("id", "name", "chars", "finished", "net_wpm", "accuracy_pct",
+                 "version")
+
+    def __init__(self, player_id: str, name: str) -> None:
+        self.id = player_id
+        self.name = name
+        self.chars = 0
+        self.finished = False
+        self.net_wpm = 0.0
+        self.accuracy_pct = 0.0
+        self.version = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "chars": self.chars,
+            "finished": self.finished,
+            "net_wpm": round(self.net_wpm, 1),
+            "accuracy_pct": round(self.accuracy_pct, 1),
+        }
+
+
+class RaceRoom:
+    """One shared prompt plus the latest state of every player in it.
+
+    Publishers overwrite their own slot and bump a room-wide version;
+    subscribers ask for everything newer than the version they last saw.
+    """
+
+    def __init__(self, room_id: str, prompt: str, ttl: float = ROOM_TTL_SECONDS) -> None:
+        self.id = room_id
+        self.prompt = prompt
+        self.ttl = ttl
+        self.players: Dict[str, RacePlayer] = {}
+        self.version = 0
+        self.starts_at: Optional[float] = None
+        self.last_active = time.time()
+        self.closed = False
+        self._cond = threading.Condition()
+        # asyncio subscribers: each Event and the loop it must be set on
+        self._waiters: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+
+    # ----- Publishing -----
+    def _touch(self, player: Optional[RacePlayer] = None) -> None:
+        # Caller holds the lock
+        self.version += 1
+        if player is not None:
+            player.version = self.version
+        self.last_active = time.time()
+        self._cond.notify_all()
+        for event, loop in list(self._waiters.items()):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that loop has shut down
+
+    def join(self, name: str) -> RacePlayer:
+        with self._cond:
+            if self.starts_at is not None:
+                raise RaceError("already_started")
+            if len(self.players) >= MAX_PLAYERS:
+                raise RaceError("room_full")
+            player = RacePlayer(secrets.token_urlsafe(8),
+                                (name.strip() or "Anonymous")[:MAX_NAME_LEN])
+            self.players[player.id] = player
+            self._touch(player)
+            return player
+
+    def start(self) -> float:
+        with self._cond:
+            if self.starts_at is None:
+                self.starts_at = time.time() + COUNTDOWN_SECONDS
+                self._touch()
+            return self.starts_at
+
+    def progress(self, player_id: str, chars: int) -> None:
+        with self._cond:
+            player = self._player(player_id)
+            chars = max(0, min(chars, len(self.prompt)))
+            if player.finished or chars == player.chars:
+                return
+            player.chars = chars
+            self._touch(player)
+
+    def finish(self, player_id: str, net_wpm: float, accuracy_pct: float) -> None:
+        with self._cond:
+            player = self._player(player_id)
+            if player.finished:
+                raise RaceError("already_finished")
+            player.finished = True
+            player.chars = len(self.prompt)
+            player.net_wpm = net_wpm
+            player.accuracy_pct = accuracy_pct
+            self._touch(player)
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._touch()
+
+    def close_if_idle(self) -> bool:
+        """Close the room once nobody has acted in it for ``ttl`` seconds.
+
+        Subscribers call this on each heartbeat, so a stream left open on
+        an abandoned room ends instead of holding its connection forever.
+        """
+        with self._cond:
+            if not self.closed and time.time() - self.last_active > self.ttl:
+                self.closed = True
+                self._touch()
+            return self.closed
+
+    def _player(self, player_id: str) -> RacePlayer:
+        player = self.players.get(player_id)
+        if player is None:
+            raise RaceError("unknown_player")
+        if self.starts_at is None or time.time() < self.starts_at:
+            raise RaceError("not_started")
+        return player
+
+    # ----- Subscribing -----
+    def changes_since(self, version: int, timeout: float) -> Tuple[int, Dict[str, Any]]:
+        """Block until the room moves past ``version`` (or timeout).
+
+        Returns the new version and a delta containing only the players
+        that changed, so one event covers any number of coalesced updates.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version or self.closed,
+                                timeout=timeout)
+            return self.version, self._delta(version)
+
+    def add_waiter(self) -> asyncio.Event:
+        """An Event set on the calling loop whenever the room changes."""
+        event = asyncio.Event()
+        with self._cond:
+            self._waiters[event] = asyncio.get_running_loop()
+        return event
+
+    def remove_waiter(self, event: asyncio.Event) -> None:
+        with self._cond:
+            self._waiters.pop(event, None)
+
+    def _delta(self, version: int) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "starts_at": self.starts_at,
+            "closed": self.closed,
+            "players": [p.as_dict() for p in self.players.values()
+                        if p.version > version],
+        }
+
+    @property
+    def all_finished(self) -> bool:
+        return bool(self.players) and all(p.finished for p in self.players.values())
+
+
+class RaceHub:
+    """In-process registry and fan-out point for race rooms."""
+
+    def __init__(self, max_rooms: int = MAX_ROOMS,
+                 room_ttl: float = ROOM_TTL_SECONDS) -> None:
+        self.max_rooms = max_rooms
+        self.room_ttl = room_ttl
+        self._rooms: Dict[str, RaceRoom] = {}
+        self._lock = threading.Lock()
+
+    def create_room(self, prompt: str) -> RaceRoom:
+        with self._lock:
+            if len(self._rooms) >= self.max_rooms:
+                self._sweep_locked()
+            if len(self._rooms) >= self.max_rooms:
+                raise RaceError("hub_full")
+            room_id = secrets.token_hex(3)
+            while room_id in self._rooms:
+                room_id = secrets.token_hex(3)
+            room = RaceRoom(room_id, prompt, self.room_ttl)
+            self._rooms[room_id] = room
+            return room
+
+    def get(self, room_id: str) -> RaceRoom:
+        room = self._rooms.get(room_id)
+        if room is None or room.closed:
+            raise RaceError("unknown_room")
+        return room
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked()
+
+    def _sweep_locked(self) -> int:
+        cutoff = time.time() - self.room_ttl
+        stale = [rid for rid, room in self._rooms.items()
+                 if room.last_active < cutoff or room.closed]
+        for rid in stale:
+            self._rooms.pop(rid).close()
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+
+def sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def iter_room_events(room: RaceRoom, heartbeat: float = 15.0):
+    """Yield SSE frames for ``room`` until every player has finished."""
+    seen = -1
+    while True:
+        version, delta = room.changes_since(seen, timeout=heartbeat)
+        if version == seen:
+            if room.close_if_idle():
+                continue  # one last frame tells the client it closed
+            # Comment frame: keeps proxies from closing an idle stream
+            yield ": keepalive\n\n"
+        else:
+            seen = version
+            yield sse_event("state", json.dumps(delta, separators=(",", ":")))
+        if room.closed or room.all_finished:
+            return
+        # Hold back before the next wait so bursts coalesce into one frame
+        time.sleep(BROADCAST_INTERVAL)
+
+
+async def aiter_room_events(room: RaceRoom, heartbeat: float = 15.0):
+    """``iter_room_events`` for asyncio: each subscriber is a coroutine
+    parked on an Event rather than a thread parked on the Condition."""
+    seen = -1
+    waiter = room.add_waiter()
+    try:
+        while True:
+            waiter.clear()
+            # Cleared before looking, so a change made meanwhile still wakes us
+            version, delta = room.changes_since(seen, timeout=0)
+            if version == seen and not room.closed:
+                try:
+                    await asyncio.wait_for(waiter.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    pass
+                version, delta = room.changes_since(seen, timeout=0)
+            if version == seen:
+                if room.close_if_idle():
+                    continue
+                yield ": keepalive\n\n"
+            else:
+                seen = version
+                yield sse_event("state", json.dumps(delta, separators=(",", ":")))
+            if room.closed or room.all_finished:
+                return
+            await asyncio.sleep(BROADCAST_INTERVAL)
+    finally:
+        room.remove_waiter(waiter)
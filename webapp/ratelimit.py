@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, jsonify, request, session
+
+# Defaults: a person can't finish more than a few rounds a second, and the
+# whole process shouldn't be asked to write more than this many results.
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 10
+DEFAULT_GLOBAL_RATE = 200.0
+DEFAULT_GLOBAL_BURST = 400
+# Per-client buckets are spread over this many independently locked
+# stripes, so two clients rarely wait on each other.
+STRIPES = 32
+# Per-stripe cap before idle (full) buckets are swept out
+MAX_BUCKETS_PER_STRIPE = 2048
+# Paths ending in one of these are admission-controlled
+LIMITED_SUFFIXES = ("/submit", "/finish", "/sync")
+
+
+class TokenBucket:
+    """Refills continuously at ``rate`` tokens/s up to ``burst``."""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float) -> None:
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, rate: float, burst: float, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+
+    def wait_time(self, rate: float) -> float:
+        """Seconds until one token is available (0 if one is now)."""
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / rate if rate > 0 else math.inf
+
+
+class RateLimiter:
+    """Per-key and global token buckets.
+
+    ``acquire`` charges the key's bucket and then the global one, refunding
+    the key if the global bucket is empty. Each lock is held only for a few
+    float operations; the global lock is the one shared point.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 global_rate: float = DEFAULT_GLOBAL_RATE,
+                 global_burst: int = DEFAULT_GLOBAL_BURST,
+                 stripes: int = STRIPES) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._stripes: List[Dict[str, TokenBucket]] = [{} for _ in range(stripes)]
+        self._global_lock = threading.Lock()
+        self._global = TokenBucket(global_burst, time.monotonic())
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token for ``key``; returns 0 if admitted, else seconds to wait.
+
+        A rate of 0 or less leaves that level (per key or global) unlimited.
+        """
+        now = time.monotonic() if now is None else now
+        i = hash(key) % len(self._locks)
+        bucket = None
+        if self.rate > 0:
+            buckets = self._stripes[i]
+            with self._locks[i]:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    if len(buckets) >= MAX_BUCKETS_PER_STRIPE:
+                        self._sweep(buckets, now)
+                    bucket = buckets[key] = TokenBucket(self.burst, now)
+                bucket.refill(self.rate, self.burst, now)
+                wait = bucket.wait_time(self.rate)
+                if wait:
+                    return wait
+                bucket.tokens -= 1.0
+
+        if self.global_rate <= 0:
+            return 0.0
+        with self._global_lock:
+            self._global.refill(self.global_rate, self.global_burst, now)
+            wait = self._global.wait_time(self.global_rate)
+            if not wait:
+                self._global.tokens -= 1.0
+                return 0.0
+
+        # Globally throttled: don't also bill the client for it
+        if bucket is not None:
+            with self._locks[i]:
+                bucket.tokens = min(self.burst, bucket.tokens + 1.0)
+        return wait
+
+    def _sweep(self, buckets: Dict[str, TokenBucket], now: float) -> None:
+        # A bucket that would be full again carries no state worth keeping
+        for key in [k for k, b in buckets.items()
+                    if b.tokens + (now - b.updated) * self.rate >= self.burst]:
+            del buckets[key]
+
+    def stats(self) -> Tuple[int, float]:
+        """(tracked clients, global tokens left) for diagnostics."""
+        with self._global_lock:
+            tokens = self._global.tokens
+        return sum(len(b) for b in self._stripes), tokens
+
+
+def client_key() -> str:
+    # Session identity when the client keeps cookies, else its address
+    return session.get("player_id") or request.remote_addr or "?"
+
+
+def init_rate_limit(app: Flask) -> Optional[RateLimiter]:
+    """Reject over-eager POSTs to submit-style endpoints with 429.
+
+    Configured with ``RATE_LIMIT_RATE`` / ``RATE_LIMIT_BURST`` (per client)
+    and ``RATE_LIMIT_GLOBAL_RATE`` / ``RATE_LIMIT_GLOBAL_BURST``. A rate of
+    0 disables that level; with both at 0 there is no limiter at all.
+    """
+    app.config.setdefault("RATE_LIMIT_RATE", DEFAULT_RATE)
+    app.config.setdefault("RATE_LIMIT_BURST", DEFAULT_BURST)
+    app.config.setdefault("RATE_LIMIT_GLOBAL_RATE", DEFAULT_GLOBAL_RATE)
+    app.config.setdefault("RATE_LIMIT_GLOBAL_BURST", DEFAULT_GLOBAL_BURST)
+    if app.config["RATE_LIMIT_RATE"] <= 0 and app.config["RATE_LIMIT_GLOBAL_RATE"] <= 0:
+        return None
+    limiter = RateLimiter(
+        app.config["RATE_LIMIT_RATE"], app.config["RATE_LIMIT_BURST"],
+        app.config["RATE_LIMIT_GLOBAL_RATE"], app.config["RATE_LIMIT_GLOBAL_BURST"])
+
+    @app.before_request
+    def admit_request():
+        if request.method != "POST" or not request.path.endswith(LIMITED_SUFFIXES):
+            return None
+        wait = limiter.acquire(client_key())
+        if not wait:
+            return None
+        retry_after = max(1, math.ceil(min(wait, 3600)))
+        resp = jsonify({"error": "rate_limited", "retry_after": retry_after})
+        resp.status_code = 429
+        resp.headers["Retry-After"] = str(retry_after)
+        return resp
+
+    return limiter
@@ -0,0 +1,70 @@
+let startTime = 0;
+function now(){ return performance.now(); }
+
+async function loadBoard(){
+  const r = await fetch('/api/daily/leaderboard');
+  const data = await r.json();
+  document.getElementById('board_title').textContent = `Board for ${data.day} (${data.players} players)`;
+  const table = document.getElementById('board');
+  table.innerHTML = '<tr><th>#</th><th>Name</th><th>Net WPM</th><th>Acc%</th></tr>';
+  (data.leaders || []).forEach((e, i) => {
+    const tr = document.createElement('tr');
+    [i + 1, e.name, e.net_wpm, e.accuracy_pct].forEach(v => {
+      const td = document.createElement('td');
+      td.textContent = v;
+      tr.appendChild(td);
+    });
+    table.appendChild(tr);
+  });
+}
+
+async function startDaily(){
+  const name = document.getElementById('name').value;
+  await fetch('/api/daily/start', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({name})});
+  document.getElementById('setup').classList.add('hidden');
+  document.getElementById('summary').classList.add('hidden');
+  document.getElementById('play').classList.remove('hidden');
+  await nextPrompt();
+}
+
+async function nextPrompt(){
+  const r = await fetch('/api/daily/next');
+  const data = await r.json();
+  if(data.done){ return; }
+  document.getElementById('round_label').textContent = `Round ${data.round}/${data.rounds}`;
+  document.getElementById('prompt').textContent = data.prompt;
+  document.getElementById('typed').value = '';
+  document.getElementById('typed').focus();
+  startTime = now();
+}
+
+async function submitPrompt(){
+  const typed = document.getElementById('typed').value;
+  const seconds = (now() - startTime) / 1000.0;
+  const r = await fetch('/api/daily/submit', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({typed, seconds})});
+  const data = await r.json();
+  if(!data.stats){ return; }
+  const s = data.stats;
+  document.getElementById('result').textContent = `Time ${s.seconds.toFixed(1)}s | Gross ${s.gross_wpm.toFixed(1)} | Acc ${s.accuracy_pct.toFixed(1)}% | Net ${s.net_wpm.toFixed(1)} — ${data.comment}`;
+  if(data.done){
+    document.getElementById('play').classList.add('hidden');
+    document.getElementById('setup').classList.remove('hidden');
+    const el = document.getElementById('summary');
+    el.classList.remove('hidden');
+    const best = data.improved ? ' — new personal best for today!' : '';
+    el.textContent = `Averages — Net ${data.summary.avg_net} | Acc ${data.summary.avg_acc}% | Rank #${data.rank}${best}`;
+    await loadBoard();
+  } else {
+    await nextPrompt();
+  }
+}
+
+document.getElementById('start').addEventListener('click', startDaily);
+document.getElementById('submit').addEventListener('click', submitPrompt);
+document.getElementById('typed').addEventListener('keydown', (e) => {
+  if (e.key === 'Enter' && !e.shiftKey) {
+    e.preventDefault();
+    submitPrompt();
+  }
+});
+loadBoard();
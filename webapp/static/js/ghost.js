@@ -0,0 +1,117 @@
+const BACKSPACE = 8;
+let startTime = null;
+let events = [];
+let ghost = null;
+let ghostStop = false;
+function now(){ return performance.now(); }
+
+// Incrementally decode a replay as its bytes arrive: "TTR1", varint prompt
+// length, prompt bytes, then (delta ms, key code) varint pairs.
+async function* replayEvents(scoreId){
+  const r = await fetch(`/api/replays/${scoreId}`);
+  if(!r.ok){ return; }
+  const reader = r.body.getReader();
+  let buf = new Uint8Array(0);
+  let pos = 0;
+  let done = false;
+  async function need(n){
+    while(buf.length - pos < n && !done){
+      const chunk = await reader.read();
+      if(chunk.done){ done = true; break; }
+      const merged = new Uint8Array(buf.length - pos + chunk.value.length);
+      merged.set(buf.subarray(pos));
+      merged.set(chunk.value, buf.length - pos);
+      buf = merged;
+      pos = 0;
+    }
+    return buf.length - pos >= n;
+  }
+  async function varint(){
+    let shift = 0, result = 0;
+    while(true){
+      if(!(await need(1))){ return null; }
+      const b = buf[pos++];
+      result += (b & 0x7f) * Math.pow(2, shift);
+      if(!(b & 0x80)){ return result; }
+      shift += 7;
+    }
+  }
+  if(!(await need(4))){ return; }
+  pos += 4;
+  const len = await varint();
+  if(len === null || !(await need(len))){ return; }
+  pos += len;
+  let t = 0;
+  while(true){
+    const delta = await varint();
+    if(delta === null){ return; }
+    const code = await varint();
+    if(code === null){ return; }
+    t += delta;
+    yield {t, code};
+  }
+}
+
+function sleep(ms){ return new Promise(res => setTimeout(res, ms)); }
+
+async function runGhost(){
+  if(!ghost){ return; }
+  const el = document.getElementById('ghost');
+  let text = '';
+  for await (const ev of replayEvents(ghost.score_id)){
+    if(ghostStop){ return; }
+    const wait = startTime + ev.t - now();
+    if(wait > 0){ await sleep(wait); }
+    text = ev.code === BACKSPACE ? text.slice(0, -1) : text + String.fromCodePoint(ev.code);
+    el.textContent = `👻 ${text}`;
+  }
+}
+
+async function begin(against){
+  const r = await fetch('/api/ghost/start', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({against})});
+  const data = await r.json();
+  ghost = data.ghost;
+  document.getElementById('setup').classList.add('hidden');
+  document.getElementById('play').classList.remove('hidden');
+  document.getElementById('prompt').textContent = data.prompt;
+  document.getElementById('ghost_label').textContent = ghost
+    ? `Ghost: ${ghost.net_wpm} WPM at ${ghost.accuracy_pct}%`
+    : 'No ghost yet — this run becomes the first one.';
+  document.getElementById('ghost').textContent = ghost ? '👻' : '';
+  const typed = document.getElementById('typed');
+  typed.value = '';
+  typed.focus();
+}
+
+async function finish(){
+  ghostStop = true;
+  const typed = document.getElementById('typed').value;
+  const seconds = startTime === null ? 0 : (now() - startTime) / 1000.0;
+  const r = await fetch('/api/ghost/submit', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({typed, seconds, events})});
+  const data = await r.json();
+  document.getElementById('play').classList.add('hidden');
+  if(data.stats){
+    const s = data.stats;
+    document.getElementById('result').textContent = `Time ${s.seconds.toFixed(1)}s | Gross ${s.gross_wpm.toFixed(1)} | Acc ${s.accuracy_pct.toFixed(1)}% | Net ${s.net_wpm.toFixed(1)} — ${data.comment}`;
+  }
+}
+
+document.getElementById('vs_me').addEventListener('click', () => begin('me'));
+document.getElementById('vs_leader').addEventListener('click', () => begin('leader'));
+document.getElementById('typed').addEventListener('keydown', (e) => {
+  if (e.key === 'Enter' && !e.shiftKey) {
+    e.preventDefault();
+    finish();
+    return;
+  }
+  let code = null;
+  if (e.key === 'Backspace') { code = BACKSPACE; }
+  else if (e.key.length <= 2 && !e.ctrlKey && !e.metaKey) { code = e.key.codePointAt(0); }
+  if (code === null) { return; }
+  if (startTime === null) {
+    // The ghost starts with the player's first keystroke
+    startTime = now();
+    runGhost();
+  }
+  events.push([Math.round(now() - startTime), code]);
+});
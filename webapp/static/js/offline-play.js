@@ -0,0 +1,191 @@
+// Rounds played entirely in the browser from the cached content bundle.
+// Finished runs go to the sync queue (offline.js) and reach the server later.
+// A queued run lists each round's prompt (as indices into the bundle), what
+// was typed and how long it took; the server does the scoring.
+const BUNDLE_KEY = 'typist-bundle';
+const STORY_KEY = 'typist-story-node';
+let bundle = null;
+let run = null;
+let startTime = 0;
+function now(){ return performance.now(); }
+
+// Same scoring as compute_stats in toilet_typist.py, for display only
+function computeStats(expected, typed, seconds){
+  if(seconds <= 0){ seconds = 1e-6; }
+  let correct = 0;
+  const n = Math.min(expected.length, typed.length);
+  for(let i = 0; i < n; i++){ if(expected[i] === typed[i]){ correct++; } }
+  const accuracy_pct = correct / Math.max(expected.length, 1) * 100.0;
+  const gross_wpm = (typed.length / 5.0) / (seconds / 60.0);
+  return {seconds, gross_wpm, accuracy_pct, net_wpm: gross_wpm * accuracy_pct / 100.0};
+}
+
+// k distinct indices into a list of n items
+function sampleIndexes(n, k){
+  const pool = Array.from({length: n}, (_, i) => i);
+  for(let i = pool.length - 1; i > 0; i--){
+    const j = Math.floor(Math.random() * (i + 1));
+    [pool[i], pool[j]] = [pool[j], pool[i]];
+  }
+  return pool.slice(0, Math.min(k, pool.length));
+}
+
+// Prompts as {ref, text}: ref is what the server needs to find the text
+function pick(items, k){
+  return sampleIndexes(items.length, k).map(i => ({ref: i, text: items[i]}));
+}
+
+function show(id, visible){ document.getElementById(id).classList.toggle('hidden', !visible); }
+
+function storyNode(){
+  const id = localStorage.getItem(STORY_KEY);
+  return bundle.story.nodes[id] ? id : bundle.story.start;
+}
+
+function updateQueue(){
+  const n = window.TypistOffline ? TypistOffline.pending() : 0;
+  document.getElementById('queue').textContent = n
+    ? `${n} result(s) waiting to sync — they upload as soon as you're back online.`
+    : 'All results are synced.';
+}
+
+async function loadBundle(){
+  try {
+    const r = await fetch('/api/offline/bundle');
+    bundle = await r.json();
+    localStorage.setItem(BUNDLE_KEY, JSON.stringify(bundle));
+  } catch (e) {
+    try { bundle = JSON.parse(localStorage.getItem(BUNDLE_KEY)); } catch (e2) { bundle = null; }
+  }
+  const status = document.getElementById('status');
+  if(!bundle){
+    status.textContent = 'Open this page once while online to download practice content.';
+    return;
+  }
+  try {
+    // The server's story position wins whenever we can reach it
+    const r = await fetch('/api/story/current');
+    const data = await r.json();
+    if(data.current){ localStorage.setItem(STORY_KEY, data.current); }
+  } catch (e) {}
+  status.textContent = `Content ${bundle.version} — ${navigator.onLine === false ? 'offline' : 'online'}. Next chapter: ${bundle.story.nodes[storyNode()].title}`;
+  show('setup', true);
+  updateQueue();
+}
+
+function startRun(mode, prompts, finish){
+  run = {mode, prompts, finish, current: 0, total_net: 0, total_acc: 0, rounds: []};
+  ['setup', 'narrative', 'choices', 'summary'].forEach(id => show(id, false));
+  show('play', true);
+  nextPrompt();
+}
+
+function nextPrompt(){
+  document.getElementById('round_label').textContent = `${run.mode} — Round ${run.current + 1}/${run.prompts.length}`;
+  document.getElementById('prompt').textContent = run.prompts[run.current].text;
+  document.getElementById('typed').value = '';
+  document.getElementById('typed').focus();
+  startTime = now();
+}
+
+function submitPrompt(){
+  if(!run){ return; }
+  const typed = document.getElementById('typed').value;
+  const prompt = run.prompts[run.current];
+  const s = computeStats(prompt.text, typed, (now() - startTime) / 1000.0);
+  run.rounds.push({prompt: prompt.ref, typed, seconds: s.seconds});
+  document.getElementById('result').textContent = `Time ${s.seconds.toFixed(1)}s | Gross ${s.gross_wpm.toFixed(1)} | Acc ${s.accuracy_pct.toFixed(1)}% | Net ${s.net_wpm.toFixed(1)}`;
+  run.total_net += s.net_wpm;
+  run.total_acc += s.accuracy_pct;
+  run.current++;
+  if(run.current < run.prompts.length){ return nextPrompt(); }
+  const done = run;
+  run = null;
+  show('play', false);
+  done.finish(done.total_net / done.prompts.length, done.total_acc / done.prompts.length, done.rounds);
+}
+
+function queueResult(result){
+  result.content_version = bundle.version;
+  result.potty_mode = bundle.potty_mode;
+  if(window.TypistOffline){ TypistOffline.queue(result).then(updateQueue); }
+  updateQueue();
+}
+
+function finishPractice(mode){
+  return (net, acc, rounds) => {
+    queueResult({mode, rounds});
+    const el = document.getElementById('summary');
+    el.textContent = `Averages — Net ${net.toFixed(1)} | Acc ${acc.toFixed(1)}%`;
+    show('summary', true);
+    show('setup', true);
+  };
+}
+
+function startDrills(){
+  const prompts = [];
+  for(let i = 0; i < bundle.rounds.drills; i++){
+    const ids = sampleIndexes(bundle.words.length, bundle.drill_words);
+    prompts.push({ref: ids, text: ids.map(j => bundle.words[j]).join(' ')});
+  }
+  startRun('Word Drills', prompts, finishPractice('Word Drills'));
+}
+
+function startSprints(){
+  startRun('Sentence Sprints', pick(bundle.sentences, bundle.rounds.sprints), finishPractice('Sentence Sprints'));
+}
+
+function startStory(){
+  const nodeId = storyNode();
+  const node = bundle.story.nodes[nodeId];
+  startRun(node.title, pick(node.prompts, bundle.rounds.story), (net, acc, rounds) => {
+    const t = bundle.thresholds;
+    // Provisional: the server re-checks against its own thresholds on sync
+    const passed = net >= t.net_wpm && acc >= t.accuracy_pct;
+    const nar = document.getElementById('narrative');
+    const result = {mode: 'Story', node: nodeId, rounds};
+    show('narrative', true);
+    if(!passed){
+      nar.textContent = node.failure_text;
+      localStorage.setItem(STORY_KEY, node.failure_next || nodeId);
+      queueResult(result);
+      show('setup', true);
+      return;
+    }
+    nar.textContent = node.choices.length ? node.success_text : `${node.success_text} — The story concludes for now. Congrats!`;
+    if(!node.choices.length){
+      queueResult(result);
+      show('setup', true);
+      return;
+    }
+    const choices = document.getElementById('choices');
+    choices.innerHTML = '';
+    node.choices.forEach(([label, nextId]) => {
+      const btn = document.createElement('button');
+      btn.className = 'btn';
+      btn.textContent = label;
+      btn.addEventListener('click', () => {
+        localStorage.setItem(STORY_KEY, nextId);
+        queueResult(Object.assign(result, {next_id: nextId}));
+        show('choices', false);
+        show('setup', true);
+      });
+      choices.appendChild(btn);
+    });
+    show('choices', true);
+  });
+}
+
+document.addEventListener('typist-synced', (e) => {
+  // Follow the server's story position once it has seen our results
+  e.detail.accepted.forEach(a => { if(a.current_node){ localStorage.setItem(STORY_KEY, a.current_node); } });
+  updateQueue();
+});
+document.getElementById('start_drills').addEventListener('click', startDrills);
+document.getElementById('start_sprints').addEventListener('click', startSprints);
+document.getElementById('start_story').addEventListener('click', startStory);
+document.getElementById('submit').addEventListener('click', submitPrompt);
+document.getElementById('typed').addEventListener('keydown', (e) => {
+  if(e.key === 'Enter' && !e.shiftKey){ e.preventDefault(); submitPrompt(); }
+});
+loadBundle();
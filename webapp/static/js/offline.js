@@ -0,0 +1,57 @@
+// Registers the service worker and uploads results queued while offline.
+(function(){
+  const QUEUE_KEY = 'typist-sync-queue';
+  const BATCH = 10;  // MAX_SYNC_BATCH in webapp/offline.py
+
+  function load(){
+    try { return JSON.parse(localStorage.getItem(QUEUE_KEY)) || []; } catch (e) { return []; }
+  }
+
+  function store(items){ localStorage.setItem(QUEUE_KEY, JSON.stringify(items)); }
+
+  function newKey(){
+    if(window.crypto && crypto.randomUUID){ return crypto.randomUUID(); }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+
+  function queue(result){
+    const items = load();
+    items.push(Object.assign({key: newKey(), played_at: Math.floor(Date.now() / 1000)}, result));
+    store(items);
+    return flush();
+  }
+
+  async function upload(){
+    let last = null;
+    while(navigator.onLine !== false){
+      const batch = load().slice(0, BATCH);
+      if(!batch.length){ break; }
+      let r;
+      try {
+        r = await fetch('/api/sync', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({results: batch})});
+      } catch (e) { break; }
+      if(!r.ok){ break; }
+      last = await r.json();
+      const done = new Set(last.accepted.map(a => a.key).concat(last.duplicate, last.rejected.map(x => x.key)));
+      store(load().filter(item => !done.has(item.key)));
+      document.dispatchEvent(new CustomEvent('typist-synced', {detail: last}));
+    }
+    return last;
+  }
+
+  let flushing = null;
+  function flush(){
+    // One upload at a time; the key makes a resend after a lost reply harmless
+    if(!flushing){
+      flushing = upload().finally(() => { flushing = null; });
+    }
+    return flushing;
+  }
+
+  window.TypistOffline = {queue, flush, pending: () => load().length};
+  window.addEventListener('online', flush);
+  window.addEventListener('load', flush);
+  if('serviceWorker' in navigator){
+    navigator.serviceWorker.register('/sw.js').catch(() => {});
+  }
+})();
@@ -0,0 +1,105 @@
+let startTime = 0;
+let prompt = '';
+let myId = '';
+let racing = false;
+let progressTimer = null;
+let lastSent = null;
+const racers = {};
+function now(){ return performance.now(); }
+
+function post(url, body){
+  return fetch(url, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(body || {})});
+}
+
+async function join(){
+  const name = document.getElementById('name').value;
+  const room = document.getElementById('room').value;
+  const r = await post('/api/race/join', {name, room});
+  const data = await r.json();
+  if(data.error){
+    document.getElementById('error').textContent = `Could not join: ${data.error}`;
+    return;
+  }
+  prompt = data.prompt;
+  myId = data.player;
+  document.getElementById('setup').classList.add('hidden');
+  document.getElementById('lobby').classList.remove('hidden');
+  document.getElementById('room_code').textContent = data.room;
+  listen(data.room);
+}
+
+function listen(room){
+  const source = new EventSource(`/api/race/${room}/events`);
+  source.addEventListener('state', (e) => {
+    const delta = JSON.parse(e.data);
+    delta.players.forEach(p => { racers[p.id] = p; });
+    renderRacers();
+    if(delta.starts_at && !racing){ beginCountdown(delta.starts_at); }
+    if(delta.closed){ source.close(); }
+  });
+}
+
+function renderRacers(){
+  const table = document.getElementById('racers');
+  table.innerHTML = '<tr><th>Racer</th><th>Progress</th><th>Net WPM</th><th>Acc%</th></tr>';
+  Object.values(racers).forEach(p => {
+    const pct = prompt.length ? Math.round(100 * p.chars / prompt.length) : 0;
+    const row = document.createElement('tr');
+    const me = p.id === myId ? ' (you)' : '';
+    row.innerHTML = `<td></td><td>${pct}%</td><td>${p.finished ? p.net_wpm : ''}</td><td>${p.finished ? p.accuracy_pct : ''}</td>`;
+    row.firstChild.textContent = p.name + me;
+    table.appendChild(row);
+  });
+}
+
+function beginCountdown(startsAt){
+  racing = true;
+  document.getElementById('start').classList.add('hidden');
+  // Server clock is in seconds; convert the remaining delay to local time
+  const delayMs = Math.max(0, startsAt * 1000 - Date.now());
+  const el = document.getElementById('countdown');
+  const tick = setInterval(() => {
+    const left = Math.ceil((startsAt * 1000 - Date.now()) / 1000);
+    el.textContent = left > 0 ? `Starting in ${left}...` : 'Go!';
+  }, 200);
+  setTimeout(() => {
+    clearInterval(tick);
+    el.textContent = 'Go!';
+    document.getElementById('play').classList.remove('hidden');
+    document.getElementById('prompt').textContent = prompt;
+    const typed = document.getElementById('typed');
+    typed.value = '';
+    typed.focus();
+    startTime = now();
+    progressTimer = setInterval(sendProgress, 250);
+  }, delayMs);
+}
+
+async function sendProgress(){
+  const typed = document.getElementById('typed').value;
+  if(typed === lastSent){ return; }
+  lastSent = typed;
+  await post('/api/race/progress', {typed});
+}
+
+async function finish(){
+  if(progressTimer){ clearInterval(progressTimer); progressTimer = null; }
+  const typed = document.getElementById('typed').value;
+  const seconds = (now() - startTime) / 1000.0;
+  const r = await post('/api/race/finish', {typed, seconds});
+  const data = await r.json();
+  document.getElementById('play').classList.add('hidden');
+  if(data.stats){
+    const s = data.stats;
+    document.getElementById('result').textContent = `Time ${s.seconds.toFixed(1)}s | Gross ${s.gross_wpm.toFixed(1)} | Acc ${s.accuracy_pct.toFixed(1)}% | Net ${s.net_wpm.toFixed(1)} — ${data.comment}`;
+  }
+}
+
+document.getElementById('join').addEventListener('click', join);
+document.getElementById('start').addEventListener('click', () => post('/api/race/start'));
+document.getElementById('typed').addEventListener('keydown', (e) => {
+  if (e.key === 'Enter' && !e.shiftKey) {
+    e.preventDefault();
+    finish();
+  }
+});
@@ -0,0 +1,67 @@
+const PAGE_SIZE = 25;
+let nextCursor = null;
+let loading = false;
+let exhausted = false;
+
+function filterParams(){
+  const params = new URLSearchParams({limit: PAGE_SIZE});
+  const mode = document.getElementById('mode').value;
+  const since = document.getElementById('since').value;
+  const until = document.getElementById('until').value;
+  const minAcc = document.getElementById('min_accuracy').value;
+  if(mode){ params.set('mode', mode); }
+  if(since){ params.set('since', since); }
+  if(until){
+    // Inclusive end date: stop at the start of the following day
+    const end = new Date(until + 'T00:00:00Z');
+    end.setUTCDate(end.getUTCDate() + 1);
+    params.set('until', Math.floor(end.getTime() / 1000));
+  }
+  if(minAcc){ params.set('min_accuracy', minAcc); }
+  return params;
+}
+
+function resetTable(){
+  const table = document.getElementById('scores');
+  table.innerHTML = '<tr><th>When</th><th>Mode</th><th>Net WPM</th><th>Acc%</th></tr>';
+  nextCursor = null;
+  exhausted = false;
+}
+
+async function loadPage(){
+  if(loading || exhausted){ return; }
+  loading = true;
+  document.getElementById('status').textContent = 'Loading…';
+  const params = filterParams();
+  if(nextCursor){ params.set('cursor', nextCursor); }
+  const r = await fetch('/api/scores?' + params.toString());
+  const data = await r.json();
+  const table = document.getElementById('scores');
+  (data.scores || []).forEach(s => {
+    const when = new Date((s.timestamp || 0) * 1000).toLocaleString();
+    const row = document.createElement('tr');
+    row.innerHTML = `<td>${when}</td><td></td><td>${s.net_wpm || 0}</td><td>${s.accuracy_pct || 0}</td>`;
+    row.children[1].textContent = s.mode || '';
+    table.appendChild(row);
+  });
+  nextCursor = data.next_cursor || null;
+  exhausted = !nextCursor;
+  document.getElementById('more').classList.toggle('hidden', exhausted);
+  document.getElementById('status').textContent = exhausted && table.rows.length <= 1 ? 'No scores yet. The scoreboard is dryer than a desert toilet.' : '';
+  loading = false;
+}
+
+// Fetch the next page as the "Load more" button scrolls into view
+const observer = new IntersectionObserver((entries) => {
+  if(entries.some(e => e.isIntersecting)){ loadPage(); }
+});
+observer.observe(document.getElementById('more'));
+
+document.getElementById('more').addEventListener('click', loadPage);
+document.getElementById('filters').addEventListener('submit', (e) => {
+  e.preventDefault();
+  resetTable();
+  loadPage();
+});
+resetTable();
+loadPage();
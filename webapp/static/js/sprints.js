@@ -0,0 +1,51 @@
+let startTime = 0;
+function now(){ return performance.now(); }
+
+async function startRun(){
+  await fetch('/api/sprints/start', {method:'POST'});
+  document.getElementById('setup').classList.add('hidden');
+  document.getElementById('play').classList.remove('hidden');
+  await nextPrompt();
+}
+
+async function nextPrompt(){
+  const r = await fetch('/api/sprints/next');
+  const data = await r.json();
+  if(data.done){ finishRun(); return; }
+  document.getElementById('round_label').textContent = `Sprint ${data.round}/${data.rounds}`;
+  document.getElementById('prompt').textContent = data.prompt;
+  document.getElementById('typed').value = '';
+  document.getElementById('typed').focus();
+  document.getElementById('result').textContent = '';
+  startTime = now();
+}
+
+async function submitPrompt(){
+  const typed = document.getElementById('typed').value;
+  const seconds = (now() - startTime) / 1000.0;
+  const r = await fetch('/api/sprints/submit', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({typed, seconds})});
+  const data = await r.json();
+  const s = data.stats;
+  document.getElementById('result').textContent = `Time ${s.seconds.toFixed(1)}s | Gross ${s.gross_wpm.toFixed(1)} | Acc ${s.accuracy_pct.toFixed(1)}% | Net ${s.net_wpm.toFixed(1)} — ${data.comment}`;
+  if(data.done){
+    finishRun(data.summary);
+  } else {
+    await nextPrompt();
+  }
+}
+
+function finishRun(summary){
+  document.getElementById('play').classList.add('hidden');
+  const el = document.getElementById('summary');
+  el.classList.remove('hidden');
+  if(summary){ el.textContent = `Averages — Net ${summary.avg_net} | Acc ${summary.avg_acc}%`; }
+}
+
+document.getElementById('start').addEventListener('click', startRun);
+document.getElementById('submit').addEventListener('click', submitPrompt);
+document.getElementById('typed').addEventListener('keydown', (e) => {
+  if (e.key === 'Enter' && !e.shiftKey) {
+    e.preventDefault();
+    submitPrompt();
+  }
+});
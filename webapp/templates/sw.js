@@ -0,0 +1,48 @@
+// Offline support: the offline page and every asset are cached on install;
+// the content bundle is fetched network-first and kept for offline play.
+const SHELL = {{ shell|tojson }};
+const CACHE = {{ cache_name|tojson }};
+const OFFLINE_PAGE = SHELL[0];
+const BUNDLE = {{ url_for('api_offline_bundle')|tojson }};
+const ASSETS = {{ url_for('asset', filename='')|tojson }};
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(caches.open(CACHE).then((cache) => cache.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((names) => Promise.all(names.filter((n) => n.startsWith('toilet-typist-') && n !== CACHE).map((n) => caches.delete(n))))
+      .then(() => self.clients.claim())
+  );
+});
+
+async function networkFirst(request){
+  const cache = await caches.open(CACHE);
+  try {
+    const response = await fetch(request);
+    if(response.ok){ cache.put(request, response.clone()); }
+    return response;
+  } catch (err) {
+    const cached = await cache.match(request);
+    if(cached){ return cached; }
+    throw err;
+  }
+}
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  if(request.method !== 'GET'){ return; }
+  const url = new URL(request.url);
+  if(url.origin !== self.location.origin){ return; }
+  if(url.pathname === BUNDLE){
+    event.respondWith(networkFirst(request));
+  } else if(url.pathname.startsWith(ASSETS)){
+    // Fingerprinted, so a cached copy is never stale
+    event.respondWith(caches.match(request).then((hit) => hit || fetch(request)));
+  } else if(request.mode === 'navigate'){
+    // Every page needs the server; without it, offer the offline page
+    event.respondWith(fetch(request).catch(() => caches.match(OFFLINE_PAGE)));
+  }
+});
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, jsonify
+
+WarmStep = Tuple[str, Callable[[], Any]]
+
+
+class WarmState:
+    """Outcome of the last warm-up; ``/api/ready`` reports it."""
+
+    __slots__ = ("ready", "error", "steps", "frozen", "pid", "_lock")
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.error: Optional[str] = None
+        # step name -> milliseconds taken
+        self.steps: Dict[str, float] = {}
+        self.frozen = 0
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "steps_ms": self.steps,
+            "frozen_objects": self.frozen,
+            # Differs from the serving pid when the app was preloaded
+            "warmed_in_pid": self.pid,
+            "pid": os.getpid(),
+        }
+
+
+def compile_templates(app: Flask) -> int:
+    """Load every template into the Jinja cache so no request compiles one."""
+    env = app.jinja_env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def warm_start(app: Flask, state: WarmState, steps: List[WarmStep]) -> bool:
+    """Run ``steps`` in order, then move everything they built out of GC tracking.
+
+    Run in a preloading master, this leaves the immutable data on pages
+    the workers share: a frozen object is never touched by a collection,
+    so its refcount header is the only thing that can still dirty a page.
+    Returns True once every step has succeeded; a failed step leaves the
+    app not ready and can be retried.
+    """
+    if not state._lock.acquire(blocking=False):
+        return state.ready
+    try:
+        if state.ready:
+            return True
+        for name, step in steps:
+            if name in state.steps:
+                continue
+            started = time.perf_counter()
+            try:
+                with app.app_context():
+                    step()
+            except Exception as exc:
+                state.error = f"{name}: {exc}"
+                return False
+            state.steps[name] = round((time.perf_counter() - started) * 1000, 2)
+        state.error = None
+        if app.config["WARM_START_FREEZE"]:
+            # Collect first so garbage isn't frozen along with the data
+            gc.collect()
+            gc.freeze()
+            state.frozen = gc.get_freeze_count()
+        state.pid = os.getpid()
+        state.ready = True
+        return True
+    finally:
+        state._lock.release()
+
+
+# Set by a preloading server config whose post_fork hook calls
+# ``start_worker`` below
+WORKER_HOOKS_ENV = "TYPIST_WORKER_HOOKS"
+# Set to start background jobs in whichever process creates the app
+BACKGROUND_JOBS_ENV = "TYPIST_BACKGROUND_JOBS"
+# start -> pid it last ran in
+_worker_starts: Dict[Callable[[], Any], Optional[int]] = {}
+
+
+def worker_hooks() -> bool:
+    """True in a preloading server that starts each worker with ``start_worker``."""
+    return os.environ.get(WORKER_HOOKS_ENV) == "1"
+
+
+def start_in_workers(start: Callable[[], Any]) -> None:
+    """Have ``start`` run once in each process that serves requests.
+
+    Creating the app starts nothing by itself, so scripts, tests and a
+    preloading master get no threads or exit hooks. A serving process
+    calls ``start_worker``: gunicorn's ``post_fork`` (see
+    ``webapp/gunicorn_conf.py``), the ASGI app at lifespan startup, or
+    ``python webapp/app.py``. For any other server, set
+    ``TYPIST_BACKGROUND_JOBS=1`` to run ``start`` as the app is created.
+    """
+    _worker_starts[start] = None
+    if os.environ.get(BACKGROUND_JOBS_ENV) == "1" and not worker_hooks():
+        start_worker()
+
+
+def start_worker(server: Any = None, worker: Any = None) -> None:
+    """Run every registered start not yet run in this process.
+
+    Takes gunicorn's ``post_fork(server, worker)`` arguments.
+    """
+    pid = os.getpid()
+    for start, ran_in in list(_worker_starts.items()):
+        if ran_in != pid:
+            _worker_starts[start] = pid
+            start()
+
+
+def init_warmup(app: Flask, steps: List[WarmStep]) -> WarmState:
+    """Warm the app up now and serve ``GET /api/ready`` (503 until warm)."""
+    # Freezing only pays off when forked workers share the master's pages
+    app.config.setdefault("WARM_START_FREEZE", worker_hooks())
+    state = WarmState()
+    steps = [("templates", lambda: compile_templates(app))] + list(steps)
+
+    @app.get("/api/ready")
+    def api_ready():
+        # A failed step (e.g. storage unreachable) is retried on each probe
+        ready = state.ready or warm_start(app, state, steps)
+        resp = jsonify(state.as_dict())
+        resp.status_code = 200 if ready else 503
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
+
+    warm_start(app, state, steps)
+    return state